@@ -0,0 +1,103 @@
+"""
+ Gerador de carga para o serviço (servico.py)
+
+      python benchmarks/carga_servico.py [clientes] [pedidos_por_cliente]
+      python benchmarks/carga_servico.py 64 500 --unix /tmp/grapsi.sock
+
+ Sem --unix/--porta o serviço é iniciado no mesmo processo (socket Unix
+ temporário). Cada cliente abre uma conexão e envia pedidos de ponto de
+ estado (tbs, ur) com altitude aleatória, um de cada vez, esperando a
+ resposta (laço fechado). Mostra vazão e latências p50/p99 para microlotes
+ (janela padrão) e, para comparação, sem agrupamento (lote de 1).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import servico  # noqa: E402
+
+
+async def cliente(abrir, pedidos, latencias):
+    leitor, escritor = await abrir()
+    for pedido in pedidos:
+        inicio = time.perf_counter()
+        escritor.write(pedido)
+        resposta = json.loads(await leitor.readline())
+        latencias.append(time.perf_counter() - inicio)
+        if 'erro' in resposta:
+            raise RuntimeError(resposta['erro'])
+    escritor.close()
+
+
+async def carga(abrir, clientes, por_cliente, semente=0):
+    # Roda os clientes em paralelo; devolve (segundos, latências em s)
+    rng = np.random.default_rng(semente)
+    latencias = []
+    tarefas = []
+    for c in range(clientes):
+        pedidos = [(json.dumps({'id': i, 'op': 'ponto', 'par': 'ur',
+                                'tbs': float(rng.uniform(-10., 45.)),
+                                'ur': float(rng.uniform(0.05, 1.)),
+                                'altitude': float(rng.uniform(0., 2000.))})
+                    + '\n').encode() for i in range(por_cliente)]
+        tarefas.append(cliente(abrir, pedidos, latencias))
+    inicio = time.perf_counter()
+    await asyncio.gather(*tarefas)
+    return time.perf_counter() - inicio, np.array(latencias)
+
+
+def relatorio(nome, segundos, latencias):
+    print('{:<18} {:>10.0f} {:>10.3f} {:>10.3f}'.format(
+        nome, latencias.size / segundos,
+        np.percentile(latencias, 50) * 1000.,
+        np.percentile(latencias, 99) * 1000.))
+
+
+async def principal(args):
+    print('{:<18} {:>10} {:>10} {:>10}'.format('', 'pedidos/s', 'p50 (ms)',
+                                               'p99 (ms)'))
+    if args.unix or args.porta:
+        def abrir():
+            if args.unix:
+                return asyncio.open_unix_connection(args.unix)
+            return asyncio.open_connection(args.host, args.porta)
+        relatorio('serviço externo',
+                  *await carga(abrir, args.clientes, args.pedidos))
+        return
+    pasta = tempfile.mkdtemp()
+    for nome, janela, lote in (('sem agrupamento', 0., 1),
+                               ('microlotes', args.janela / 1000., 4096)):
+        caminho = os.path.join(pasta, 'grapsi.sock')
+        agrupador = servico.Agrupador(janela, lote)
+        servidor = await servico.iniciar(agrupador, unix=caminho)
+        segundos, latencias = await carga(
+            lambda: asyncio.open_unix_connection(caminho), args.clientes,
+            args.pedidos)
+        servidor.close()
+        await servidor.wait_closed()
+        os.unlink(caminho)
+        relatorio(nome, segundos, latencias)
+        print('{:<18} {} pedidos em {} lotes ({:.1f} por lote)'.format(
+            '', agrupador.pedidos, agrupador.lotes,
+            agrupador.pedidos / agrupador.lotes))
+    os.rmdir(pasta)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='carga para servico.py')
+    parser.add_argument('clientes', type=int, nargs='?', default=64)
+    parser.add_argument('pedidos', type=int, nargs='?', default=300)
+    parser.add_argument('--unix')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int)
+    parser.add_argument('--janela', type=float, default=2.,
+                        help='janela dos microlotes (ms)')
+    asyncio.run(principal(parser.parse_args()))
@@ -0,0 +1,58 @@
+"""
+ Escalabilidade da execução paralela (paralelo.py) de 1 a N núcleos
+
+      python benchmarks/escala_paralela.py [pontos] [max_trabalhadores]
+
+ Para cada número de trabalhadores calcula o mesmo lote de pontos de estado
+ (tbs, ur) com altitude por linha e mostra tempo, pontos/s e ganho sobre um
+ trabalhador. O resultado é conferido contra o cálculo serial.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import paralelo  # noqa: E402
+import psicrometria as ps  # noqa: E402
+
+
+def lote(n, semente=0):
+    rng = np.random.default_rng(semente)
+    tbs = rng.uniform(-20., 50., n)
+    ur = rng.uniform(0.05, 1., n)
+    patm = ps.pressao_atmosferica(rng.uniform(0., 3000., n))
+    return tbs, ur, patm
+
+
+def medir(n, max_trabalhadores):
+    tbs, ur, patm = lote(n)
+    referencia = None
+    base = None
+    print('{:>7} {:>10} {:>14} {:>7}'.format('núcleos', 'tempo (s)',
+                                             'pontos/s', 'ganho'))
+    contagens = [1]
+    while contagens[-1] * 2 < max_trabalhadores:
+        contagens.append(contagens[-1] * 2)
+    if max_trabalhadores > 1:
+        contagens.append(max_trabalhadores)
+    for w in contagens:
+        inicio = time.perf_counter()
+        r = paralelo.pontos_estado('ur', tbs, ur, patm, trabalhadores=w)
+        segundos = time.perf_counter() - inicio
+        if referencia is None:
+            referencia = r.tbm
+            base = segundos
+        elif not np.array_equal(r.tbm, referencia):
+            raise AssertionError('resultado paralelo difere do serial')
+        print('{:>7d} {:>10.3f} {:>14.0f} {:>7.2f}'.format(
+            w, segundos, n / segundos, base / segundos))
+    return base
+
+
+if __name__ == '__main__':
+    pontos = int(sys.argv[1]) if len(sys.argv) > 1 else 4000000
+    maximo = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    medir(pontos, maximo)
@@ -0,0 +1,57 @@
+"""
+ Erros e tempos da precisão rápida (rapido.py) contra a exata
+
+      python benchmarks/precisao.py [pontos]
+
+ Sorteia pontos no domínio inteiro (tbs -20 a 50 °C, ur 5 a 100%, altitude
+ 0 a 3000 m) e, para cada par de entrada, mostra o erro máximo e o p99 de
+ cada propriedade (absoluto; rm em erro relativo) e o tempo das duas
+ precisões. Os números publicados em rapido.py saem daqui.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psicrometria as ps  # noqa: E402
+import rapido  # noqa: E402
+
+
+def _melhor(funcao, repeticoes=3):
+    melhor = np.inf
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def principal(n):
+    rng = np.random.default_rng(0)
+    tbs = rng.uniform(-20., 50., n)
+    ur = rng.uniform(0.05, 1., n)
+    ctx = ps.Contexto(ps.pressao_atmosferica(rng.uniform(0., 3000., n)))
+    base = ps.pe_tbs_ur(ctx, tbs, ur)
+    print('{:<5} {:<5} {:>10} {:>10}'.format('par', 'prop', 'max', 'p99'))
+    for par, exata in ps.PARES.items():
+        x = getattr(base, par)
+        t_exata, r_exata = _melhor(lambda: exata(ctx, tbs, x))
+        t_rapida, r_rapida = _melhor(lambda: rapido.PARES[par](ctx, tbs, x))
+        for nome in ps.PROPRIEDADES[1:]:
+            a = np.asarray(getattr(r_exata, nome), dtype=float)
+            b = np.asarray(getattr(r_rapida, nome), dtype=float)
+            erro = np.abs(b - a)
+            if nome == 'rm':
+                erro = erro / np.maximum(a, 1e-6)
+            erro = erro[np.isfinite(erro)]
+            print('{:<5} {:<5} {:>10.2e} {:>10.2e}'.format(
+                par, nome, erro.max(), np.percentile(erro, 99)))
+        print('{:<5} tempo exata {:.3f} s, rápida {:.3f} s ({:.1f}x)'.format(
+            par, t_exata, t_rapida, t_exata / t_rapida))
+
+
+if __name__ == '__main__':
+    principal(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
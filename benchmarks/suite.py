@@ -0,0 +1,388 @@
+"""
+ Suíte de benchmarks das funções de propriedades e dos processos
+
+      python benchmarks/suite.py                       # só mede e mostra
+      python benchmarks/suite.py --salvar base.json    # grava a linha de base
+      python benchmarks/suite.py --comparar base.json  # acusa regressões
+      python benchmarks/suite.py --casos tbm --pontos 200000
+
+ Para cada caso mede:
+      latência   - uma chamada com um único ponto (µs, melhor de várias)
+      vazão      - pontos/s num lote de --pontos pontos (melhor de 5)
+      erro       - erro máximo contra uma referência (solvers com tolerância
+                   1e-10, fórmula exata para a tabela de pvs, ou a entrada
+                   para a busca inversa); '-' onde o caso é a própria fórmula
+
+ Os lotes cobrem o domínio inteiro (tbs -20 a 50 °C, ur 5 a 100%, altitude
+ 0 a 3000 m) e os casos "_pior" concentram os pontos difíceis dos solvers
+ iterativos: ar quente e muito seco, tbm perto de 0 °C (troca gelo/água),
+ umidificação até perto da saturação e misturas com neblina.
+
+ Com --comparar, um caso regride se a latência ou o tempo por ponto piora
+ mais que --limiar (padrão 15%) ou se o erro passa de 2x o da base (com piso
+ de 1e-9). O código de saída é 1 se houver regressão. Os tempos só são
+ comparáveis na mesma máquina; em máquinas compartilhadas (CI, VMs) o ruído
+ passa fácil de 15% e o limiar precisa ser maior.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cadeia  # noqa: E402
+import inversa  # noqa: E402
+import processos  # noqa: E402
+import psicrometria as ps  # noqa: E402
+import rapido  # noqa: E402
+import regioes  # noqa: E402
+import tabela_pvs  # noqa: E402
+import varredura  # noqa: E402
+
+CASOS = {}
+
+
+def caso(funcao):
+    # Registra um caso: funcao(n, rng) devolve (executar, erro), executar()
+    # calcula o lote e erro(resultado) o erro máximo (ou None)
+    CASOS[funcao.__name__[1:]] = funcao
+    return funcao
+
+
+def _dominio(n, rng):
+    tbs = rng.uniform(-20., 50., n)
+    ur = rng.uniform(0.05, 1., n)
+    patm = ps.pressao_atmosferica(rng.uniform(0., 3000., n))
+    return tbs, ur, patm
+
+
+def _pior(n, rng):
+    # um terço quente e seco, um terço com tbm perto de 0 °C, um terço frio
+    # e quase saturado
+    k = n // 3
+    tbs = np.concatenate((rng.uniform(40., 60., k), rng.uniform(0., 8., k),
+                          rng.uniform(-20., -5., n - 2 * k)))
+    ur = np.concatenate((rng.uniform(0.005, 0.05, k), rng.uniform(0.2, 0.6, k),
+                         rng.uniform(0.95, 1., n - 2 * k)))
+    patm = ps.pressao_atmosferica(rng.uniform(0., 3000., n))
+    return tbs, ur, patm
+
+
+def _erro(a, b):
+    return float(np.nanmax(np.abs(np.asarray(a) - np.asarray(b))))
+
+
+@caso
+def _pressao_vapor_saturado(n, rng):
+    t = rng.uniform(-40., 100., n)
+    return (lambda: ps.pressao_vapor_saturado(t)), None
+
+
+@caso
+def _tabela_pvs(n, rng):
+    t = rng.uniform(-40., 100., n)
+    tab = tabela_pvs.obter_tabela()
+    exato = ps.pressao_vapor_saturado(t)
+    return (lambda: tab.pvs(t)), (lambda r: float(np.max(np.abs(r / exato -
+                                                                 1.))))
+
+
+def _tbm(tbs, ur, patm):
+    p = ps.pe_tbs_ur(ps.Contexto(patm), tbs, ur)
+    referencia = ps.temperatura_b_molhado(tbs, p.e, patm, tol=1e-10,
+                                          max_iter=100)
+    return ((lambda: ps.temperatura_b_molhado(tbs, p.e, patm)),
+            (lambda r: _erro(r, referencia)))
+
+
+@caso
+def _temperatura_b_molhado(n, rng):
+    return _tbm(*_dominio(n, rng))
+
+
+@caso
+def _temperatura_b_molhado_pior(n, rng):
+    return _tbm(*_pior(n, rng))
+
+
+@caso
+def _pe_tbs_ur(n, rng):
+    tbs, ur, patm = _dominio(n, rng)
+    ctx = ps.Contexto(patm)
+    return (lambda: ps.pe_tbs_ur(ctx, tbs, ur).tbm), None
+
+
+@caso
+def _pe_tbs_ur_rapida(n, rng):
+    tbs, ur, patm = _dominio(n, rng)
+    ctx = ps.Contexto(patm)
+    tbm = ps.temperatura_b_molhado(tbs, ps.pe_tbs_ur(ctx, tbs, ur).e, patm,
+                                   tol=1e-10)
+    return ((lambda: rapido.pe_tbs_ur(ctx, tbs, ur).tbm),
+            (lambda r: _erro(r, tbm)))
+
+
+@caso
+def _pe_tbs_tbm(n, rng):
+    tbs, ur, patm = _dominio(n, rng)
+    ctx = ps.Contexto(patm)
+    tbm = ps.pe_tbs_ur(ctx, tbs, ur).tbm
+    return (lambda: ps.pe_tbs_tbm(ctx, tbs, tbm).ur), None
+
+
+@caso
+def _pe_tbs_tpo(n, rng):
+    tbs, ur, patm = _dominio(n, rng)
+    ctx = ps.Contexto(patm)
+    tpo = tbs - rng.uniform(0.5, 30., n)
+    return (lambda: ps.pe_tbs_tpo(ctx, tbs, tpo).tbm), None
+
+
+@caso
+def _aquece_resfria(n, rng):
+    tbs, ur, patm = _dominio(n, rng)
+    ctx = ps.Contexto(patm)
+    tbs2 = rng.uniform(-20., 50., n)
+    return (lambda: processos.aquece_resfria(ctx, tbs, ur, tbs2)), None
+
+
+@caso
+def _serpentina_adp(n, rng):
+    tbs, ur, patm = _dominio(n, rng)
+    ctx = ps.Contexto(patm)
+    adp = tbs - rng.uniform(5., 20., n)
+    fb = rng.uniform(0.05, 0.3, n)
+    return (lambda: processos.serpentina_adp(ctx, tbs, ur, adp, fb)), None
+
+
+@caso
+def _serpentina_saida(n, rng):
+    # saídas de serpentinas do processo 6, de volta ao ADP e ao fator de bypass
+    tbs, ur, patm = _dominio(n, rng)
+    ctx = ps.Contexto(patm)
+    adp = tbs - rng.uniform(5., 20., n)
+    p2 = processos.serpentina_adp(ctx, tbs, ur, adp,
+                                  rng.uniform(0.05, 0.3, n)).pontos[1]
+    return ((lambda: processos.serpentina_saida(ctx, tbs, ur, p2.tbs,
+                                                p2.ur).adp), None)
+
+
+@caso
+def _u_adiabatica_tbs(n, rng):
+    tbs, ur, patm = _dominio(n, rng)
+    ctx = ps.Contexto(patm)
+    tbs2 = tbs - rng.uniform(0., 10., n)
+    return (lambda: processos.u_adiabatica_tbs(ctx, tbs, ur, tbs2)), None
+
+
+def _u_ur(tbs, ur, ur2, patm):
+    ctx = ps.Contexto(patm)
+    referencia = processos.u_adiabatica_ur(ctx, tbs, ur, ur2, tol=1e-10,
+                                           max_iter=100).pontos[1].tbs
+    return ((lambda: processos.u_adiabatica_ur(ctx, tbs, ur, ur2)
+             .pontos[1].tbs), (lambda r: _erro(r, referencia)))
+
+
+@caso
+def _u_adiabatica_ur(n, rng):
+    tbs, ur, patm = _dominio(n, rng)
+    return _u_ur(tbs, ur, ur + (1. - ur) * rng.uniform(0., 1., n), patm)
+
+
+@caso
+def _u_adiabatica_ur_pior(n, rng):
+    # ur2 colado em ur1 ou na saturação
+    tbs, ur, patm = _pior(n, rng)
+    ur = np.minimum(ur, 0.98)
+    perto = rng.uniform(0., 1e-3, n)
+    ur2 = np.where(rng.uniform(size=n) < 0.5, ur + perto, 1. - perto)
+    return _u_ur(tbs, ur, ur2, patm)
+
+
+@caso
+def _u_adiabatica_rm(n, rng):
+    tbs, ur, patm = _dominio(n, rng)
+    ctx = ps.Contexto(patm)
+    rm1 = ps.pe_tbs_ur(ctx, tbs, ur).rm
+    rm2 = rm1 + rng.uniform(0., 0.005, n)
+    return (lambda: processos.u_adiabatica_rm(ctx, tbs, rm1, rm2)), None
+
+
+def _mistura(tbs1, ur1, tbs2, ur2, patm, rng):
+    ctx = ps.Contexto(patm)
+    q1 = rng.uniform(100., 5000., tbs1.size)
+    q2 = rng.uniform(100., 5000., tbs1.size)
+    tbs = np.stack((tbs1, tbs2), axis=-1)
+    ur = np.stack((ur1, ur2), axis=-1)
+    q = np.stack((q1, q2), axis=-1)
+    referencia = processos.mistura_n_fluxos(ctx, tbs, ur, q, tol=1e-10,
+                                            max_iter=100).pontos[1].tbs
+    return ((lambda: processos.mistura_fluxos(ctx, tbs1, ur1, q1, tbs2, ur2,
+                                              q2).pontos[2].tbs),
+            (lambda r: _erro(r, referencia)))
+
+
+@caso
+def _mistura_fluxos(n, rng):
+    tbs1, ur1, patm = _dominio(n, rng)
+    tbs2, ur2, _ = _dominio(n, rng)
+    return _mistura(tbs1, ur1, tbs2, ur2, patm, rng)
+
+
+@caso
+def _mistura_fluxos_pior(n, rng):
+    # ar quente quase saturado com ar frio quase saturado: neblina
+    patm = ps.pressao_atmosferica(rng.uniform(0., 3000., n))
+    return _mistura(rng.uniform(35., 50., n), rng.uniform(0.85, 1., n),
+                    rng.uniform(-20., 5., n), rng.uniform(0.85, 1., n), patm,
+                    rng)
+
+
+@caso
+def _inversa_tbm_ur(n, rng):
+    tbs, ur, _ = _dominio(n, rng)
+    ctx = ps.Contexto(ps.pressao_atmosferica(800.))
+    p = ps.pe_tbs_ur(ctx, tbs, np.minimum(ur, 0.98))
+    tbm = ps.temperatura_b_molhado(tbs, p.e, ctx.patm, tol=1e-10)
+    inversa.obter_indice(ctx.patm).tabela('ur', 'tbm')
+    # tbm perto de 0 °C é descontínua (troca gelo/água) e fica fora do erro
+    continua = np.abs(tbm) > 0.2
+    return ((lambda: inversa.pe_par(ctx, 'tbm', tbm, 'ur', p.ur).tbs),
+            (lambda r: _erro(r[continua], tbs[continua])))
+
+
+@caso
+def _cadeia(n, rng):
+    # ar externo -> mistura com retorno -> resfriamento/desumidificação ->
+    # reaquecimento -> umidificação; cada ponto é uma linha da série
+    tbs, ur, patm = _dominio(n, rng)
+    ctx = ps.Contexto(patm)
+    unidade = cadeia.Cadeia([cadeia.Mistura(24., 0.5, 6000.),
+                             cadeia.Resfriamento(13., rm_max=0.0085),
+                             cadeia.Aquecimento(16.),
+                             cadeia.Umidificacao(ur=0.35)])
+    return (lambda: unidade.calcular(ctx, tbs, ur, 2000.)), None
+
+
+@caso
+def _regioes(n, rng):
+    tbs, ur, patm = _dominio(n, rng)
+    rm = ps.pe_tbs_ur(ps.Contexto(patm), tbs, ur).rm
+    # inclui pontos supersaturados (neblina)
+    rm = rm * rng.uniform(0.5, 1.5, n)
+    return (lambda: regioes.classificar(tbs, rm, patm)), None
+
+
+@caso
+def _varredura(n, rng):
+    # produto cartesiano com cerca de n combinações, em cinco eixos
+    k = max(2, int(round(n ** 0.2)))
+    v = varredura.Varredura(tbs=np.linspace(20., 40., k),
+                            ur=np.linspace(.2, .9, k),
+                            altitude=np.linspace(0., 1500., k),
+                            q_retorno=np.linspace(0., 8000., k),
+                            ur2=np.linspace(.3, .9, k))
+    unidade = cadeia.Cadeia([cadeia.Mistura(24., 0.5, 'q_retorno'),
+                             cadeia.Umidificacao(ur='ur2')])
+    return (lambda: v.calcular(unidade, q=2000., saidas=('tbs',))), None
+
+
+def _cronometrar(executar, repeticoes, tempo_min=0.):
+    # melhor tempo de uma execução; repete até tempo_min segundos no total
+    melhor = np.inf
+    total = 0.
+    k = 0
+    while k < repeticoes or total < tempo_min:
+        inicio = time.perf_counter()
+        resultado = executar()
+        segundos = time.perf_counter() - inicio
+        melhor = min(melhor, segundos)
+        total += segundos
+        k += 1
+    return melhor, resultado
+
+
+def medir(nome, pontos, semente=0):
+    # Latência (µs), vazão (pontos/s) e erro de um caso
+    preparar = CASOS[nome]
+    with np.errstate(all='ignore'):
+        executar, _ = preparar(1, np.random.default_rng(semente))
+        latencia, _ = _cronometrar(executar, 20, 0.2)
+        executar, erro = preparar(pontos, np.random.default_rng(semente))
+        segundos, resultado = _cronometrar(executar, 5, 0.5)
+        erro = None if erro is None else erro(resultado)
+    return {'latencia_us': latencia * 1e6, 'pontos_s': pontos / segundos,
+            'erro': erro}
+
+
+def comparar(atual, base, limiar):
+    # Lista de (caso, motivo) para cada regressão em relação à base
+    regressoes = []
+    for nome, r in atual.items():
+        b = base.get(nome)
+        if b is None:
+            continue
+        if r['latencia_us'] > b['latencia_us'] * (1. + limiar):
+            regressoes.append((nome, 'latência {:.1f} -> {:.1f} µs'.format(
+                b['latencia_us'], r['latencia_us'])))
+        if r['pontos_s'] * (1. + limiar) < b['pontos_s']:
+            regressoes.append((nome, 'vazão {:.0f} -> {:.0f} pontos/s'.format(
+                b['pontos_s'], r['pontos_s'])))
+        if r['erro'] is not None and b['erro'] is not None and \
+                r['erro'] > max(2. * b['erro'], 1e-9):
+            regressoes.append((nome, 'erro {:.2e} -> {:.2e}'.format(
+                b['erro'], r['erro'])))
+    return regressoes
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description='benchmarks do GRAPSI')
+    parser.add_argument('--pontos', type=int, default=100000,
+                        help='pontos por lote (padrão 100000)')
+    parser.add_argument('--casos', default='',
+                        help='expressão regular para escolher os casos')
+    parser.add_argument('--salvar', help='grava os resultados neste JSON')
+    parser.add_argument('--comparar', help='JSON de base para comparar')
+    parser.add_argument('--limiar', type=float, default=0.15,
+                        help='piora tolerada (fração, padrão 0.15)')
+    args = parser.parse_args(argv)
+    base = None
+    if args.comparar:
+        with open(args.comparar) as f:
+            base = json.load(f)['casos']
+    print('{:<28} {:>13} {:>14} {:>10}'.format('caso', 'latência (µs)',
+                                               'pontos/s', 'erro'))
+    resultados = {}
+    for nome in CASOS:
+        if not re.search(args.casos, nome):
+            continue
+        r = medir(nome, args.pontos)
+        resultados[nome] = r
+        print('{:<28} {:>13.1f} {:>14.0f} {:>10}'.format(
+            nome, r['latencia_us'], r['pontos_s'],
+            '-' if r['erro'] is None else '{:.1e}'.format(r['erro'])))
+    if args.salvar:
+        with open(args.salvar, 'w') as f:
+            json.dump({'python': platform.python_version(),
+                       'numpy': np.__version__,
+                       'maquina': platform.platform(),
+                       'pontos': args.pontos, 'casos': resultados}, f,
+                      indent=1)
+    if base is not None:
+        regressoes = comparar(resultados, base, args.limiar)
+        for nome, motivo in regressoes:
+            print('REGRESSÃO {}: {}'.format(nome, motivo))
+        if regressoes:
+            return 1
+        print('sem regressões (limiar {:.0%})'.format(args.limiar))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(principal())
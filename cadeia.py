@@ -0,0 +1,235 @@
+"""
+ Cadeia de processos (unidade de tratamento de ar) sobre séries temporais
+
+ As etapas são montadas uma vez e a cadeia inteira roda vetorizada sobre a
+ série toda (8760 horas de um ano, ou minuto a minuto), sem laço por linha:
+
+      import cadeia, processos
+      unidade = cadeia.Cadeia([
+          cadeia.Mistura(24., 0.5, 6000.),              # ar de retorno
+          cadeia.Resfriamento(13., rm_max=0.0085),      # resfria/desumidifica
+          cadeia.Aquecimento(16.),                      # reaquecimento
+          cadeia.Umidificacao(ur=0.35),                 # umidif. adiabática
+      ])
+      r = unidade.calcular(ctx, tbs_ext, ur_ext, 2000.)  # q do ar externo
+      r.estados['resfriamento'].tbs, r.cargas['aquecimento'], r.resumo()
+
+ Serpentina(adp, fb) é a alternativa a Resfriamento para serpentinas reais:
+ a saída fica na reta entre o ar e o ponto de orvalho do aparelho.
+
+ Entradas e parâmetros das etapas podem ser números, arrays com uma linha
+ por instante ou nomes de colunas de 'dados' (dicionário de arrays, como o
+ lido de um CSV de clima). ctx.patm pode ser escalar ou série.
+
+ Unidades como em processos.py (ur em fração, rm em kg/kg, q em m3/h no
+ estado da corrente). Dentro da cadeia a vazão é a de ar seco (kg/h):
+
+      estados   PontoEstado na saída de cada etapa ('entrada' é o ar externo)
+      vazoes    vazão de ar seco na saída de cada etapa (kg/h)
+      cargas    calor trocado em cada etapa, vazão x delta de entalpia (kW):
+                positivo aquece o ar, negativo resfria
+      agua      água trocada em cada etapa (kg/h): positiva na umidificação,
+                negativa no condensado da serpentina
+      avisos    avisos dos processos, por etapa
+
+ Cada etapa recebe o PontoEstado de saída da anterior (processos.py aceita
+ o ponto pronto no lugar de tbs1, ur1): o ar só passa por pe_tbs_ur na
+ entrada, e as etapas sensíveis (Aquecimento, Resfriamento sem
+ desumidificar) mantêm rm exatamente, com agua = 0.
+
+ resumo(dt) integra as séries no tempo (dt em horas por linha).
+"""
+import numpy as np
+
+import processos
+import psicrometria as ps
+
+
+def _valor(parametro, dados):
+    # Parâmetro de etapa: número, array ou nome de coluna de dados
+    if isinstance(parametro, str):
+        if dados is None or parametro not in dados:
+            raise KeyError('coluna {!r} não encontrada nos dados'
+                           .format(parametro))
+        parametro = dados[parametro]
+    return np.asarray(parametro, dtype=float)
+
+
+class Etapa:
+    # Base das etapas: aplicar(ctx, p, m, dados) devolve
+    # (p2, m2, carga, agua, aviso), com p2 o PontoEstado de saída, m2 a vazão
+    # de ar seco (kg/h), carga o calor trocado (kW) e agua a água trocada
+    # (kg/h)
+    nome = 'etapa'
+
+    def aplicar(self, ctx, p, m, dados):
+        raise NotImplementedError
+
+
+def _saida(p, m, r):
+    # Saída das etapas sem mudança de vazão: carga m (e2 - e1) em kW
+    p2 = r.pontos[1]
+    return p2, m, m * (p2.e - p.e) / 3600., m * (p2.rm - p.rm), r.aviso
+
+
+class Mistura(Etapa):
+    # Mistura com outra corrente (tbs, ur, q em m3/h), normalmente o retorno
+    nome = 'mistura'
+
+    def __init__(self, tbs, ur, q):
+        self.tbs, self.ur, self.q = tbs, ur, q
+
+    def aplicar(self, ctx, p, m, dados):
+        r = processos.mistura_fluxos(ctx, p, None, m * p.ve,
+                                     _valor(self.tbs, dados),
+                                     _valor(self.ur, dados),
+                                     _valor(self.q, dados))
+        p3 = r.pontos[2]
+        m3 = p3.q / p3.ve
+        # mistura adiabática: as correntes trocam calor só entre si
+        return p3, m3, 0. * m3, 0. * m3, r.aviso
+
+
+class _Serpentina(Etapa):
+    # Aquecimento ou resfriamento sensível (processo 1) até tbs
+    def __init__(self, tbs):
+        self.tbs = tbs
+
+    def _alvo(self, ctx, p, dados):
+        raise NotImplementedError
+
+    def aplicar(self, ctx, p, m, dados):
+        r = processos.aquece_resfria(ctx, p, None, self._alvo(ctx, p, dados))
+        return _saida(p, m, r)
+
+
+class Aquecimento(_Serpentina):
+    # Aquece até tbs quando o ar chega mais frio; senão não atua
+    nome = 'aquecimento'
+
+    def _alvo(self, ctx, p, dados):
+        return np.maximum(p.tbs, _valor(self.tbs, dados))
+
+
+class Resfriamento(_Serpentina):
+    # Resfria até tbs quando o ar chega mais quente; com rm_max (kg/kg),
+    # desumidifica resfriando até a temperatura de saturação de rm_max
+    # quando o ar chega mais úmido: o ar sai saturado com rm = rm_max (a
+    # menos de 1e-9 relativo, tolerância da inversa de pvs). O reaquecimento
+    # fica para uma etapa Aquecimento
+    nome = 'resfriamento'
+
+    def __init__(self, tbs, rm_max=None):
+        _Serpentina.__init__(self, tbs)
+        self.rm_max = rm_max
+
+    def _alvo(self, ctx, p, dados):
+        alvo = np.minimum(p.tbs, _valor(self.tbs, dados))
+        if self.rm_max is not None:
+            rm_max = _valor(self.rm_max, dados)
+            # inversa exata de pvs (e não o ajuste do ponto de orvalho), com
+            # a mesma tabela do contexto, para o ar sair com rm = rm_max
+            t_sat = ps.temperatura_pvs(ps.pressao_vapor(rm_max, ctx.patm),
+                                       tol=1e-9, tabela=ctx.tabela)
+            alvo = np.where(p.rm > rm_max, np.minimum(alvo, t_sat), alvo)
+        return alvo
+
+
+class Serpentina(Etapa):
+    # Serpentina de resfriamento com ponto de orvalho do aparelho adp (°C) e
+    # fator de bypass fb (processo 6); só atua quando o ar chega mais quente
+    # que o adp
+    nome = 'serpentina'
+
+    def __init__(self, adp, fb):
+        self.adp, self.fb = adp, fb
+
+    def aplicar(self, ctx, p, m, dados):
+        adp = _valor(self.adp, dados)
+        atua = p.tbs > adp
+        # sem atuar: fb = 1, o ar passa inteiro pelo bypass
+        r = processos.serpentina_adp(ctx, p, None,
+                                     np.where(atua, adp, p.tbs - 1.),
+                                     np.where(atua, _valor(self.fb, dados),
+                                              1.))
+        return _saida(p, m, r)
+
+
+class Umidificacao(Etapa):
+    # Umidificação adiabática até ur (processo 3) ou até rm (processo 4),
+    # só quando o ar chega mais seco
+    nome = 'umidificacao'
+
+    def __init__(self, ur=None, rm=None):
+        if (ur is None) == (rm is None):
+            raise ValueError('Umidificacao: informe ur ou rm')
+        self.ur, self.rm = ur, rm
+
+    def aplicar(self, ctx, p, m, dados):
+        if self.ur is not None:
+            ur2 = np.maximum(p.ur, _valor(self.ur, dados))
+            r = processos.u_adiabatica_ur(ctx, p, None, ur2)
+        else:
+            rm2 = np.maximum(p.rm, _valor(self.rm, dados))
+            r = processos.u_adiabatica_rm(ctx, p, None, rm2)
+        return _saida(p, m, r)
+
+
+class ResultadoCadeia:
+    # Séries por etapa (dicionários na ordem da cadeia)
+    __slots__ = ('estados', 'vazoes', 'cargas', 'agua', 'avisos')
+
+    def __init__(self):
+        self.estados = {}
+        self.vazoes = {}
+        self.cargas = {}
+        self.agua = {}
+        self.avisos = {}
+
+    def resumo(self, dt=1.):
+        # Totais por etapa com dt horas por linha: energia de aquecimento e
+        # de resfriamento (kWh), carga máxima (kW) e água (kg)
+        resumo = {}
+        for nome, carga in self.cargas.items():
+            carga = np.nan_to_num(carga)
+            resumo[nome] = {
+                'aquecimento_kwh': float(np.maximum(carga, 0.).sum() * dt),
+                'resfriamento_kwh': float(abs(np.minimum(carga, 0.).sum())
+                                          * dt),
+                'carga_max_kw': float(np.abs(carga).max(initial=0.)),
+                'agua_kg': float(np.nan_to_num(self.agua[nome]).sum() * dt)}
+        return resumo
+
+
+class Cadeia:
+    # Sequência de etapas aplicada ao ar externo; nomes repetidos ganham
+    # sufixo (_2, _3, ...)
+    def __init__(self, etapas):
+        self.etapas = list(etapas)
+        self.nomes = []
+        for etapa in self.etapas:
+            nome, i = etapa.nome, 1
+            while nome in self.nomes or nome == 'entrada':
+                i += 1
+                nome = '{}_{}'.format(etapa.nome, i)
+            self.nomes.append(nome)
+
+    def calcular(self, ctx, tbs, ur, q, dados=None):
+        # Ar externo (tbs, ur, q em m3/h) através de todas as etapas; q só
+        # entra na vazão, então o ponto externo tem a forma de (tbs, ur)
+        tbs, ur = np.broadcast_arrays(_valor(tbs, dados), _valor(ur, dados))
+        p = ps.pe_tbs_ur(ctx, tbs, ur)
+        m = _valor(q, dados) / p.ve
+        r = ResultadoCadeia()
+        r.estados['entrada'] = p
+        r.vazoes['entrada'] = m
+        for nome, etapa in zip(self.nomes, self.etapas):
+            p2, m2, carga, agua, aviso = etapa.aplicar(ctx, p, m, dados)
+            r.estados[nome] = p2
+            r.vazoes[nome] = m2
+            r.cargas[nome] = carga
+            r.agua[nome] = agua
+            if aviso:
+                r.avisos[nome] = aviso
+            p, m = p2, m2
+        return r
@@ -0,0 +1,220 @@
+"""
+ Formato colunar para resultados em lote
+
+ Em vez de formatar cada valor como texto (CSV, PrettyTable), os resultados
+ ficam numa pasta com um .npy por propriedade (float64, ou float32 na
+ precisão rápida; unidades da biblioteca) e um cabeçalho JSON com unidades,
+ número de linhas e a pressão barométrica (valor único no cabeçalho ou
+ coluna patm por linha):
+
+      resultado/
+          cabecalho.json    {"formato": "grapsi-colunar", "versao": 1,
+                             "linhas": n, "patm": 92.08 ou null,
+                             "colunas": {"tbs": "°C", "ur": "fração", ...}}
+          tbs.npy  tbm.npy  tpo.npy  ur.npy ...
+
+ A leitura usa mmap (np.load com mmap_mode='r'): nada é copiado até ser
+ usado, e outros programas leem os .npy direto com NumPy. A tabela legível
+ (PrettyTable, unidades de main.py) é só uma vista, gerada quando pedida.
+
+      import colunar
+      colunar.gravar('resultado', ps.pe_tbs_ur(ctx, tbs, ur))
+      r = colunar.abrir('resultado')
+      r['tbm'][:10], len(r), r.ponto().e
+      print(r.tabela(0, 20))
+
+      python main.py --csv leituras.csv --formato colunar -o resultado
+      python colunar.py resultado --inicio 0 --linhas 20
+
+ O escritor grava em blocos (memória constante no lote); o cabeçalho JSON é
+ gravado por último, então pasta sem cabecalho.json está incompleta.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+import psicrometria as ps
+
+COLUNAS = ('tbs', 'tbm', 'tpo', 'ur', 'rm', 'pvs', 'pv', 'e', 've')
+UNIDADES = {'tbs': '°C', 'tbm': '°C', 'tpo': '°C', 'ur': 'fração',
+            'rm': 'kg/kg', 'pvs': 'kPa', 'pv': 'kPa', 'e': 'kJ/kg',
+            've': 'm3/kg', 'patm': 'kPa', 'q': 'm3/h'}
+# vista legível: rótulo, fator para as unidades de main.py e formato
+ROTULOS = {'tbs': ('tbs (ºC)', 1., '{:.2f}'),
+           'tbm': ('tbm (ºC)', 1., '{:.2f}'),
+           'tpo': ('tpo (ºC)', 1., '{:.2f}'),
+           'ur': ('ur (%)', 100., '{:.1f}'),
+           'rm': ('rm (g/kg)', 1000., '{:.3f}'),
+           'pvs': ('pvs (kPa)', 1., '{:.4f}'),
+           'pv': ('pv (kPa)', 1., '{:.4f}'),
+           'e': ('e (kJ/kg)', 1., '{:.2f}'),
+           've': ('ve (m3/kg)', 1., '{:.4f}'),
+           'patm': ('patm (kPa)', 1., '{:.2f}'),
+           'q': ('q (m3/h)', 1., '{:.1f}')}
+CABECALHO = 'cabecalho.json'
+_TAMANHO_NPY = 128
+
+
+def _cabecalho_npy(linhas, tipo='<f8'):
+    # Cabeçalho .npy (versão 1.0) de um vetor com tamanho fixo, para ser
+    # regravado com o número final de linhas sem mover os dados
+    texto = "{{'descr': '{}', 'fortran_order': False, 'shape': ({},), }}"\
+        .format(tipo, linhas)
+    texto = texto.ljust(_TAMANHO_NPY - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + np.uint16(len(texto)).tobytes() + \
+        texto.encode('latin1')
+
+
+class EscritorColunar:
+    # Grava blocos de pontos de estado (PontoEstado ou dict de arrays) numa
+    # pasta colunar; fechar() completa os cabeçalhos. tipo: '<f8' (float64)
+    # ou '<f4' (float32, precisão rápida)
+    def __init__(self, pasta, colunas=COLUNAS, tipo='<f8'):
+        os.makedirs(pasta, exist_ok=True)
+        cabecalho = os.path.join(pasta, CABECALHO)
+        if os.path.exists(cabecalho):
+            os.remove(cabecalho)
+        self.pasta = pasta
+        self.tipo = tipo
+        self.colunas = list(colunas)
+        self.linhas = 0
+        self.patm = None
+        self._arquivos = {}
+        for nome in self.colunas:
+            self._abrir(nome)
+
+    def _abrir(self, nome):
+        arquivo = open(os.path.join(self.pasta, nome + '.npy'), 'wb')
+        arquivo.write(_cabecalho_npy(0, self.tipo))
+        self._arquivos[nome] = arquivo
+        return arquivo
+
+    def _valores(self, ponto, nome):
+        if isinstance(ponto, dict):
+            return ponto[nome]
+        return getattr(ponto, nome)
+
+    def escrever(self, ponto):
+        forma = np.shape(self._valores(ponto, 'tbs'))
+        n = int(np.prod(forma))
+        for nome in self.colunas:
+            valor = np.broadcast_to(self._valores(ponto, nome), forma)
+            self._arquivos[nome].write(
+                np.ascontiguousarray(valor, dtype=self.tipo).tobytes())
+        # patm: valor único enquanto for constante; coluna a partir do
+        # primeiro bloco com outra pressão (as linhas anteriores são
+        # preenchidas com o valor único)
+        patm = np.asarray(self._valores(ponto, 'patm'), dtype=float)
+        if 'patm' not in self._arquivos:
+            if self.patm is None and np.ndim(patm) == 0:
+                self.patm = float(patm)
+            if np.ndim(patm) == 0 and float(patm) == self.patm:
+                self.linhas += n
+                return
+            arquivo = self._abrir('patm')
+            for inicio in range(0, self.linhas, 1 << 20):
+                k = min(1 << 20, self.linhas - inicio)
+                arquivo.write(np.full(k, self.patm,
+                                      dtype=self.tipo).tobytes())
+            self.patm = None
+        self._arquivos['patm'].write(np.ascontiguousarray(
+            np.broadcast_to(patm, forma), dtype=self.tipo).tobytes())
+        self.linhas += n
+
+    def fechar(self, **metadados):
+        # Regrava o cabeçalho de cada .npy com o número de linhas e grava o
+        # cabecalho.json (por último: marca a pasta como completa)
+        for arquivo in self._arquivos.values():
+            arquivo.seek(0)
+            arquivo.write(_cabecalho_npy(self.linhas, self.tipo))
+            arquivo.close()
+        colunas = list(self._arquivos)
+        cabecalho = {'formato': 'grapsi-colunar', 'versao': 1,
+                     'linhas': self.linhas, 'patm': self.patm,
+                     'colunas': {nome: UNIDADES.get(nome, '')
+                                 for nome in colunas}}
+        cabecalho.update(metadados)
+        with open(os.path.join(self.pasta, CABECALHO), 'w') as arquivo:
+            json.dump(cabecalho, arquivo, indent=1, ensure_ascii=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, rastro):
+        if tipo is None:
+            self.fechar()
+        else:
+            for arquivo in self._arquivos.values():
+                arquivo.close()
+
+
+def gravar(pasta, ponto, colunas=COLUNAS, **metadados):
+    # Grava um PontoEstado (arrays) de uma vez
+    if getattr(ponto, 'q', None) is not None and 'q' not in colunas:
+        colunas = tuple(colunas) + ('q',)
+    escritor = EscritorColunar(pasta, colunas)
+    escritor.escrever(ponto)
+    escritor.fechar(**metadados)
+
+
+class ResultadoColunar:
+    # Leitura de uma pasta colunar: colunas em mmap, sem cópia
+    def __init__(self, pasta):
+        with open(os.path.join(pasta, CABECALHO)) as arquivo:
+            self.cabecalho = json.load(arquivo)
+        self.pasta = pasta
+        self.colunas = {nome: np.load(os.path.join(pasta, nome + '.npy'),
+                                      mmap_mode='r')
+                        for nome in self.cabecalho['colunas']}
+
+    def __len__(self):
+        return self.cabecalho['linhas']
+
+    def __getitem__(self, nome):
+        if nome == 'patm' and 'patm' not in self.colunas:
+            return self.cabecalho['patm']
+        return self.colunas[nome]
+
+    def ponto(self):
+        # PontoEstado com as colunas (memmaps)
+        return ps.PontoEstado(*(self[nome] if nome in self.colunas or
+                                nome == 'patm' else None
+                                for nome in ps.PontoEstado.__slots__))
+
+    def tabela(self, inicio=0, linhas=20):
+        # Vista legível de um trecho, nas unidades de main.py (ur em %, rm em
+        # g/kg)
+        from prettytable import PrettyTable
+        fim = min(inicio + linhas, len(self))
+        nomes = [n for n in ROTULOS if n in self.colunas or n == 'patm']
+        tab = PrettyTable([ROTULOS[n][0] for n in nomes])
+        trechos = [np.broadcast_to(self[n], (len(self),))[inicio:fim]
+                   for n in nomes]
+        for i in range(fim - inicio):
+            tab.add_row([ROTULOS[n][2].format(float(v[i]) * ROTULOS[n][1])
+                         for n, v in zip(nomes, trechos)])
+        return tab
+
+
+def abrir(pasta):
+    return ResultadoColunar(pasta)
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(
+        description='GRAPSI - mostra um trecho de um resultado colunar')
+    parser.add_argument('pasta')
+    parser.add_argument('--inicio', type=int, default=0)
+    parser.add_argument('--linhas', type=int, default=20)
+    args = parser.parse_args(argv)
+    r = abrir(args.pasta)
+    print('{} linhas; patm = {}'.format(
+        len(r), 'por linha' if r.cabecalho['patm'] is None
+        else '{:.3f} kPa'.format(r.cabecalho['patm'])))
+    print(r.tabela(args.inicio, args.linhas))
+
+
+if __name__ == '__main__':
+    principal()
@@ -0,0 +1,144 @@
+"""
+ Backend escalar: um ponto de estado com o módulo math, sem NumPy
+
+ Mesmas fórmulas de psicrometria.py (as duas usam formulas.py), para floats.
+ Não importa o NumPy, então a partida é a do próprio Python: serve a scripts
+ de shell e tarefas do cron que calculam um ponto por vez. Para lotes, use
+ psicrometria.py (arrays).
+
+      import escalar
+      ctx = escalar.Contexto.da_altitude(800.)
+      p = escalar.pe_tbs_ur(ctx, 25., 0.5)      # floats; ur em fração
+
+      python escalar.py ur 25 50 --altitude 800    # ur em %, como main.py
+      python escalar.py tbm 25 18
+      python escalar.py tpo 25 12 --patm 92.1
+
+ O solver de tbm e os casos especiais dos pares (ur = 1, tbs == tbm,
+ tbs == tpo) são os de formulas.py, os mesmos de psicrometria.py; os
+ resultados coincidem com os de arrays até o arredondamento.
+ Sem tabela de pvs e sem instrumentação (são recursos do modo em lote).
+"""
+import formulas as f
+from estado import Contexto, PontoEstado  # noqa: F401
+from formulas import (EPS, R_AR, T_ABS, entalpia,  # noqa: F401
+                      pressao_atmosferica, pressao_vapor, razao_mistura1,
+                      razao_mistura2, temperatura_b_seco, umidade_relativa,
+                      volume_especifico)
+
+M = f.MATH
+
+
+def pressao_vapor_saturado(t):
+    # cálculo da pressão do vapor de saturação (kPa), ramos água e gelo
+    return f.pressao_vapor_saturado(M, t)
+
+
+def pvs_e_derivada(t):
+    return f.pvs_e_derivada(M, t)
+
+
+def temperatura_ponto_orvalho(p):
+    # Cálculo da temperatura do ponto de orvalho
+    return f.temperatura_ponto_orvalho(M, p)
+
+
+def newton_protegido(funcao, x0, lo, hi, tol=1e-4, max_iter=30,
+                     crescente=True):
+    # Newton protegido por [lo, hi] para um escalar (formulas.
+    # newton_protegido com MATH): funcao(x) -> (g, dg); passo fora do
+    # intervalo vira bisseção
+    return f.newton_protegido(M, lambda x, idx: funcao(x), x0, lo, hi, tol,
+                              max_iter, crescente)
+
+
+def temperatura_saturacao(et, patm, t0, lo, hi, tol=1e-4, max_iter=30):
+    # Temperatura do ar saturado com entalpia et (ver psicrometria.py)
+    def g_dg(t):
+        ps, dps = f.pvs_e_derivada(M, t)
+        if ps >= patm:
+            # acima do ponto de ebulição g é infinito: bisseção
+            return M.inf, 1.
+        return f.saturacao_g_dg(t, et, patm, ps, dps)
+
+    return newton_protegido(g_dg, t0, lo, hi, tol, max_iter)
+
+
+def temperatura_b_molhado(ts, et, patm, tol=1e-4, max_iter=30):
+    # Cálculo da temperatura do bulbo molhado
+    th = f.chute_b_molhado(M, ts, et, patm)
+    return temperatura_saturacao(et, patm, th, -100., ts, tol, max_iter)
+
+
+def pe_tbs_ur(ctx, tbs, ur):
+    # Ponto de Estado  f (tbs, ur) - ur em fração
+    patm = ctx.patm
+    ur = f.limitar_ur(M, ur)
+    pvs = pressao_vapor_saturado(tbs)
+    pv = ur * pvs
+    rm = razao_mistura1(pv, patm)
+    e = entalpia(tbs, rm)
+    ve = volume_especifico(tbs, rm, patm)
+    tpo = temperatura_ponto_orvalho(pv)
+    tbm = temperatura_b_molhado(tbs, e, patm)
+    return PontoEstado(tbs, tbm, tpo, ur, rm, pvs, pv, e, ve, patm)
+
+
+def pe_tbs_tbm(ctx, tbs, tbm):
+    # Ponto de Estado -   f (tbs, tbm)
+    patm = ctx.patm
+    pvs = pressao_vapor_saturado(tbs)
+    rm, pv, ur, tpo = f.estado_tbs_tbm(M, tbs, tbm, pvs,
+                                       pressao_vapor_saturado(tbm), patm)
+    e = entalpia(tbs, rm)
+    ve = volume_especifico(tbs, rm, patm)
+    return PontoEstado(tbs, tbm, tpo, ur, rm, pvs, pv, e, ve, patm)
+
+
+def pe_tbs_tpo(ctx, tbs, tpo):
+    # Ponto de Estado -   f (tbs, tpo)
+    patm = ctx.patm
+    pvs = pressao_vapor_saturado(tbs)
+    pv, rm, ur = f.estado_tbs_tpo(M, tbs, tpo, pvs,
+                                  pressao_vapor_saturado(tpo), patm)
+    e = entalpia(tbs, rm)
+    tbm = tbs if tbs == tpo else temperatura_b_molhado(tbs, e, patm)
+    ve = volume_especifico(tbs, rm, patm)
+    return PontoEstado(tbs, tbm, tpo, ur, rm, pvs, pv, e, ve, patm)
+
+
+PARES = {'ur': pe_tbs_ur, 'tbm': pe_tbs_tbm, 'tpo': pe_tbs_tpo}
+ROTULOS = (('tbs', 'Temperatura de bulbo seco (ºC)', 1.),
+           ('tbm', 'Temperatura de bulbo molhado (ºC)', 1.),
+           ('tpo', 'Temperatura de ponto de orvalho (ºC)', 1.),
+           ('ur', 'Umidade relativa (%)', 100.),
+           ('rm', 'Razão de mistura (g/kg)', 1000.),
+           ('patm', 'Pressão barométrica (kPa)', 1.),
+           ('pvs', 'Pressão de vapor saturado (kPa)', 1.),
+           ('pv', 'Pressão parcial de vapor (kPa)', 1.),
+           ('e', 'Entalpia (kJ/kg)', 1.),
+           ('ve', 'Volume específico (m3/kg)', 1.))
+
+
+def principal(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='GRAPSI - um ponto de estado (sem NumPy)')
+    parser.add_argument('par', choices=sorted(PARES),
+                        help='segunda propriedade (ur em %%)')
+    parser.add_argument('tbs', type=float)
+    parser.add_argument('valor', type=float)
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument('--altitude', type=float, default=0.)
+    grupo.add_argument('--patm', type=float)
+    args = parser.parse_args(argv)
+    ctx = Contexto(args.patm) if args.patm is not None else \
+        Contexto.da_altitude(args.altitude)
+    valor = args.valor / 100. if args.par == 'ur' else args.valor
+    p = PARES[args.par](ctx, args.tbs, valor)
+    for nome, rotulo, fator in ROTULOS:
+        print('{:<38} {:10.4f}'.format(rotulo, getattr(p, nome) * fator))
+
+
+if __name__ == '__main__':
+    principal()
@@ -0,0 +1,68 @@
+"""
+ Registros do cálculo: Contexto (condições) e PontoEstado (resultado)
+
+ Não dependem do NumPy: servem tanto para psicrometria.py (arrays) quanto
+ para escalar.py (um ponto com o módulo math). psicrometria os reexporta.
+"""
+import formulas
+
+# propriedades de um ponto de estado, na ordem de PontoEstado
+PROPRIEDADES = ('tbs', 'tbm', 'tpo', 'ur', 'rm', 'pvs', 'pv', 'e', 've')
+
+
+class Contexto:
+    # Condições do cálculo: pressão barométrica local (kPa), escalar ou array.
+    # Substitui a variável global patm de main.py; cada cálculo recebe o seu.
+    # tabela: opcional, tabela_pvs.TabelaPvs usada no lugar da fórmula de pvs
+    # instr: opcional, instrumentacao.Instrumentacao que registra iterações,
+    # avaliações de pvs e tempos de cada cálculo
+    __slots__ = ('patm', 'tabela', 'instr')
+
+    def __init__(self, patm, tabela=None, instr=None):
+        self.patm = patm
+        self.tabela = tabela
+        self.instr = instr
+
+    @classmethod
+    def da_altitude(cls, alt, tabela=None, instr=None):
+        _, alt = formulas.preparar(alt)
+        return cls(formulas.pressao_atmosferica(alt), tabela, instr)
+
+    def pvs(self, t):
+        # pressão do vapor de saturação pela tabela, se houver, ou exata
+        # (float para t escalar, array para o resto)
+        funcao = formulas.pvs if self.tabela is None else self.tabela.pvs
+        if self.instr is None:
+            return funcao(t)
+        return self.instr.contar_pvs(funcao)(t)
+
+    def __repr__(self):
+        return 'Contexto(patm={!r}, tabela={!r}, instr={!r})'.format(
+            self.patm, self.tabela, self.instr)
+
+
+class PontoEstado:
+    # Registro com as propriedades de um ponto de estado (escalares ou arrays)
+    __slots__ = ('tbs', 'tbm', 'tpo', 'ur', 'rm', 'pvs', 'pv', 'e', 've',
+                 'patm', 'q')
+
+    def __init__(self, tbs, tbm, tpo, ur, rm, pvs, pv, e, ve, patm, q=None):
+        self.tbs = tbs
+        self.tbm = tbm
+        self.tpo = tpo
+        self.ur = ur
+        self.rm = rm
+        self.pvs = pvs
+        self.pv = pv
+        self.e = e
+        self.ve = ve
+        self.patm = patm
+        self.q = q
+
+    def como_dict(self):
+        return {nome: getattr(self, nome) for nome in self.__slots__}
+
+    def __repr__(self):
+        campos = ', '.join('{}={!r}'.format(nome, getattr(self, nome))
+                           for nome in self.__slots__)
+        return 'PontoEstado({})'.format(campos)
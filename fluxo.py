@@ -0,0 +1,197 @@
+"""
+ Agregação contínua de leituras de sensores em janelas de tempo
+
+ Para monitorar fluxos sem fim (sensores ao vivo) quando só interessam
+ estatísticas por janela: as leituras chegam em blocos pequenos, cada bloco é
+ calculado de uma vez (lote.calcular_bloco) e somado ao acumulador da janela
+ atual; quando o tempo passa do fim da janela, o resumo dela é emitido. A
+ memória não cresce com o fluxo: só o bloco atual e um acumulador.
+
+      import fluxo, lote
+      blocos = lote.ler_blocos(open('sensor.csv'), 60)   # tempo,tbs,ur[,patm]
+      for resumo in fluxo.agregar(blocos, janela=3600., limite_tpo=16.):
+          print(resumo['inicio'], resumo['media']['e'], resumo['max']['tpo'])
+
+      tail -f sensor.csv | \
+          python fluxo.py --csv - --janela 3600 --limite-tpo 16
+
+ As leituras vêm como em lote.py (cabeçalho com tbs e ur em %, tbm ou tpo,
+ altitude ou patm opcionais) mais a coluna tempo (s, por exemplo Unix), em
+ ordem crescente de tempo; leituras mais antigas que a janela atual são
+ descartadas e contadas. Leituras de fonte Python (tuplas) viram blocos com
+ blocos_de_leituras(leituras, nomes, tamanho).
+
+ Resumo de cada janela (unidades da biblioteca: ur em fração, rm em kg/kg):
+
+      inicio, fim     limites da janela (s)
+      n               leituras na janela
+      media/min/max   de cada propriedade (tbs, tbm, tpo, ur, rm, e, ou as
+                      de --propriedades; sem tbm, o solver não roda)
+      grau_horas_tpo  soma de (tpo - limite_tpo) * horas acima do limite
+      horas_neblina   horas com tbs - tpo <= margem_neblina (ar saturado)
+      atrasadas       leituras descartadas por chegarem fora de ordem
+
+ Cada leitura vale o tempo desde a anterior, limitado a passo_max segundos
+ (falhas do sensor não viram horas de neblina).
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+
+import lote
+import psicrometria as ps
+
+PROPRIEDADES = ('tbs', 'tbm', 'tpo', 'ur', 'rm', 'e')
+
+
+class Acumulador:
+    # Somas, mínimos e máximos de uma janela (tamanho fixo); NaN não conta
+    __slots__ = ('inicio', 'n', 'soma', 'validos', 'minimo', 'maximo',
+                 'grau_horas', 'horas_neblina')
+
+    def __init__(self, inicio, k):
+        self.inicio = inicio
+        self.n = 0
+        self.soma = np.zeros(k)
+        self.validos = np.zeros(k)
+        self.minimo = np.full(k, np.nan)
+        self.maximo = np.full(k, np.nan)
+        self.grau_horas = 0.
+        self.horas_neblina = 0.
+
+    def somar(self, valores, grau_horas, horas_neblina):
+        # valores: (k, m) com as m leituras de um trecho do bloco
+        valido = ~np.isnan(valores)
+        self.n += valores.shape[1]
+        self.soma += np.where(valido, valores, 0.).sum(axis=1)
+        self.validos += valido.sum(axis=1)
+        if valido.any():
+            self.minimo = np.fmin(self.minimo, np.nanmin(valores, axis=1))
+            self.maximo = np.fmax(self.maximo, np.nanmax(valores, axis=1))
+        self.grau_horas += grau_horas
+        self.horas_neblina += horas_neblina
+
+    def resumo(self, propriedades, janela, atrasadas):
+        with np.errstate(invalid='ignore'):
+            media = self.soma / self.validos
+
+        def por_nome(v):
+            return {nome: None if np.isnan(x) else float(x)
+                    for nome, x in zip(propriedades, v)}
+        return {'inicio': self.inicio, 'fim': self.inicio + janela,
+                'n': self.n, 'media': por_nome(media),
+                'min': por_nome(self.minimo), 'max': por_nome(self.maximo),
+                'grau_horas_tpo': self.grau_horas,
+                'horas_neblina': self.horas_neblina, 'atrasadas': atrasadas}
+
+
+def blocos_de_leituras(leituras, nomes, tamanho=60):
+    # Agrupa um iterável de tuplas (uma por leitura, na ordem de nomes, ur
+    # em %) em blocos (nomes, array) como os de lote.ler_blocos
+    bloco = []
+    for leitura in leituras:
+        bloco.append(leitura)
+        if len(bloco) == tamanho:
+            yield nomes, np.array(bloco, dtype=float)
+            bloco = []
+    if bloco:
+        yield nomes, np.array(bloco, dtype=float)
+
+
+def agregar(blocos, janela=3600., limite_tpo=None, margem_neblina=1.,
+            passo_max=600., patm=None, tabela=None, propriedades=PROPRIEDADES):
+    # Gera o resumo de cada janela fechada e, no fim dos blocos, o da última
+    atual = None
+    anterior = None
+    atrasadas = 0
+    for nomes, bloco in blocos:
+        if 'tempo' not in nomes:
+            raise ValueError('as leituras precisam da coluna tempo (s)')
+        tempo = bloco[:, nomes.index('tempo')]
+        # fora de ordem: mais antigas que a leitura anterior
+        limite = -np.inf if anterior is None else anterior
+        em_ordem = tempo >= np.maximum.accumulate(np.maximum(tempo, limite))
+        if not em_ordem.all():
+            atrasadas += int((~em_ordem).sum())
+            bloco, tempo = bloco[em_ordem], tempo[em_ordem]
+            if not tempo.size:
+                continue
+        # ponto preguiçoso: só o que o resumo lê (tbm só se pedida)
+        p = lote.calcular_bloco(nomes, bloco, patm, tabela, preguicoso=True)
+        valores = np.array([np.broadcast_to(getattr(p, nome), tempo.shape)
+                            for nome in propriedades])
+        # horas de cada leitura: desde a anterior, até passo_max
+        passo = np.diff(tempo, prepend=tempo[0] if anterior is None
+                        else anterior)
+        horas = np.minimum(passo, passo_max) / 3600.
+        anterior = tempo[-1]
+        tpo = np.broadcast_to(p.tpo, tempo.shape)
+        acima = 0. if limite_tpo is None else \
+            np.nan_to_num(np.maximum(tpo - limite_tpo, 0.)) * horas
+        neblina = np.where(np.broadcast_to(p.tbs, tempo.shape) - tpo
+                           <= margem_neblina, horas, 0.)
+        acima = np.broadcast_to(acima, tempo.shape)
+        # trechos do bloco por janela (tempos em ordem crescente)
+        ids = np.floor(tempo / janela)
+        cortes = np.flatnonzero(np.diff(ids)) + 1
+        for i, j in zip(np.r_[0, cortes], np.r_[cortes, tempo.size]):
+            inicio = float(ids[i] * janela)
+            if atual is not None and inicio != atual.inicio:
+                yield atual.resumo(propriedades, janela, atrasadas)
+                atrasadas = 0
+                atual = None
+            if atual is None:
+                atual = Acumulador(inicio, len(propriedades))
+            atual.somar(valores[:, i:j], float(acima[i:j].sum()),
+                        float(neblina[i:j].sum()))
+    if atual is not None:
+        yield atual.resumo(propriedades, janela, atrasadas)
+
+
+def argumentos(argv=None):
+    parser = argparse.ArgumentParser(
+        description='GRAPSI - resumos por janela de leituras contínuas')
+    parser.add_argument('--csv', required=True,
+                        help="arquivo de entrada ('-' para a entrada padrão)")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument('--altitude', type=float)
+    grupo.add_argument('--patm', type=float)
+    parser.add_argument('--janela', type=float, default=3600.,
+                        help='duração das janelas (s, padrão 3600)')
+    parser.add_argument('--bloco', type=int, default=60,
+                        help='leituras por bloco (padrão 60)')
+    parser.add_argument('--limite-tpo', type=float,
+                        help='limite de ponto de orvalho para grau-horas (°C)')
+    parser.add_argument('--margem-neblina', type=float, default=1.,
+                        help='tbs - tpo máximo para neblina (°C, padrão 1)')
+    parser.add_argument('--passo-max', type=float, default=600.,
+                        help='tempo máximo atribuído a uma leitura (s)')
+    parser.add_argument('--propriedades', default=','.join(PROPRIEDADES),
+                        help='propriedades resumidas, separadas por vírgula')
+    return parser.parse_args(argv)
+
+
+def principal(argv=None):
+    # Um resumo JSON por linha, escrito assim que a janela fecha
+    args = argumentos(argv)
+    patm = args.patm
+    if args.altitude is not None:
+        patm = float(ps.pressao_atmosferica(args.altitude))
+    entrada = sys.stdin if args.csv == '-' else open(args.csv)
+    try:
+        for resumo in agregar(lote.ler_blocos(entrada, args.bloco),
+                              args.janela, args.limite_tpo,
+                              args.margem_neblina, args.passo_max, patm,
+                              propriedades=tuple(
+                                  n.strip()
+                                  for n in args.propriedades.split(','))):
+            print(json.dumps(resumo), flush=True)
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+
+
+if __name__ == '__main__':
+    principal()
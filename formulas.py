@@ -0,0 +1,264 @@
+"""
+ Fórmulas psicrométricas comuns aos dois backends de cálculo
+
+ Um único conjunto de fórmulas, escrito para funcionar com escalares (módulo
+ math da biblioteca padrão) ou com arrays (NumPy). As que precisam de log,
+ exp ou seleção de ramo recebem o backend m como primeiro argumento; as
+ puramente aritméticas servem para os dois como estão.
+
+      MATH        - escalares float; não importa o NumPy
+      numpy()     - o próprio módulo numpy, importado só quando pedido
+      backend(x)  - MATH para int/float, NumPy para o resto
+      preparar(x) - (backend, x), com x convertido para array no NumPy
+
+ psicrometria.py (arrays) e escalar.py (um ponto, partida rápida) usam estas
+ funções; este módulo não importa o NumPy.
+"""
+import math
+
+# Constantes
+T_ABS = 273.16      # conversão °C -> K usada pelas fórmulas originais
+R_AR = 0.28705      # constante do ar seco (kJ/kg K)
+EPS = 0.62198       # razão entre massas molares vapor/ar seco
+
+
+class _Math:
+    # backend escalar com a mesma interface usada do NumPy
+    log = staticmethod(math.log)
+    log10 = staticmethod(math.log10)
+    exp = staticmethod(math.exp)
+    maximum = staticmethod(max)
+    minimum = staticmethod(min)
+    inf = math.inf
+
+    @staticmethod
+    def where(condicao, a, b):
+        return a if condicao else b
+
+
+MATH = _Math()
+
+
+def numpy():
+    # backend NumPy, importado na primeira vez que é pedido
+    import numpy as np
+    return np
+
+
+def backend(x):
+    return MATH if isinstance(x, (int, float)) else numpy()
+
+
+def pressao_vapor_saturado(m, t):
+    # cálculo da pressão do vapor de saturação (kPa), ramos água e gelo
+    t = t + T_ABS
+    agua = -7511.52 / t + 89.63121 + 0.023998970 * t
+    agua = agua - 1.1654551E-5 * (t ** 2) - 1.2810336E-8 * (t ** 3)
+    agua = agua + 2.0998405E-11 * (t ** 4) - 12.150799 * m.log(t)
+    gelo = 24.2779 - 6238.64 / t - 0.344438 * m.log(t)
+    return m.exp(m.where(t > T_ABS, agua, gelo))
+
+
+def pvs_e_derivada(m, t):
+    # pressão do vapor de saturação (kPa) e sua derivada (kPa/°C) numa só
+    # avaliação: d(pvs)/dt = pvs * d(ln pvs)/dt
+    t = t + T_ABS
+    t2 = t * t
+    agua = t > T_ABS
+    ln_t = m.log(t)
+    aux = m.where(agua,
+                  -7511.52 / t + 89.63121 + 0.023998970 * t
+                  - 1.1654551E-5 * t2 - 1.2810336E-8 * t2 * t
+                  + 2.0998405E-11 * t2 * t2 - 12.150799 * ln_t,
+                  24.2779 - 6238.64 / t - 0.344438 * ln_t)
+    daux = m.where(agua,
+                   7511.52 / t2 + 0.023998970 - 2 * 1.1654551E-5 * t
+                   - 3 * 1.2810336E-8 * t2 + 4 * 2.0998405E-11 * t2 * t
+                   - 12.150799 / t,
+                   6238.64 / t2 - 0.344438 / t)
+    p_vs = m.exp(aux)
+    return p_vs, p_vs * daux
+
+
+def preparar(x):
+    # (backend, x) com x convertido para array float quando for o caso
+    m = backend(x)
+    if m is not MATH:
+        x = m.asarray(x, dtype=float)
+    return m, x
+
+
+def pvs(t):
+    # pvs com o backend escolhido pelo tipo de t
+    return pressao_vapor_saturado(*preparar(t))
+
+
+def razao_mistura1(p, patm):
+    # Primeiro método de cálculo para razão de mistura
+    return EPS * p / (patm - p)
+
+
+def razao_mistura2(ts, th, w):
+    # Segundo  método de cálculo para razão de mistura
+    aux1 = (2501. - 2.411 * th) * w - 1.006 * (ts - th)
+    aux2 = 2501. + 1.775 * ts - 4.186 * th
+    return aux1 / aux2
+
+
+def umidade_relativa(p, ps):
+    # Cálculo da Umidade Relativa
+    return p / ps
+
+
+def entalpia(t, w):
+    # Cálculo de Entalpia
+    return 1.006 * t + w * (2501. + 1.775 * t)
+
+
+def pressao_vapor(w, patm):
+    # Cálculo da pressão parcial de vapor
+    return patm * w / (EPS + w)
+
+
+def temperatura_ponto_orvalho(m, p):
+    # Cálculo da temperatura do ponto de orvalho
+    a = m.log10(p * 10)
+    return (186.4905 - 237.3 * a) / (a - 8.2859)
+
+
+def pressao_vapor_ponto_orvalho(t):
+    # Inversa exata de temperatura_ponto_orvalho: pressão de vapor (kPa) com
+    # ponto de orvalho t. O ajuste é sobre água líquida, então abaixo de 0 °C
+    # difere de pvs(t) (ramo gelo)
+    a = (186.4905 + 8.2859 * t) / (t + 237.3)
+    return 10. ** a / 10.
+
+
+def temperatura_b_seco(h, w):
+    # Cálculo da temperatura do bulbo seco
+    return (h - 2501. * w) / (1.006 + 1.775 * w)
+
+
+def volume_especifico(t, w, patm):
+    # Cálculo de volume específico
+    return R_AR * (t + T_ABS) / patm * (1 + 1.6078 * w)
+
+
+def pressao_atmosferica(alt):
+    # Cálculo da pressão barométrica (kPa) a partir da altitude (m)
+    a = 2.2556e-5
+    b = 5.2559
+    return 101.324 * (1 - a * alt) ** b
+
+
+def saturacao_g_dg(t, e, p, ps, dps):
+    # Resíduo g(t) = rm_sat(t) - rmbs(t) da temperatura de saturação na
+    # entalpia e e sua derivada, com pvs e derivada (ps, dps) já avaliados;
+    # só vale com ps < p (abaixo do ponto de ebulição)
+    den = 2501. + 1.775 * t
+    rmbs = (e - 1.006 * t) / den
+    g = EPS * ps / (p - ps) - rmbs
+    dg = EPS * p * dps / (p - ps) ** 2
+    dg = dg + (1.006 * den + 1.775 * (e - 1.006 * t)) / den ** 2
+    return g, dg
+
+
+def chute_b_molhado(m, ts, et, patm):
+    # Estimativa inicial de tbm: regra de um terço entre o ponto de orvalho
+    # e ts
+    rm = m.maximum((et - 1.006 * ts) / (2501. + 1.775 * ts), 1e-9)
+    tpo = m.minimum(temperatura_ponto_orvalho(m, pressao_vapor(rm, patm)), ts)
+    return ts - (ts - m.maximum(tpo, -100.)) / 3
+
+
+def passo_protegido(m, t, g, dg, lo, hi, crescente=True):
+    # Um passo do Newton protegido: o intervalo [a, b] que ainda contém a
+    # raiz e o novo x, por bisseção quando o passo de Newton sai dele
+    acima = (g > 0) if crescente else (g < 0)
+    a = m.where(acima, lo, t)
+    b = m.where(acima, t, hi)
+    novo = t - g / dg
+    novo = m.where((novo > a) & (novo < b), novo, (a + b) / 2)
+    return novo, a, b
+
+
+def newton_protegido(m, funcao, x0, lo, hi, tol=1e-4, max_iter=30,
+                     crescente=True, instr=None, nome='newton'):
+    # Método de Newton protegido por intervalo [lo, hi], para os dois
+    # backends. funcao(x, idx) devolve (g, dg); a raiz de g deve estar em
+    # [lo, hi] e g deve ser monótona (crescente ou não). Com NumPy, idx são
+    # os índices dos elementos ainda ativos e todos iteram juntos até
+    # |passo| < tol ou max_iter iterações; com MATH, x é um float e idx é
+    # None. instr: Instrumentacao opcional, que recebe as iterações com o
+    # nome dado
+    if m is MATH:
+        x = x0
+        ativo = x == x
+        passos = 0
+        while ativo and passos < max_iter:
+            passos += 1
+            g, dg = funcao(x, None)
+            novo, lo, hi = passo_protegido(m, x, g, dg or m.inf, lo, hi,
+                                           crescente)
+            ativo = abs(novo - x) >= tol
+            x = novo
+        if instr is not None:
+            instr.solver(nome, passos, passos, int(x0 == x0), int(ativo))
+        return x
+    x = m.array(x0, dtype=float)
+    lo = m.array(lo, dtype=float)
+    hi = m.array(hi, dtype=float)
+    idx = m.flatnonzero(m.isfinite(x))
+    pontos = idx.size
+    passos = iteracoes = 0
+    for passos in range(max_iter):
+        if not idx.size:
+            break
+        iteracoes += idx.size
+        t = x[idx]
+        g, dg = funcao(t, idx)
+        novo, a, b = passo_protegido(m, t, g, dg, lo[idx], hi[idx], crescente)
+        x[idx], lo[idx], hi[idx] = novo, a, b
+        idx = idx[m.abs(novo - t) >= tol]
+    else:
+        passos = max_iter
+    if instr is not None:
+        instr.solver(nome, passos, iteracoes, pontos, idx.size)
+    return x
+
+
+# Casos especiais dos pares de entrada (regras de main.py), os mesmos em
+# todos os backends
+UR_LIMITE = 0.99999         # ur = 1 na entrada é calculada com este valor
+UR_ORVALHO = 0.999999       # ur informada quando tbs == tpo
+
+
+def limitar_ur(m, ur):
+    # ur de entrada: 1 vira UR_LIMITE
+    return m.where(ur == 1., UR_LIMITE, ur)
+
+
+def estado_tbs_tbm(m, tbs, tbm, pvs, pvsu, patm, saturado=None):
+    # rm, pv, ur e tpo do par (tbs, tbm), com pvs = pvs(tbs) e
+    # pvsu = pvs(tbm); tbs == tbm é ar saturado (ur = 1 e tpo = tbs).
+    # saturado: a comparação já feita nas entradas originais (rapido.py
+    # compara antes de arredondar para float32)
+    if saturado is None:
+        saturado = tbs == tbm
+    rm = m.where(saturado, razao_mistura1(pvs, patm),
+                 razao_mistura2(tbs, tbm, razao_mistura1(pvsu, patm)))
+    pv = m.where(saturado, pvs, pressao_vapor(rm, patm))
+    ur = m.where(saturado, 1., umidade_relativa(pv, pvs))
+    tpo = m.where(saturado, tbs, temperatura_ponto_orvalho(m, pv))
+    return rm, pv, ur, tpo
+
+
+def estado_tbs_tpo(m, tbs, tpo, pvs, pvo, patm, saturado=None):
+    # pv, rm e ur do par (tbs, tpo), com pvs = pvs(tbs) e pvo = pvs(tpo);
+    # tbs == tpo é ar saturado, com ur = UR_ORVALHO e tbm = tbs (saturado
+    # como em estado_tbs_tbm)
+    if saturado is None:
+        saturado = tbs == tpo
+    pv = m.where(saturado, pvs, pvo)
+    ur = m.where(saturado, UR_ORVALHO, umidade_relativa(pv, pvs))
+    return pv, razao_mistura1(pv, patm), ur
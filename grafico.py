@@ -0,0 +1,241 @@
+"""
+ Gráfico psicrométrico (a carta GRAPSI) em SVG
+
+ As isolinhas são calculadas com as funções vetorizadas de psicrometria.py
+ para a pressão barométrica do local:
+
+      ur   - curvas de umidade relativa (a de 100% é a de saturação)
+      tbm  - retas de temperatura de bulbo molhado
+      e    - retas de entalpia
+      ve   - retas de volume específico
+
+ Cada família é guardada como uma matriz rm (linhas = níveis, colunas = tbs),
+ com NaN fora do gráfico ou acima da saturação. As matrizes de cada pressão
+ ficam num diretório de cache (.npy, lidas com mmap) junto com o SVG pronto,
+ então repetir o gráfico de uma altitude conhecida é só leitura de arquivo.
+ Cada arquivo do cache é gravado num temporário e renomeado (os.replace),
+ então quem lê ao mesmo tempo vê o arquivo antigo ou o novo, nunca metade.
+
+      import grafico
+      svg = grafico.grafico_svg(altitude=800., cache='cache_grapsi')
+      python grafico.py --altitude 800 -o carta.svg
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+import psicrometria as ps
+
+TBS_MIN = -10.
+TBS_MAX = 50.
+RM_MAX = 0.030
+PASSO = 0.25
+NIVEIS_UR = np.arange(0.1, 1.01, 0.1)
+NIVEIS_TBM = np.arange(-10., 36., 5.)
+NIVEIS_E = np.arange(-10., 141., 10.)
+FAMILIAS = ('ur', 'tbm', 'e', 've')
+
+
+def _niveis_ve(patm, tbs_min, tbs_max, rm_max):
+    # níveis de 0.01 m3/kg cobrindo o gráfico nesta pressão
+    v_min = ps.volume_especifico(tbs_min, 0., patm)
+    v_max = ps.volume_especifico(tbs_max, rm_max, patm)
+    return np.arange(np.ceil(v_min * 100.), np.floor(v_max * 100.) + 1) / 100.
+
+
+def calcular_isolinhas(patm, tbs_min=TBS_MIN, tbs_max=TBS_MAX, rm_max=RM_MAX,
+                       passo=PASSO):
+    # Calcula as isolinhas; devolve {nome: array}, com tbs, os níveis de cada
+    # família (niveis_<família>) e rm de cada família (rm_<família>, kg/kg)
+    tbs = np.arange(tbs_min, tbs_max + passo / 2, passo)
+    pvs = ps.pressao_vapor_saturado(tbs)
+    rm_sat = ps.razao_mistura1(pvs, patm)
+    t = tbs[None, :]
+    grade = {'tbs': tbs, 'patm': np.array(patm, dtype=float)}
+    # umidade relativa
+    grade['niveis_ur'] = NIVEIS_UR
+    grade['rm_ur'] = ps.razao_mistura1(NIVEIS_UR[:, None] * pvs[None, :],
+                                       patm)
+    # bulbo molhado: retas de razao_mistura2 a partir da saturação em tbm
+    tbm = NIVEIS_TBM[:, None]
+    rm_tbm = ps.razao_mistura2(t, tbm, ps.razao_mistura1(
+        ps.pressao_vapor_saturado(tbm), patm))
+    grade['niveis_tbm'] = NIVEIS_TBM
+    grade['rm_tbm'] = np.where(t >= tbm, rm_tbm, np.nan)
+    # entalpia
+    grade['niveis_e'] = NIVEIS_E
+    grade['rm_e'] = (NIVEIS_E[:, None] - 1.006 * t) / (2501. + 1.775 * t)
+    # volume específico
+    niveis_ve = _niveis_ve(patm, tbs_min, tbs_max, rm_max)
+    grade['niveis_ve'] = niveis_ve
+    grade['rm_ve'] = (niveis_ve[:, None] * patm /
+                      (ps.R_AR * (t + ps.T_ABS)) - 1.) / 1.6078
+    # só a região não saturada dentro do gráfico
+    for nome in FAMILIAS:
+        rm = grade['rm_' + nome]
+        fora = (rm < 0.) | (rm > rm_max) | (rm > rm_sat[None, :] * 1.000001)
+        grade['rm_' + nome] = np.where(fora, np.nan, rm)
+    return grade
+
+
+def _diretorio(cache, patm, tbs_min, tbs_max, rm_max, passo):
+    nome = 'p{:.3f}_t{:g}_{:g}_rm{:g}_d{:g}'.format(patm, tbs_min, tbs_max,
+                                                   rm_max, passo)
+    return os.path.join(cache, nome)
+
+
+def _gravar(caminho, escrever, modo='wb'):
+    # Grava num temporário da mesma pasta e troca pelo arquivo final de uma
+    # vez (os.replace é atômico); escrever(f) recebe o arquivo aberto
+    descritor, temporario = tempfile.mkstemp(
+        dir=os.path.dirname(caminho), suffix='.tmp')
+    try:
+        with os.fdopen(descritor, modo,
+                       encoding=None if 'b' in modo else 'utf-8') as f:
+            escrever(f)
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.remove(temporario)
+        raise
+
+
+def isolinhas(patm, cache=None, tbs_min=TBS_MIN, tbs_max=TBS_MAX,
+              rm_max=RM_MAX, passo=PASSO):
+    # Isolinhas da pressão patm, lidas do cache (mmap) quando existem
+    if cache is None:
+        return calcular_isolinhas(patm, tbs_min, tbs_max, rm_max, passo)
+    pasta = _diretorio(cache, patm, tbs_min, tbs_max, rm_max, passo)
+    marcador = os.path.join(pasta, 'completo')
+    if not os.path.exists(marcador):
+        grade = calcular_isolinhas(patm, tbs_min, tbs_max, rm_max, passo)
+        os.makedirs(pasta, exist_ok=True)
+        for nome, valor in grade.items():
+            _gravar(os.path.join(pasta, nome + '.npy'),
+                    lambda f, valor=valor: np.save(f, valor))
+        # o marcador é gravado por último: cache incompleto é recalculado
+        _gravar(marcador, lambda f: None)
+    return {arquivo[:-4]: np.load(os.path.join(pasta, arquivo),
+                                  mmap_mode='r')
+            for arquivo in os.listdir(pasta) if arquivo.endswith('.npy')}
+
+
+def _polilinha(x, y, classe):
+    # uma <polyline> por trecho contínuo (NaN separa os trechos)
+    partes = []
+    valido = np.isfinite(y)
+    bordas = np.flatnonzero(np.diff(np.concatenate(([0], valido.view(np.int8),
+                                                    [0]))))
+    for a, b in zip(bordas[::2], bordas[1::2]):
+        if b - a < 2:
+            continue
+        pontos = ' '.join('{:.1f},{:.1f}'.format(xi, yi)
+                          for xi, yi in zip(x[a:b], y[a:b]))
+        partes.append('<polyline class="{}" points="{}"/>'.format(classe,
+                                                                 pontos))
+    return partes
+
+
+def desenhar_svg(grade, largura=960, altura=640, rm_max=RM_MAX):
+    # Monta o SVG a partir das isolinhas
+    tbs = np.asarray(grade['tbs'])
+    esq, dir_, topo, base = 50., 70., 40., 50.
+    w, h = largura - esq - dir_, altura - topo - base
+    x = esq + (tbs - tbs[0]) / (tbs[-1] - tbs[0]) * w
+
+    def y(rm):
+        return topo + h - np.asarray(rm) / rm_max * h
+
+    svg = ['<svg xmlns="http://www.w3.org/2000/svg" width="{}" height="{}" '
+           'font-family="sans-serif" font-size="10">'.format(largura, altura),
+           '<style>polyline{fill:none}'
+           '.ur{stroke:#1f5fa8;stroke-width:0.8}.sat{stroke:#1f5fa8;'
+           'stroke-width:1.8}.tbm{stroke:#2a8a3a;stroke-width:0.6}'
+           '.e{stroke:#b05a1a;stroke-width:0.6;stroke-dasharray:4 2}'
+           '.ve{stroke:#7a3aa0;stroke-width:0.6}.grade{stroke:#ddd;'
+           'stroke-width:0.5}</style>',
+           '<text x="{}" y="20" font-size="14">GRAPSI - gráfico psicrométrico'
+           ' - patm = {:.2f} kPa</text>'.format(esq, float(grade['patm']))]
+    # grade e eixos
+    for t in np.arange(np.ceil(tbs[0] / 5) * 5, tbs[-1] + 1e-9, 5.):
+        xt = esq + (t - tbs[0]) / (tbs[-1] - tbs[0]) * w
+        svg.append('<line class="grade" x1="{0:.1f}" y1="{1:.1f}" '
+                   'x2="{0:.1f}" y2="{2:.1f}" stroke="#ddd"/>'.format(
+                       xt, topo, topo + h))
+        svg.append('<text x="{:.1f}" y="{:.1f}" text-anchor="middle">{:g}'
+                   '</text>'.format(xt, topo + h + 14, t))
+    for g in np.arange(0., rm_max * 1000. + 1e-9, 2.):
+        yg = float(y(g / 1000.))
+        svg.append('<line x1="{0:.1f}" y1="{1:.1f}" x2="{2:.1f}" '
+                   'y2="{1:.1f}" stroke="#ddd" stroke-width="0.5"/>'.format(
+                       esq, yg, esq + w))
+        svg.append('<text x="{:.1f}" y="{:.1f}">{:g}</text>'.format(
+            esq + w + 6, yg + 3, g))
+    svg.append('<rect x="{}" y="{}" width="{}" height="{}" fill="none" '
+               'stroke="#000"/>'.format(esq, topo, w, h))
+    svg.append('<text x="{:.1f}" y="{:.1f}" text-anchor="middle">'
+               'Temperatura de bulbo seco (°C)</text>'.format(
+                   esq + w / 2, altura - 12))
+    svg.append('<text transform="translate({:.1f},{:.1f}) rotate(90)" '
+               'text-anchor="middle">Razão de mistura (g/kg)</text>'.format(
+                   largura - 20, topo + h / 2))
+    # isolinhas e rótulos
+    for nome in FAMILIAS:
+        niveis = np.asarray(grade['niveis_' + nome])
+        rm = np.asarray(grade['rm_' + nome])
+        for nivel, linha in zip(niveis, rm):
+            classe = 'sat' if nome == 'ur' and nivel > 0.999 else nome
+            yl = y(linha)
+            svg.extend(_polilinha(x, yl, classe))
+            validos = np.flatnonzero(np.isfinite(yl))
+            if not validos.size:
+                continue
+            i = validos[-1] if nome == 'ur' else validos[0]
+            rotulo = {'ur': '{:.0f}%'.format(nivel * 100.),
+                      'tbm': 'tbm {:g}'.format(nivel),
+                      'e': '{:g} kJ/kg'.format(nivel),
+                      've': '{:.2f}'.format(nivel)}[nome]
+            svg.append('<text class="r{}" x="{:.1f}" y="{:.1f}">{}</text>'
+                       .format(nome, x[i] + 2, yl[i] - 2, rotulo))
+    svg.append('</svg>')
+    return '\n'.join(svg)
+
+
+def grafico_svg(altitude=None, patm=None, cache=None, caminho=None,
+                tbs_min=TBS_MIN, tbs_max=TBS_MAX, rm_max=RM_MAX, passo=PASSO):
+    # SVG do gráfico para a altitude (m) ou pressão (kPa) dada. Com cache, o
+    # SVG pronto também é guardado e reaproveitado. Com caminho, é gravado.
+    if patm is None:
+        patm = float(ps.pressao_atmosferica(0. if altitude is None
+                                            else altitude))
+    svg = None
+    arquivo_svg = None
+    if cache is not None:
+        pasta = _diretorio(cache, patm, tbs_min, tbs_max, rm_max, passo)
+        arquivo_svg = os.path.join(pasta, 'grafico.svg')
+        # o SVG só vale com as isolinhas completas (marcador)
+        if os.path.exists(os.path.join(pasta, 'completo')) and \
+                os.path.exists(arquivo_svg):
+            with open(arquivo_svg, encoding='utf-8') as f:
+                svg = f.read()
+    if svg is None:
+        grade = isolinhas(patm, cache, tbs_min, tbs_max, rm_max, passo)
+        svg = desenhar_svg(grade, rm_max=rm_max)
+        if arquivo_svg is not None:
+            _gravar(arquivo_svg, lambda f: f.write(svg), 'w')
+    if caminho is not None:
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(svg)
+    return svg
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='GRAPSI - gráfico em SVG')
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument('--altitude', type=float, default=0.)
+    grupo.add_argument('--patm', type=float)
+    parser.add_argument('-o', '--saida', default='grafico.svg')
+    parser.add_argument('--cache', help='diretório de cache das isolinhas')
+    args = parser.parse_args()
+    grafico_svg(args.altitude, args.patm, args.cache, args.saida)
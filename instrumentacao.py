@@ -0,0 +1,155 @@
+"""
+ Instrumentação opcional dos cálculos (--profile)
+
+ Liga-se passando uma Instrumentacao no Contexto:
+
+      instr = Instrumentacao()
+      ctx = psicrometria.Contexto(92.1, instr=instr)
+      ps.pe_tbs_ur(ctx, tbs, ur)
+      processos.u_adiabatica_ur(ctx, 30., 0.4, 0.8)
+      instr.relatorio()          # dict; instr.json() para texto
+
+ Cada função de ponto de estado ou processo chamada com esse contexto vira um
+ "cálculo" no relatório (chamadas internas, como pe_tbs_ur dentro de um
+ processo, somam no cálculo de fora), com:
+
+      pontos      número de pontos do resultado
+      tempo_s     tempo total do cálculo
+      tempos_s    tempo gasto em tbm (bulbo molhado) e em pvs; o tempo de pvs
+                  chamado pelos solvers também conta dentro do de tbm
+      pvs         chamadas e avaliações (elementos) de pvs
+      solvers     por solver (tbm, u_adiabatica_ur, neblina, tpvs): chamadas,
+                  passos (iterações vetoriais), iteracoes (soma por ponto),
+                  pontos e no_limite (pontos que chegaram a max_iter sem
+                  convergir)
+
+ e 'total' soma todos os cálculos (o lote inteiro). Os pontos de
+ rapido.py contam pvs e os passos fixos do tbm (solver 'tbm', sem
+ no_limite); os de preguicoso.py viram um cálculo por acesso que calcula uma
+ propriedade. Chamadas diretas dos solvers, fora de qualquer cálculo, somam
+ no registro 'avulso'. Sem instrumentação (instr=None, o padrão) as funções
+ só testam um atributo.
+"""
+import functools
+import json
+import time
+
+
+def _novo_registro(nome):
+    return {'nome': nome, 'pontos': 0, 'tempo_s': 0., 'tempos_s': {},
+            'pvs': {'chamadas': 0, 'avaliacoes': 0}, 'solvers': {}}
+
+
+def _somar(destino, origem):
+    # soma recursiva de registros (números somados, dicionários mesclados)
+    for chave, valor in origem.items():
+        if isinstance(valor, dict):
+            _somar(destino.setdefault(chave, {}), valor)
+        elif isinstance(valor, (int, float)):
+            destino[chave] = destino.get(chave, 0) + valor
+
+
+class Instrumentacao:
+    # Contadores e tempos por cálculo; não é para uso entre threads
+    def __init__(self):
+        self.calculos = []
+        self._atual = None
+        self._avulso = None
+
+    def _registro(self):
+        # registro do cálculo em andamento, ou o registro 'avulso' que junta
+        # as chamadas diretas dos solvers fora de um cálculo
+        if self._atual is not None:
+            return self._atual
+        if self._avulso is None:
+            self._avulso = _novo_registro('avulso')
+            self.calculos.append(self._avulso)
+        return self._avulso
+
+    def iniciar(self, nome):
+        # Abre um cálculo; devolve False se já há um aberto (chamada interna)
+        if self._atual is not None:
+            return False
+        self._atual = _novo_registro(nome)
+        self._atual['_inicio'] = time.perf_counter()
+        return True
+
+    def terminar(self, pontos):
+        registro = self._atual
+        registro['tempo_s'] = time.perf_counter() - registro.pop('_inicio')
+        registro['pontos'] = pontos
+        self.calculos.append(registro)
+        self._atual = None
+
+    def tempo(self, nome, segundos):
+        tempos = self._registro()['tempos_s']
+        tempos[nome] = tempos.get(nome, 0.) + segundos
+
+    def pvs(self, avaliacoes, segundos):
+        registro = self._registro()
+        registro['pvs']['chamadas'] += 1
+        registro['pvs']['avaliacoes'] += avaliacoes
+        self.tempo('pvs', segundos)
+
+    def contar_pvs(self, funcao):
+        # Envolve uma função de pvs (ou pvs e derivada) para contá-la
+        def contada(t):
+            inicio = time.perf_counter()
+            resultado = funcao(t)
+            self.pvs(getattr(t, 'size', 1), time.perf_counter() - inicio)
+            return resultado
+        return contada
+
+    def solver(self, nome, passos, iteracoes, pontos, no_limite):
+        s = self._registro()['solvers'].setdefault(
+            nome, {'chamadas': 0, 'passos': 0, 'iteracoes': 0, 'pontos': 0,
+                   'no_limite': 0})
+        s['chamadas'] += 1
+        s['passos'] += passos
+        s['iteracoes'] += iteracoes
+        s['pontos'] += pontos
+        s['no_limite'] += no_limite
+
+    def relatorio(self):
+        # {'calculos': [...], 'total': {...}}
+        total = _novo_registro('total')
+        del total['nome']
+        total['calculos'] = len(self.calculos)
+        for registro in self.calculos:
+            _somar(total, registro)
+        return {'calculos': list(self.calculos), 'total': total}
+
+    def json(self, **kwargs):
+        return json.dumps(self.relatorio(), **kwargs)
+
+    def limpar(self):
+        self.calculos = []
+        self._atual = None
+        self._avulso = None
+
+
+def _pontos(resultado):
+    # número de pontos de um PontoEstado ou ResultadoProcesso
+    import numpy as np
+    pontos = getattr(resultado, 'pontos', None)
+    p = pontos[-1] if pontos else resultado
+    return int(np.size(getattr(p, 'tbs', 0)))
+
+
+def instrumentado(funcao):
+    # Decorador das funções que recebem ctx como primeiro argumento: com
+    # ctx.instr, a chamada vira um cálculo no relatório
+    nome = funcao.__name__
+
+    @functools.wraps(funcao)
+    def envolvida(ctx, *args, **kwargs):
+        instr = ctx.instr
+        if instr is None or not instr.iniciar(nome):
+            return funcao(ctx, *args, **kwargs)
+        resultado = None
+        try:
+            resultado = funcao(ctx, *args, **kwargs)
+        finally:
+            instr.terminar(0 if resultado is None else _pontos(resultado))
+        return resultado
+    return envolvida
@@ -0,0 +1,365 @@
+"""
+ Ponto de estado a partir de qualquer par de propriedades
+
+ psicrometria.py só resolve pares com tbs. Aqui o estado é encontrado a
+ partir de pares como (e, rm), (tbm, ur), (tpo, ur) ou (ve, e) com um índice
+ pré-calculado por pressão:
+
+   1. linhas de rm constante, de rm_min a rm_max, e em cada linha tbs da
+      saturação até tbs_max (só a região não saturada);
+   2. tabela tbs(A, rm), com A a primeira propriedade do par (monótona em tbs
+      ao longo de cada linha);
+   3. tabela rm(A, B), com B a segunda (monótona em rm ao longo de A
+      constante), obtida invertendo cada linha de A constante com np.interp.
+
+ A consulta é uma interpolação bilinear nas duas tabelas seguida de passos de
+ Newton em (tbs, rm) com as fórmulas diretas (entalpia, volume_especifico,
+ razao_mistura1, temperatura_b_molhado ...) e jacobiano por diferenças
+ finitas. Tudo vetorizado: um array de pares sai inteiro de uma vez. Pares
+ fora do índice (ou saturados) resultam em NaN.
+
+ tpo só depende de rm, então é convertido para rm antes da consulta, pela
+ inversa exata do ajuste de temperatura_ponto_orvalho: o tpo que pe_tbs_ur
+ (e pe_par) informa volta ao mesmo estado. pe_tbs_tpo usa pvs(tpo), que
+ abaixo de 0 °C (ramo gelo) difere do ajuste (sobre água) em até 4 °C de
+ ponto de orvalho. Como em pe_tbs_tbm e pe_tbs_tpo, as propriedades dadas
+ voltam como entraram.
+ Pares suportados: A em (tbs, ur, ve, e, tbm) com B em (rm, tpo, ur, ve, e,
+ tbm), exceto (e, tbm), cujas retas são quase paralelas.
+
+ Precisão (201 pontos, 2 passos de Newton, mais até 2 nas linhas que ainda
+ não convergiram): tbs e rm saem com o resíduo das fórmulas diretas (tbs com
+ erro < 1e-7 °C nos pares algébricos, inclusive perto de 0 °C, e < 1e-4 °C
+ com tbm, que depende da tolerância do bulbo molhado). Todo estado dentro do
+ domínio do índice (tbs_min a tbs_max, rm_min a rm_max, não saturado) volta;
+ fora dele o resultado é NaN. A exceção são os pares com tbm perto de
+ 0 °C: pvs salta 0.09 % na troca de ramo gelo/água, então uma faixa de
+ estados tem quase o mesmo tbm e, com |tbm| < 0.02 °C, o par pode sair NaN
+ ou com tbs errado em até 0.01 °C.
+
+      import inversa
+      p = inversa.pe_par(ctx, 'tbm', 18., 'ur', 0.45)
+      p = inversa.pe_par(ctx, 've', ve, 'e', e)          # arrays
+
+ Com ctx.patm por linha (locais de 0 a 3000 m, pressões medidas), as linhas
+ são agrupadas por pressão arredondada a resolucao (padrão 1 kPa): cada grupo
+ monta ou reaproveita um índice, o chute corrige ve e ur para a pressão do
+ índice e o Newton usa a pressão exata da linha, sem perda de precisão.
+"""
+import functools
+
+import numpy as np
+
+import psicrometria as ps
+from instrumentacao import instrumentado
+
+# A (varia com tbs em rm constante) e B (varia com rm em A constante)
+PRIMEIRA = ('tbs', 'ur', 've', 'e', 'tbm')
+SEGUNDA = ('rm', 'ur', 've', 'e', 'tbm')
+# e e tbm são quase a mesma informação (retas de tbm ~ retas de entalpia)
+PARES_PROIBIDOS = {frozenset(('e', 'tbm'))}
+
+
+def _propriedade(nome, t, w, patm):
+    # modelo direto: propriedade nome em (tbs, rm)
+    if nome == 'tbs':
+        return t
+    if nome == 'rm':
+        return w
+    if nome == 'e':
+        return ps.entalpia(t, w)
+    if nome == 've':
+        return ps.volume_especifico(t, w, patm)
+    if nome == 'ur':
+        return ps.pressao_vapor(w, patm) / ps.pressao_vapor_saturado(t)
+    if nome == 'tbm':
+        # tolerância apertada: as diferenças finitas do polimento dependem dela
+        return ps.temperatura_b_molhado(t, ps.entalpia(t, w), patm, tol=1e-9)
+    raise ValueError('propriedade desconhecida: {}'.format(nome))
+
+
+def _coordenada(nome, valor):
+    # rm entra nas tabelas como ln rm
+    if nome == 'rm':
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.log(valor)
+    return valor
+
+
+def _ordenar(nome_a, a, nome_b, b, patm):
+    # Coloca o par na ordem (A, B) do índice; tpo vira rm
+    if nome_a == 'tpo':
+        nome_a, a, nome_b, b = nome_b, b, nome_a, a
+    if nome_b == 'tpo':
+        nome_b = 'rm'
+        b = ps.razao_mistura1(ps.pressao_vapor_ponto_orvalho(b), patm)
+    if nome_a not in PRIMEIRA or (nome_b in PRIMEIRA and
+                                  PRIMEIRA.index(nome_b) <
+                                  PRIMEIRA.index(nome_a)):
+        nome_a, a, nome_b, b = nome_b, b, nome_a, a
+    if (nome_a == nome_b or nome_a not in PRIMEIRA or nome_b not in SEGUNDA
+            or frozenset((nome_a, nome_b)) in PARES_PROIBIDOS):
+        raise ValueError('par não suportado: ({}, {})'.format(nome_a, nome_b))
+    return nome_a, a, nome_b, b
+
+
+def _bilinear(tabela, x0, dx, y0, dy, x, y):
+    # Interpolação bilinear em grade regular; cantos NaN são descartados e os
+    # pesos dos demais renormalizados (bordas da região não saturada)
+    nx, ny = tabela.shape
+    fx = (x - x0) / dx
+    fy = (y - y0) / dy
+    dentro = (fx >= 0) & (fx <= nx - 1) & (fy >= 0) & (fy <= ny - 1)
+    fx = np.where(dentro, fx, 0.)
+    fy = np.where(dentro, fy, 0.)
+    i = np.minimum(np.floor(fx), nx - 2).astype(np.intp)
+    j = np.minimum(np.floor(fy), ny - 2).astype(np.intp)
+    sx = fx - i
+    sy = fy - j
+    soma = np.zeros(np.shape(x))
+    pesos = np.zeros(np.shape(x))
+    for di, wx in ((0, 1. - sx), (1, sx)):
+        for dj, wy in ((0, 1. - sy), (1, sy)):
+            v = tabela[i + di, j + dj]
+            w = np.where(np.isfinite(v), wx * wy, 0.)
+            soma += w * np.where(np.isfinite(v), v, 0.)
+            pesos += w
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = soma / pesos
+    return np.where(dentro & (pesos > 1e-6), r, np.nan)
+
+
+class _TabelaPar:
+    # Tabelas tbs(A, ln rm) e ln rm(A, B) de um par numa pressão
+    __slots__ = ('a0', 'da', 'b0', 'db', 'ln_rm0', 'dln_rm', 'tbs', 'ln_rm')
+
+    def __init__(self, a0, da, b0, db, ln_rm0, dln_rm, tbs, ln_rm):
+        self.a0 = a0
+        self.da = da
+        self.b0 = b0
+        self.db = db
+        self.ln_rm0 = ln_rm0
+        self.dln_rm = dln_rm
+        self.tbs = tbs
+        self.ln_rm = ln_rm
+
+    @classmethod
+    def construir(cls, nome_a, nome_b, patm, tbs_min, tbs_max, rm_min, rm_max,
+                  pontos):
+        # Monta as tabelas do par (A, B) a partir do modelo direto
+        with np.errstate(all='ignore'):
+            return cls._construir(nome_a, nome_b, patm, tbs_min, tbs_max,
+                                  rm_min, rm_max, pontos)
+
+    @classmethod
+    def _construir(cls, nome_a, nome_b, patm, tbs_min, tbs_max, rm_min,
+                   rm_max, pontos):
+        # linhas de rm constante na região não saturada, espaçadas em ln rm
+        # (no frio a saturação fica em poucos g/kg)
+        ln_rm = np.linspace(np.log(rm_min), np.log(rm_max), pontos)
+        rm = np.exp(ln_rm)
+        t_sat = ps.temperatura_pvs(ps.pressao_vapor(rm, patm), tol=1e-9)
+        lo = np.maximum(t_sat, tbs_min)
+        s = np.linspace(0., 1., pontos)
+        t = lo[:, None] + (tbs_max - lo[:, None]) * s[None, :]
+        t[lo >= tbs_max] = np.nan
+        w = np.broadcast_to(rm[:, None], t.shape)
+        a = _propriedade(nome_a, t, w, patm)
+        # tbs(A, rm): inverte cada linha (A monótona em tbs)
+        niveis_a = np.linspace(np.nanmin(a), np.nanmax(a), pontos)
+        tab_t = np.full((pontos, pontos), np.nan)
+        for j in range(pontos):
+            ok = np.isfinite(a[j])
+            if ok.sum() < 2:
+                continue
+            xp, fp = a[j, ok], t[j, ok]
+            if xp[-1] < xp[0]:
+                xp, fp = xp[::-1], fp[::-1]
+            tab_t[:, j] = np.interp(niveis_a, xp, fp, np.nan, np.nan)
+        # ln rm(A, B): B ao longo de A constante, invertida em rm
+        b = _coordenada(nome_b, _propriedade(
+            nome_b, tab_t, np.broadcast_to(rm, tab_t.shape), patm))
+        niveis_b = np.linspace(np.nanmin(b), np.nanmax(b), pontos)
+        tab_rm = np.full((pontos, pontos), np.nan)
+        for k in range(pontos):
+            ok = np.isfinite(b[k])
+            if ok.sum() < 2:
+                continue
+            xp, fp = b[k, ok], ln_rm[ok]
+            if xp[-1] < xp[0]:
+                xp, fp = xp[::-1], fp[::-1]
+            if np.any(np.diff(xp) <= 0.):
+                raise ValueError('par ({}, {}) não é monótono no índice'
+                                 .format(nome_a, nome_b))
+            tab_rm[k] = np.interp(niveis_b, xp, fp)
+        return cls(niveis_a[0], niveis_a[1] - niveis_a[0], niveis_b[0],
+                   niveis_b[1] - niveis_b[0], ln_rm[0], ln_rm[1] - ln_rm[0],
+                   tab_t, tab_rm)
+
+    def consultar(self, a, b, nome_b):
+        # (tbs, rm) interpolados
+        ln_rm = _bilinear(self.ln_rm, self.a0, self.da, self.b0, self.db, a,
+                          _coordenada(nome_b, b))
+        tbs = _bilinear(self.tbs, self.a0, self.da, self.ln_rm0, self.dln_rm,
+                        a, ln_rm)
+        return tbs, np.exp(ln_rm)
+
+
+class IndiceInverso:
+    # Índice de uma pressão (kPa); as tabelas de cada par são construídas na
+    # primeira consulta e guardadas
+    __slots__ = ('patm', 'tbs_min', 'tbs_max', 'rm_min', 'rm_max', 'pontos',
+                 '_tabelas')
+
+    def __init__(self, patm, tbs_min=-20., tbs_max=60., rm_min=1e-5,
+                 rm_max=0.05, pontos=201):
+        self.patm = float(patm)
+        self.tbs_min = tbs_min
+        self.tbs_max = tbs_max
+        self.rm_min = rm_min
+        self.rm_max = rm_max
+        self.pontos = pontos
+        self._tabelas = {}
+
+    def tabela(self, nome_a, nome_b):
+        chave = (nome_a, nome_b)
+        if chave not in self._tabelas:
+            self._tabelas[chave] = _TabelaPar.construir(
+                nome_a, nome_b, self.patm, self.tbs_min, self.tbs_max,
+                self.rm_min, self.rm_max, self.pontos)
+        return self._tabelas[chave]
+
+    def resolver(self, nome_a, a, nome_b, b, polir=2, tol=1e-6, patm=None):
+        # (tbs, rm) com A = a e B = b; par já ordenado por _ordenar.
+        # Linhas que não convergem até tol (relativo à faixa do índice) ou
+        # que caem na região saturada ficam NaN. Com patm (por linha, perto
+        # da pressão do índice) a tabela dá o chute e os passos de Newton
+        # usam a pressão de cada linha. Nos pares algébricos (sem tbm), as
+        # linhas com resíduo acima de 1e-9 da faixa depois dos 'polir' passos
+        # (chute do outro lado de 0 °C, onde pvs troca de ramo) recebem até
+        # dois passos a mais, mantidos só onde reduzem o resíduo.
+        tab = self.tabela(nome_a, nome_b)
+        a, b, patm = np.broadcast_arrays(np.asarray(a, dtype=float),
+                                         np.asarray(b, dtype=float),
+                                         self.patm if patm is None else
+                                         np.asarray(patm, dtype=float))
+        t, w = tab.consultar(_na_pressao(nome_a, a, patm, self.patm),
+                             _na_pressao(nome_b, b, patm, self.patm), nome_b)
+        faixa_a = tab.da * (self.pontos - 1)
+        faixa_b = tab.db * (self.pontos - 1)
+        with np.errstate(all='ignore'):
+            for _ in range(polir):
+                t, w = _passo(nome_a, a, nome_b, b, t, w, patm)
+            fa, fb = _residuos(nome_a, a, nome_b, b, t, w, patm)
+            for _ in range(0 if 'tbm' in (nome_a, nome_b) else 2):
+                erro = np.maximum(np.abs(fa) / faixa_a, np.abs(fb) / faixa_b)
+                k = np.flatnonzero(erro > 1e-9)
+                if not k.size:
+                    break
+                tk, wk = _passo(nome_a, a[k], nome_b, b[k], t[k], w[k],
+                                patm[k])
+                fak, fbk = _residuos(nome_a, a[k], nome_b, b[k], tk, wk,
+                                     patm[k])
+                # só fica o passo que reduz o resíduo (tbm é descontínua)
+                melhor = np.maximum(np.abs(fak) / faixa_a,
+                                    np.abs(fbk) / faixa_b) < erro[k]
+                k = k[melhor]
+                t[k], w[k] = tk[melhor], wk[melhor]
+                fa[k], fb[k] = fak[melhor], fbk[melhor]
+            ur = _propriedade('ur', t, w, patm)
+            # fora do domínio do índice é NaN, mesmo que o Newton tenha
+            # achado o estado a partir de um chute da borda
+            folga = 1e-9
+            ok = ((np.abs(fa) <= tol * faixa_a) &
+                  (np.abs(fb) <= tol * faixa_b) &
+                  (w >= 0.) & (ur <= 1. + 1e-9) &
+                  (t >= self.tbs_min - folga) & (t <= self.tbs_max + folga) &
+                  (w >= self.rm_min * (1. - folga)) &
+                  (w <= self.rm_max * (1. + folga)))
+        return np.where(ok, t, np.nan), np.where(ok, w, np.nan)
+
+
+def _na_pressao(nome, valor, patm, patm_indice):
+    # valor da propriedade no mesmo (tbs, rm) na pressão do índice, para o
+    # chute das linhas com outra pressão: ve varia com 1/patm e ur com patm
+    # exatamente; tbm varia pouco e as demais não dependem da pressão
+    if nome == 've':
+        return valor * patm / patm_indice
+    if nome == 'ur':
+        return valor * patm_indice / patm
+    return valor
+
+
+def _residuos(nome_a, a, nome_b, b, t, w, patm):
+    # resíduos de A e de B (na coordenada da tabela) em (tbs, rm)
+    return (_propriedade(nome_a, t, w, patm) - a,
+            _coordenada(nome_b, _propriedade(nome_b, t, w, patm)) -
+            _coordenada(nome_b, b))
+
+
+def _passo(nome_a, a, nome_b, b, t, w, patm):
+    # um passo de Newton em (tbs, rm), jacobiano por diferenças finitas
+    ht, hw = 1e-5, 1e-8
+    fa = _propriedade(nome_a, t, w, patm) - a
+    fb = _propriedade(nome_b, t, w, patm) - b
+    j11 = (_propriedade(nome_a, t + ht, w, patm) - a - fa) / ht
+    j21 = (_propriedade(nome_b, t + ht, w, patm) - b - fb) / ht
+    j12 = (_propriedade(nome_a, t, w + hw, patm) - a - fa) / hw
+    j22 = (_propriedade(nome_b, t, w + hw, patm) - b - fb) / hw
+    det = j11 * j22 - j12 * j21
+    return (t - (j22 * fa - j12 * fb) / det,
+            w - (j11 * fb - j21 * fa) / det)
+
+
+@functools.lru_cache(maxsize=32)
+def _indice(patm, tbs_min, tbs_max, rm_min, rm_max, pontos):
+    return IndiceInverso(patm, tbs_min, tbs_max, rm_min, rm_max, pontos)
+
+
+def obter_indice(patm, tbs_min=-20., tbs_max=60., rm_min=1e-5, rm_max=0.05,
+                 pontos=201):
+    # Índice da pressão patm (escalar), reaproveitado entre chamadas
+    return _indice(round(float(patm), 6), tbs_min, tbs_max, rm_min, rm_max,
+                   pontos)
+
+
+@instrumentado
+def pe_par(ctx, nome_a, a, nome_b, b, polir=2, indice=None, resolucao=1.):
+    # Ponto de Estado - f (A, B) para qualquer par suportado (ur em fração,
+    # rm em kg/kg). Com ctx.patm por linha, as linhas são agrupadas por
+    # pressão arredondada a resolucao (kPa) e cada grupo usa um só índice;
+    # os passos de Newton usam a pressão exata de cada linha.
+    dados = {nome_a: np.asarray(a, dtype=float),
+             nome_b: np.asarray(b, dtype=float)}
+    patm = ctx.patm
+    nome_a, a, nome_b, b = _ordenar(nome_a, dados[nome_a], nome_b,
+                                    dados[nome_b], patm)
+    if indice is not None or np.ndim(patm) == 0:
+        if indice is None:
+            indice = obter_indice(patm)
+        tbs, rm = indice.resolver(nome_a, a, nome_b, b, polir)
+    else:
+        a, b, patm_l = np.broadcast_arrays(a, b, patm)
+        forma = a.shape
+        a, b, patm_l = a.ravel(), b.ravel(), patm_l.ravel()
+        tbs, rm = np.empty(a.size), np.empty(a.size)
+        for valor, k in ps.grupos_pressao(patm_l, resolucao):
+            tbs[k], rm[k] = obter_indice(valor).resolver(
+                nome_a, a[k], nome_b, b[k], polir, patm=patm_l[k])
+        tbs, rm = tbs.reshape(forma), rm.reshape(forma)
+    pv = ps.pressao_vapor(rm, patm)
+    pvs = ctx.pvs(tbs)
+    ur = ps.umidade_relativa(pv, pvs)
+    e = ps.entalpia(tbs, rm)
+    ve = ps.volume_especifico(tbs, rm, patm)
+    tpo = ps.temperatura_ponto_orvalho(pv)
+    tbm = ps.temperatura_b_molhado(tbs, e, patm, tabela=ctx.tabela,
+                                   instr=ctx.instr)
+    valores = {'tbs': tbs, 'tbm': tbm, 'tpo': tpo, 'ur': ur, 'rm': rm,
+               'e': e, 've': ve}
+    # as propriedades dadas voltam como entraram (NaN onde não há solução)
+    for nome, valor in dados.items():
+        valores[nome] = np.where(np.isfinite(tbs), valor, np.nan)
+    return ps.PontoEstado(valores['tbs'], valores['tbm'], valores['tpo'],
+                          valores['ur'], valores['rm'], pvs, pv, valores['e'],
+                          valores['ve'], patm)
@@ -0,0 +1,233 @@
+"""
+ Cálculo em lote de pontos de estado a partir de arquivos CSV
+
+ Modo não interativo: lê um CSV (arquivo ou entrada padrão) em blocos de
+ tamanho fixo, calcula todas as propriedades de cada bloco com as funções
+ vetorizadas de psicrometria.py e escreve as linhas de resultado à medida que
+ saem. A memória usada depende só do tamanho do bloco, não do arquivo.
+
+ O cabeçalho do CSV define o par de entrada:
+      tbs,ur      tbs (°C) e umidade relativa (%)
+      tbs,tbm     tbs e temperatura de bulbo molhado (°C)
+      tbs,tpo     tbs e temperatura de ponto de orvalho (°C)
+ e pode trazer, por linha, as colunas altitude (m) e/ou patm (kPa medida);
+ onde faltarem (nan ou campo vazio) ou sem elas vale a altitude/pressão da
+ linha de comando (padrão: nível do mar). A pressão medida tem prioridade
+ sobre a altitude. Campo vazio em tbs ou no par dá uma linha de nan.
+
+ Saída: tbs,tbm,tpo,ur,rm,patm,pvs,pv,e,ve nas unidades de main.py
+ (ur em %, rm em g/kg), ou só as pedidas em --propriedades, ou, com
+ --formato colunar, uma pasta com um .npy por
+ propriedade (colunar.py, unidades da biblioteca). Ao final, linhas por
+ segundo vão para stderr e, com --profile, o relatório da instrumentação
+ (instrumentacao.py) em JSON. Com --propriedades, cada bloco vira um ponto
+ preguiçoso (preguicoso.py) e só se calcula o que a saída usa: sem tbm, o
+ solver de bulbo molhado não roda.
+
+      python main.py --csv leituras.csv --altitude 800 -o resultado.csv
+      cat leituras.csv | python lote.py --csv - > resultado.csv
+      python lote.py --csv leituras.csv --propriedades tbs,e,rm
+"""
+import argparse
+import itertools
+import sys
+import time
+import warnings
+
+import numpy as np
+
+import psicrometria as ps
+from instrumentacao import Instrumentacao
+
+SAIDA = ('tbs', 'tbm', 'tpo', 'ur', 'rm', 'patm', 'pvs', 'pv', 'e', 've')
+FORMATO = ('%.3f', '%.3f', '%.3f', '%.2f', '%.4f', '%.3f', '%.5f', '%.5f',
+           '%.3f', '%.5f')
+FATOR = {'ur': 100., 'rm': 1000.}
+
+
+def _numero(campo):
+    # Campo do CSV: vazio vale nan (como uma coluna faltando na linha)
+    return float(campo) if campo.strip() else np.nan
+
+
+def ler_blocos(arquivo, tamanho_bloco):
+    # Gera (nomes, bloco) com no máximo tamanho_bloco linhas por vez. Campos
+    # vazios viram nan; só os blocos que têm algum passam pelo conversor
+    # (lento) de _numero
+    nomes = [c.strip() for c in arquivo.readline().strip().split(',')]
+    while True:
+        linhas = list(itertools.islice(arquivo, tamanho_bloco))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            try:
+                bloco = np.loadtxt(linhas, delimiter=',', ndmin=2)
+            except ValueError:
+                bloco = np.loadtxt(linhas, delimiter=',', ndmin=2,
+                                   converters=_numero)
+        if bloco.size:
+            yield nomes, bloco
+        if len(linhas) < tamanho_bloco:
+            break
+
+
+def calcular_bloco(nomes, bloco, patm=None, tabela=None, instr=None,
+                   memo=None, precisao='exata', preguicoso=False):
+    # Calcula um bloco e devolve o PontoEstado com arrays; com memo
+    # (memo.MemoEstados) as linhas repetidas saem do cache. precisao
+    # 'rapida' usa rapido.py (float32, fórmulas fechadas). preguicoso: na
+    # precisão exata sem memo, devolve um preguicoso.PontoPreguicoso, que
+    # calcula cada propriedade quando ela é lida
+    col = {nome: bloco[:, i] for i, nome in enumerate(nomes)}
+    if 'patm' in col or 'altitude' in col:
+        patm = ps.pressao_por_linha(col.get('altitude'), col.get('patm'), patm)
+    elif patm is None:
+        patm = ps.pressao_atmosferica(0.)
+    ctx = ps.Contexto(patm, tabela, instr)
+    pares = ps.PARES
+    if precisao == 'rapida':
+        import rapido
+        pares = rapido.PARES
+    elif preguicoso and memo is None:
+        import preguicoso as pg
+        pares = pg.PARES
+    for nome, funcao in pares.items():
+        if nome in col:
+            x = col[nome] / 100. if nome == 'ur' else col[nome]
+            if memo is not None and precisao == 'exata':
+                return memo.calcular(ctx, nome, col['tbs'], x)
+            return funcao(ctx, col['tbs'], x)
+    raise ValueError('o CSV precisa das colunas tbs e ur, tbm ou tpo')
+
+
+def escrever_bloco(saida, ponto, colunas=SAIDA):
+    # Formata o bloco inteiro com uma única operação % (bem mais rápido que
+    # np.savetxt, que formata linha a linha)
+    n = np.size(ponto.tbs)
+    tabela = np.empty((n, len(colunas)))
+    for j, nome in enumerate(colunas):
+        tabela[:, j] = np.broadcast_to(getattr(ponto, nome), (n,)) * \
+            FATOR.get(nome, 1.)
+    linha = ','.join(FORMATO[SAIDA.index(nome)] for nome in colunas) + '\n'
+    saida.write((linha * n) % tuple(tabela.ravel().tolist()))
+
+
+def processar_csv(entrada, saida, tamanho_bloco=100000, patm=None,
+                  tabela=None, instr=None, memo=None, precisao='exata',
+                  colunas=SAIDA):
+    # Processa o CSV inteiro bloco a bloco; devolve (linhas, segundos).
+    # Com instr (instrumentacao.Instrumentacao) cada bloco é um cálculo.
+    # saida: arquivo de texto (CSV) ou colunar.EscritorColunar (que tem as
+    # suas próprias colunas). Com colunas menos que SAIDA os pontos são
+    # preguiçosos: o que não sai não é calculado
+    inicio = time.perf_counter()
+    linhas = 0
+    colunar = hasattr(saida, 'escrever')
+    preguicoso = set(colunas) != set(SAIDA)
+    if not colunar:
+        saida.write(','.join(colunas) + '\n')
+    for nomes, bloco in ler_blocos(entrada, tamanho_bloco):
+        ponto = calcular_bloco(nomes, bloco, patm, tabela, instr, memo,
+                               precisao, preguicoso)
+        if colunar:
+            saida.escrever(ponto)
+        else:
+            escrever_bloco(saida, ponto, colunas)
+        linhas += bloco.shape[0]
+    return linhas, time.perf_counter() - inicio
+
+
+def argumentos(argv=None):
+    parser = argparse.ArgumentParser(
+        description='GRAPSI - pontos de estado em lote a partir de CSV')
+    parser.add_argument('--csv', required=True,
+                        help="arquivo de entrada ('-' para a entrada padrão)")
+    parser.add_argument('-o', '--saida', default='-',
+                        help="arquivo de saída ('-' para a saída padrão) ou "
+                             "pasta, com --formato colunar")
+    parser.add_argument('--formato', choices=('csv', 'colunar'),
+                        default='csv',
+                        help='csv (texto) ou colunar (.npy por propriedade, '
+                             'ver colunar.py)')
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument('--altitude', type=float,
+                       help='altitude (m) quando o CSV não traz a coluna')
+    grupo.add_argument('--patm', type=float,
+                       help='pressão barométrica (kPa) quando o CSV não traz')
+    parser.add_argument('--bloco', type=int, default=100000,
+                        help='linhas por bloco (padrão 100000)')
+    parser.add_argument('--tabela',
+                        help='arquivo .npz da tabela de pvs (modo rápido)')
+    parser.add_argument('--precisao', choices=('exata', 'rapida'),
+                        default='exata',
+                        help='rapida: float32 e fórmulas fechadas (rapido.py, '
+                             'tbm com erro < 0.01 °C)')
+    parser.add_argument('--propriedades',
+                        help='propriedades da saída separadas por vírgula '
+                             '(padrão: todas); as demais não são calculadas')
+    parser.add_argument('--memo',
+                        help='arquivo .npz do cache de pontos repetidos '
+                             '(memo.py), lido e gravado de volta; só na '
+                             'precisão exata')
+    parser.add_argument('--profile', action='store_true',
+                        help='relatório JSON de iterações e tempos no stderr')
+    return parser.parse_args(argv)
+
+
+def principal(argv=None):
+    args = argumentos(argv)
+    colunas = SAIDA
+    if args.propriedades:
+        colunas = tuple(n.strip() for n in args.propriedades.split(','))
+        invalidas = [n for n in colunas if n not in SAIDA]
+        if invalidas:
+            sys.exit('propriedades desconhecidas: {} (use {})'.format(
+                ','.join(invalidas), ','.join(SAIDA)))
+    patm = args.patm
+    if args.altitude is not None:
+        patm = float(ps.pressao_atmosferica(args.altitude))
+    tabela = None
+    if args.tabela:
+        import tabela_pvs
+        tabela = tabela_pvs.obter_tabela(args.tabela)
+    instr = None
+    if args.profile:
+        instr = Instrumentacao()
+    cache = None
+    if args.memo:
+        import memo
+        cache = memo.MemoEstados(arquivo=args.memo)
+    entrada = sys.stdin if args.csv == '-' else open(args.csv)
+    if args.formato == 'colunar':
+        if args.saida == '-':
+            sys.exit('--formato colunar precisa de -o pasta')
+        import colunar
+        saida = colunar.EscritorColunar(
+            args.saida, [n for n in colunas if n != 'patm'],
+            tipo='<f4' if args.precisao == 'rapida' else '<f8')
+    else:
+        saida = sys.stdout if args.saida == '-' else open(args.saida, 'w')
+    try:
+        linhas, segundos = processar_csv(entrada, saida, args.bloco, patm,
+                                         tabela, instr, cache, args.precisao,
+                                         colunas)
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if args.formato == 'colunar':
+            saida.fechar()
+        elif saida is not sys.stdout:
+            saida.close()
+    print('{} linhas em {:.2f} s ({:.0f} linhas/s)'.format(
+        linhas, segundos, linhas / segundos if segundos else 0.),
+        file=sys.stderr)
+    if cache is not None:
+        cache.salvar()
+        print('memo: {taxa_acerto:.1%} de acertos, {taxa_dedup:.1%} de linhas '
+              'repetidas no lote, {entradas} entradas'.format(
+                  **cache.estatisticas()), file=sys.stderr)
+    if instr is not None:
+        print(instr.json(indent=1), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    principal()
@@ -0,0 +1,202 @@
+"""
+ Cache de pontos de estado por entradas quantizadas
+
+ Leituras de sensores se repetem muito (termostatos andam de 0.1 °C e 1%),
+ e cada repetição refaz a iteração de temperatura_b_molhado. Aqui as entradas
+ (patm, tbs e a segunda propriedade) são arredondadas para múltiplos da
+ resolução e viram uma chave inteira; cada lote é deduplicado (únicas ->
+ consulta -> cálculo só das que faltam -> espalha de volta), tudo com arrays.
+
+      import memo
+      cache = memo.MemoEstados(arquivo='memo.npz')   # carrega, se existir
+      p = cache.calcular(ctx, 'ur', tbs, ur)         # como ps.pe_tbs_ur
+      cache.estatisticas()     # consultas, acertos, taxa_acerto, ...
+      cache.salvar()           # grava para a próxima execução
+
+      python main.py --csv leituras.csv --memo memo.npz -o resultado.csv
+
+ O resultado é o do ponto quantizado (tbs, x e patm arredondados), não o da
+ entrada exata: com a resolução padrão (patm 0.001 kPa, temperaturas 0.01 °C,
+ ur 0.0001), mais fina que a dos sensores, leituras repetidas
+ dão sempre o mesmo resultado e a diferença para o cálculo direto fica no
+ nível da própria resolução.
+
+ Em memória, por par de entrada: chaves ordenadas, valores (n, 9) e o
+ instante do último uso de cada chave; passando de 'capacidade' entradas,
+ as usadas há mais tempo saem (LRU). O arquivo (.npz) guarda as tabelas e a
+ resolução; com outra resolução ele é ignorado.
+"""
+import os
+
+import numpy as np
+
+import psicrometria as ps
+
+RESOLUCAO = {'patm': 1e-3, 'tbs': 1e-2, 'ur': 1e-4, 'tbm': 1e-2,
+             'tpo': 1e-2}
+# 21 bits por entrada quantizada: ±2**20 passos
+_BITS = 21
+_META = 1 << (_BITS - 1)
+
+
+class _Tabela:
+    # Entradas de um par: chaves ordenadas, valores e último uso
+    __slots__ = ('chaves', 'valores', 'uso')
+
+    def __init__(self, chaves=None, valores=None, uso=None):
+        self.chaves = np.empty(0, np.int64) if chaves is None else chaves
+        self.valores = np.empty((0, len(ps.PROPRIEDADES))) if valores is None \
+            else valores
+        self.uso = np.zeros(self.chaves.size, np.int64) if uso is None \
+            else uso
+
+    def buscar(self, chaves):
+        # posição de cada chave na tabela, ou -1
+        if not self.chaves.size:
+            return np.full(chaves.shape, -1)
+        pos = np.minimum(np.searchsorted(self.chaves, chaves),
+                         self.chaves.size - 1)
+        return np.where(self.chaves[pos] == chaves, pos, -1)
+
+    def inserir(self, chaves, valores, instante, capacidade):
+        # chaves novas, ordenadas e ausentes da tabela: intercaladas nas
+        # posições de searchsorted, sem reordenar a tabela inteira
+        pos = np.searchsorted(self.chaves, chaves)
+        chaves = np.insert(self.chaves, pos, chaves)
+        valores = np.insert(self.valores, pos, valores, axis=0)
+        uso = np.insert(self.uso, pos, instante)
+        if chaves.size > capacidade:
+            # fica só o que foi usado mais recentemente, na mesma ordem
+            manter = np.zeros(chaves.size, bool)
+            manter[np.argpartition(-uso, capacidade - 1)[:capacidade]] = True
+            chaves, valores, uso = chaves[manter], valores[manter], uso[manter]
+        self.chaves = chaves
+        self.valores = valores
+        self.uso = uso
+
+
+class MemoEstados:
+    # Cache de pontos de estado (tbs, ur|tbm|tpo) por pressão
+    def __init__(self, resolucao=None, capacidade=2000000, arquivo=None):
+        self.resolucao = dict(RESOLUCAO)
+        self.resolucao.update(resolucao or {})
+        self.capacidade = capacidade
+        self.arquivo = arquivo
+        self._tabelas = {par: _Tabela() for par in ps.PARES}
+        self._instante = 0
+        self.consultas = self.acertos = self.unicos = self.calculados = 0
+        if arquivo is not None and os.path.exists(arquivo):
+            self.carregar(arquivo)
+
+    def _quantizar(self, nome, valor):
+        q = np.round(valor / self.resolucao[nome])
+        if np.any(np.abs(q[np.isfinite(q)]) >= _META):
+            raise ValueError('{} fora da faixa da resolução {}'.format(
+                nome, self.resolucao[nome]))
+        return q
+
+    def _chaves(self, par, patm, tbs, x):
+        # chave int64 das entradas quantizadas; NaN fica sem chave (-1)
+        qp = self._quantizar('patm', patm)
+        qt = self._quantizar('tbs', tbs)
+        qx = self._quantizar(par, x)
+        validos = np.isfinite(qp) & np.isfinite(qt) & np.isfinite(qx)
+        qp, qt, qx = (np.where(validos, q, 0.).astype(np.int64) + _META
+                      for q in (qp, qt, qx))
+        chaves = (qp << (2 * _BITS)) | (qt << _BITS) | qx
+        return np.where(validos, chaves, -1), validos
+
+    def _entradas(self, par, chaves):
+        # entradas quantizadas (patm, tbs, x) de volta a partir das chaves
+        mascara = (1 << _BITS) - 1
+        qp = (chaves >> (2 * _BITS)) - _META
+        qt = ((chaves >> _BITS) & mascara) - _META
+        qx = (chaves & mascara) - _META
+        return (qp * self.resolucao['patm'], qt * self.resolucao['tbs'],
+                qx * self.resolucao[par])
+
+    def calcular(self, ctx, par, tbs, x):
+        # Ponto de estado pelo cache: PontoEstado com arrays do formato das
+        # entradas (propriedades dos pontos quantizados)
+        tbs, x, patm = np.broadcast_arrays(np.asarray(tbs, dtype=float),
+                                           np.asarray(x, dtype=float),
+                                           np.asarray(ctx.patm, dtype=float))
+        forma = tbs.shape
+        chaves, validos = self._chaves(par, patm.ravel(), tbs.ravel(),
+                                       x.ravel())
+        unicas, inversa = np.unique(chaves[validos], return_inverse=True)
+        tab = self._tabelas[par]
+        self._instante += 1
+        pos = tab.buscar(unicas)
+        faltam = pos < 0
+        valores = np.empty((unicas.size, len(ps.PROPRIEDADES)))
+        valores[~faltam] = tab.valores[pos[~faltam]]
+        tab.uso[pos[~faltam]] = self._instante
+        if faltam.any():
+            p_q, t_q, x_q = self._entradas(par, unicas[faltam])
+            p = ps.PARES[par](ps.Contexto(p_q, ctx.tabela, ctx.instr), t_q,
+                              x_q)
+            novos = np.column_stack([np.broadcast_to(getattr(p, nome),
+                                                     t_q.shape)
+                                     for nome in ps.PROPRIEDADES])
+            valores[faltam] = novos
+            tab.inserir(unicas[faltam], novos, self._instante,
+                        self.capacidade)
+        n = int(validos.sum())
+        self.consultas += n
+        self.unicos += unicas.size
+        self.calculados += int(faltam.sum())
+        # só a primeira linha de cada chave calculada é falha; as repetições
+        # no mesmo lote saem da deduplicação e contam como acertos
+        self.acertos += n - int(faltam.sum())
+        # espalha de volta para as linhas (NaN nas entradas inválidas)
+        if n == chaves.size:
+            saida = valores[inversa]
+        else:
+            saida = np.full((chaves.size, len(ps.PROPRIEDADES)), np.nan)
+            saida[validos] = valores[inversa]
+        colunas = {nome: saida[:, j].reshape(forma)
+                   for j, nome in enumerate(ps.PROPRIEDADES)}
+        patm_q = np.where(validos, np.round(patm.ravel() /
+                                            self.resolucao['patm']) *
+                          self.resolucao['patm'], np.nan).reshape(forma)
+        return ps.PontoEstado(patm=patm_q, **colunas)
+
+    def estatisticas(self):
+        # Contadores desde a criação: consultas (linhas), acertos (linhas
+        # respondidas pelo cache, incluindo repetições no mesmo lote),
+        # unicos (chaves distintas por lote), calculados e entradas
+        return {'consultas': self.consultas, 'acertos': self.acertos,
+                'unicos': self.unicos, 'calculados': self.calculados,
+                'entradas': sum(t.chaves.size for t in
+                                self._tabelas.values()),
+                'taxa_acerto': self.acertos / self.consultas
+                if self.consultas else 0.,
+                'taxa_dedup': 1. - self.unicos / self.consultas
+                if self.consultas else 0.}
+
+    def salvar(self, arquivo=None):
+        # Grava as tabelas (troca atômica do arquivo)
+        arquivo = arquivo or self.arquivo
+        dados = {'resolucao': np.array([self.resolucao[n] for n in
+                                        sorted(self.resolucao)])}
+        for par, tab in self._tabelas.items():
+            dados[par + '_chaves'] = tab.chaves
+            dados[par + '_valores'] = tab.valores
+        temporario = arquivo + '.tmp.npz'
+        np.savez(temporario, **dados)
+        os.replace(temporario, arquivo)
+
+    def carregar(self, arquivo):
+        # Lê as tabelas gravadas por salvar(); ignora arquivo de outra
+        # resolução. Devolve True se carregou.
+        with np.load(arquivo) as dados:
+            resolucao = np.array([self.resolucao[n] for n in
+                                  sorted(self.resolucao)])
+            if not np.array_equal(dados['resolucao'], resolucao):
+                return False
+            for par in ps.PARES:
+                if par + '_chaves' in dados:
+                    self._tabelas[par] = _Tabela(dados[par + '_chaves'],
+                                                 dados[par + '_valores'])
+        return True
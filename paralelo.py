@@ -0,0 +1,130 @@
+"""
+ Execução paralela (vários núcleos) para lotes muito grandes
+
+ Os arrays de entrada e de saída ficam em memória compartilhada
+ (multiprocessing.shared_memory). O lote é dividido em blocos, cada bloco é
+ calculado por um processo do pool com as funções vetorizadas e o resultado é
+ escrito direto nos arrays de saída compartilhados: nada é serializado na
+ volta, só a descrição da tarefa (nomes dos segmentos e faixa de índices).
+
+      import paralelo
+      r = paralelo.pontos_estado('ur', tbs, ur, patm, trabalhadores=8)
+      r = paralelo.processo('aquece_resfria', patm, trabalhadores=8,
+                            tbs1=tbs1, ur1=ur1, tbs2=tbs2)
+
+ benchmarks/escala_paralela.py mede o ganho de 1 a N núcleos.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import processos
+import psicrometria as ps
+
+
+def _executar_bloco(tarefa):
+    # Executado no trabalhador: calcula as linhas [a, b) e grava na saída.
+    # Os trabalhadores só abrem e fecham os segmentos; quem os remove
+    # (unlink) é o processo principal.
+    funcao, args, entradas, saidas, n, a, b = tarefa
+    abertos = []
+    bloco = resultado = destino = None
+    try:
+        bloco = {}
+        for nome, seg in entradas.items():
+            shm = shared_memory.SharedMemory(name=seg)
+            abertos.append(shm)
+            bloco[nome] = np.ndarray((n,), dtype=float, buffer=shm.buf)[a:b]
+        resultado = funcao(*args, **bloco)
+        for nome, seg in saidas.items():
+            shm = shared_memory.SharedMemory(name=seg)
+            abertos.append(shm)
+            destino = np.ndarray((n,), dtype=float, buffer=shm.buf)
+            destino[a:b] = resultado[nome]
+    finally:
+        # as vistas precisam sumir antes de fechar os segmentos
+        bloco = resultado = destino = None
+        for shm in abertos:
+            shm.close()
+
+
+def mapear(funcao, entradas, nomes_saida=None, args=(), trabalhadores=None,
+           tamanho_bloco=None):
+    # Aplica funcao(*args, **bloco) a blocos dos arrays 1-D de entradas.
+    # funcao deve estar no nível de módulo (para ir ao trabalhador) e devolver
+    # um dicionário nome -> array. Sem nomes_saida, os nomes são descobertos
+    # calculando a primeira linha no processo principal.
+    entradas = {k: np.ravel(np.asarray(v, dtype=float))
+                for k, v in entradas.items()}
+    n = max(v.size for v in entradas.values())
+    entradas = {k: np.broadcast_to(v, (n,)) for k, v in entradas.items()}
+    if nomes_saida is None:
+        nomes_saida = list(funcao(*args, **{k: v[:1]
+                                            for k, v in entradas.items()}))
+    trabalhadores = trabalhadores or os.cpu_count() or 1
+    if tamanho_bloco is None:
+        tamanho_bloco = max(1, min(250000, -(-n // (4 * trabalhadores))))
+    if trabalhadores == 1 or n <= tamanho_bloco:
+        resultado = funcao(*args, **entradas)
+        return {k: np.array(np.broadcast_to(resultado[k], (n,)))
+                for k in nomes_saida}
+    segmentos = []
+    try:
+        seg_entrada = {}
+        for nome, valor in entradas.items():
+            shm = shared_memory.SharedMemory(create=True, size=n * 8)
+            segmentos.append(shm)
+            np.ndarray((n,), dtype=float, buffer=shm.buf)[:] = valor
+            seg_entrada[nome] = shm.name
+        shm_saida = {}
+        for nome in nomes_saida:
+            shm = shared_memory.SharedMemory(create=True, size=n * 8)
+            segmentos.append(shm)
+            shm_saida[nome] = shm
+        seg_saida = {nome: shm.name for nome, shm in shm_saida.items()}
+        tarefas = [(funcao, args, seg_entrada, seg_saida, n, a,
+                    min(a + tamanho_bloco, n))
+                   for a in range(0, n, tamanho_bloco)]
+        with ProcessPoolExecutor(max_workers=trabalhadores) as pool:
+            for _ in pool.map(_executar_bloco, tarefas):
+                pass
+        # cópia única dos segmentos para arrays comuns antes de liberá-los
+        return {nome: np.ndarray((n,), dtype=float, buffer=shm.buf).copy()
+                for nome, shm in shm_saida.items()}
+    finally:
+        for shm in segmentos:
+            shm.close()
+            shm.unlink()
+
+
+def _ponto_bloco(par, tbs, x, patm):
+    p = ps.PARES[par](ps.Contexto(patm), tbs, x)
+    return {nome: getattr(p, nome) for nome in ps.PROPRIEDADES}
+
+
+def pontos_estado(par, tbs, x, patm, trabalhadores=None, tamanho_bloco=None):
+    # Pontos de estado em paralelo; par é 'ur', 'tbm' ou 'tpo' (ur em fração)
+    r = mapear(_ponto_bloco, {'tbs': tbs, 'x': x, 'patm': patm},
+               ps.PROPRIEDADES, (par,), trabalhadores, tamanho_bloco)
+    return ps.PontoEstado(r['tbs'], r['tbm'], r['tpo'], r['ur'], r['rm'],
+                          r['pvs'], r['pv'], r['e'], r['ve'],
+                          np.broadcast_to(np.ravel(patm), r['tbs'].shape))
+
+
+def _processo_bloco(nome, patm, **entradas):
+    res = getattr(processos, nome)(ps.Contexto(patm), **entradas)
+    saida = {}
+    for i, p in enumerate(res.pontos, 1):
+        for prop in ps.PROPRIEDADES:
+            saida['p{}_{}'.format(i, prop)] = getattr(p, prop)
+    return saida
+
+
+def processo(nome, patm, trabalhadores=None, tamanho_bloco=None, **entradas):
+    # Processo vetorizado de processos.py em paralelo; devolve um dicionário
+    # 'p1_tbs', 'p1_tbm', ..., 'p2_tbs', ... com arrays
+    entradas = dict(entradas, patm=patm)
+    return mapear(_processo_bloco, entradas, None, (nome,), trabalhadores,
+                  tamanho_bloco)
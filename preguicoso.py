@@ -0,0 +1,182 @@
+"""
+ Pontos de estado preguiçosos: cada propriedade é calculada no primeiro acesso
+
+ As funções pe_* de psicrometria.py calculam as dez propriedades de uma vez,
+ inclusive a iteração de temperatura_b_molhado, mesmo quando o trabalho só
+ usa entalpia e razão de mistura. Aqui o ponto guarda as entradas e monta
+ cada propriedade quando ela é lida, seguindo as dependências
+
+      pvs -> pv -> rm -> e, ve        tpo e ur a partir de pv (e pvs)
+      tbm (solver) só quando pedida
+
+ Cada valor intermediário fica guardado no próprio objeto: ler e e depois ve
+ calcula pvs, pv e rm uma vez só. Escalares usam o módulo math (escalar.py,
+ sem importar o NumPy), arrays usam psicrometria.py; os valores são os
+ mesmos das funções pe_* correspondentes.
+
+      import preguicoso
+      p = preguicoso.pe_tbs_ur(ctx, tbs, ur)    # nada calculado ainda
+      p.e, p.rm                # pvs, pv, rm, e; sem o solver de tbm
+      p.calculadas()           # ('ur', 'rm', 'pvs', 'pv', 'e')
+      p.ponto()                # PontoEstado completo (calcula o que falta)
+
+      python main.py --csv leituras.csv --propriedades tbs,e,rm -o saida.csv
+
+ Com instrumentação no Contexto, cada acesso que calcula uma propriedade
+ vira um cálculo 'preguicoso.<propriedade>' no relatório, com as avaliações
+ de pvs e as iterações do solver de tbm das dependências calculadas junto.
+ Os pontos contam uma vez por acesso. O solver escalar (escalar.py, sem
+ tabela de pvs) não reporta iterações, só o tempo total do acesso.
+"""
+import escalar
+import formulas as f
+from estado import PROPRIEDADES, PontoEstado
+
+
+def _b_molhado(p):
+    # solver de tbm: escalar.py para floats; psicrometria.py para arrays ou
+    # com tabela de pvs
+    if p.m is f.MATH and p.ctx.tabela is None:
+        return escalar.temperatura_b_molhado(p.tbs, p.e, p.patm)
+    import psicrometria as ps
+    tbm = ps.temperatura_b_molhado(p.tbs, p.e, p.patm, tabela=p.ctx.tabela,
+                                   instr=p.ctx.instr)
+    return float(tbm) if p.m is f.MATH else tbm
+
+
+def _b_molhado_tpo(p):
+    # par (tbs, tpo): ar saturado (tpo = tbs) tem tbm = tbs. No escalar o
+    # solver nem roda; nos arrays roda e é descartado nesses elementos
+    if p.m is f.MATH:
+        return p.tbs if p.tbs == p.tpo else _b_molhado(p)
+    return p.m.where(p.tbs == p.tpo, p.tbs, _b_molhado(p))
+
+
+def _juntas(nomes, nome, regra):
+    # regra que calcula várias propriedades de uma vez (casos especiais dos
+    # pares em formulas.py): guarda todas e devolve a pedida
+    def calcular(p):
+        p._valores.update(zip(nomes, regra(p)))
+        return p._valores[nome]
+    return calcular
+
+
+# regra de cada propriedade: função do ponto, que lê as dependências como
+# atributos (e assim as calcula, se ainda não estiverem prontas)
+_COMUNS = {
+    'pvs': lambda p: p.ctx.pvs(p.tbs),
+    'rm': lambda p: f.razao_mistura1(p.pv, p.patm),
+    'e': lambda p: f.entalpia(p.tbs, p.rm),
+    've': lambda p: f.volume_especifico(p.tbs, p.rm, p.patm),
+    'tpo': lambda p: f.temperatura_ponto_orvalho(p.m, p.pv),
+    'ur': lambda p: f.umidade_relativa(p.pv, p.pvs),
+    'tbm': _b_molhado,
+}
+REGRAS = {
+    'ur': dict(_COMUNS, pv=lambda p: p.ur * p.pvs),
+    'tbm': dict(_COMUNS, **{nome: _juntas(
+        ('rm', 'pv', 'ur', 'tpo'), nome,
+        lambda p: f.estado_tbs_tbm(p.m, p.tbs, p.tbm, p.pvs,
+                                   p.ctx.pvs(p.tbm), p.patm))
+        for nome in ('rm', 'pv', 'ur', 'tpo')}),
+    'tpo': dict(_COMUNS, **{nome: _juntas(
+        ('pv', 'rm', 'ur'), nome,
+        lambda p: f.estado_tbs_tpo(p.m, p.tbs, p.tpo, p.pvs,
+                                   p.ctx.pvs(p.tpo), p.patm))
+        for nome in ('pv', 'rm', 'ur')},
+        tbm=_b_molhado_tpo),
+}
+
+
+class PontoPreguicoso:
+    # Ponto de estado (tbs, x) com x a propriedade do par ('ur', 'tbm' ou
+    # 'tpo'); as demais propriedades são lidas como em PontoEstado e
+    # calculadas no primeiro acesso
+    __slots__ = ('ctx', 'par', 'm', '_valores')
+
+    def __init__(self, ctx, par, tbs, x):
+        if par not in REGRAS:
+            raise ValueError("par deve ser 'ur', 'tbm' ou 'tpo'")
+        escalares = all(isinstance(v, (int, float))
+                        for v in (tbs, x, ctx.patm))
+        m = f.MATH if escalares else f.numpy()
+        if escalares:
+            tbs, x = float(tbs), float(x)
+        else:
+            tbs, x = m.broadcast_arrays(m.asarray(tbs, dtype=float),
+                                        m.asarray(x, dtype=float))
+        if par == 'ur':
+            x = f.limitar_ur(m, x)
+        self.ctx = ctx
+        self.par = par
+        self.m = m
+        self._valores = {'tbs': tbs, par: x, 'patm': ctx.patm, 'q': None}
+
+    def __getattr__(self, nome):
+        # só chega aqui o que não é atributo do objeto: as propriedades.
+        # Nomes com '_' (slots ainda vazios, __setstate__ e afins procurados
+        # por copy e pickle) não são propriedades
+        if nome.startswith('_'):
+            raise AttributeError(nome)
+        valores = self._valores
+        if nome not in valores:
+            regra = REGRAS[self.par].get(nome)
+            if regra is None:
+                raise AttributeError(nome)
+            instr = self.ctx.instr
+            if instr is None or not instr.iniciar('preguicoso.' + nome):
+                valores[nome] = regra(self)
+            else:
+                # cada acesso que calcula algo é um cálculo no relatório; as
+                # dependências lidas pela regra somam nele
+                try:
+                    valores[nome] = regra(self)
+                finally:
+                    instr.terminar(1 if self.m is f.MATH else
+                                   int(valores['tbs'].size))
+        return valores[nome]
+
+    def __getstate__(self):
+        # valores já calculados vão junto; o backend vai como indicador (o
+        # módulo numpy não é serializável) e o resto segue preguiçoso
+        return self.ctx, self.par, self.m is f.MATH, dict(self._valores)
+
+    def __setstate__(self, estado):
+        self.ctx, self.par, escalares, valores = estado
+        self.m = f.MATH if escalares else f.numpy()
+        self._valores = valores
+
+    def calculadas(self):
+        # propriedades já disponíveis, além de tbs (entradas incluídas)
+        return tuple(nome for nome in PROPRIEDADES[1:]
+                     if nome in self._valores)
+
+    def ponto(self):
+        # PontoEstado com todas as propriedades
+        return PontoEstado(*(getattr(self, nome) for nome in PROPRIEDADES),
+                           patm=self.patm)
+
+    def como_dict(self):
+        return self.ponto().como_dict()
+
+    def __repr__(self):
+        return 'PontoPreguicoso(par={!r}, calculadas={!r})'.format(
+            self.par, self.calculadas())
+
+
+def pe_tbs_ur(ctx, tbs, ur):
+    # Ponto de Estado  f (tbs, ur) - ur em fração
+    return PontoPreguicoso(ctx, 'ur', tbs, ur)
+
+
+def pe_tbs_tbm(ctx, tbs, tbm):
+    # Ponto de Estado -   f (tbs, tbm)
+    return PontoPreguicoso(ctx, 'tbm', tbs, tbm)
+
+
+def pe_tbs_tpo(ctx, tbs, tpo):
+    # Ponto de Estado -   f (tbs, tpo)
+    return PontoPreguicoso(ctx, 'tpo', tbs, tpo)
+
+
+PARES = {'ur': pe_tbs_ur, 'tbm': pe_tbs_tbm, 'tpo': pe_tbs_tpo}
@@ -0,0 +1,470 @@
+"""
+ Processos psicrométricos sem variáveis globais
+
+ Versão de biblioteca dos processos de main.py. A pressão barométrica chega
+ num Contexto e os pontos de estado voltam num ResultadoProcesso, de modo que
+ vários cálculos (altitudes diferentes, threads, tarefas asyncio) podem rodar
+ ao mesmo tempo no mesmo processo.
+
+      1. aquecimento/resfriamento
+      2. umidificação adiabática: dado temperatura final
+      3. umidificação adiabática: dado umidade relativa final
+      4. umidificação adiabática: dado razão de mistura final
+      5. mistura de dois fluxos de ar (mistura_n_fluxos: N fluxos)
+      6. serpentina de resfriamento: dado ponto de orvalho do aparelho (ADP)
+         e fator de bypass
+      7. serpentina de resfriamento: dado o ar na saída (calcula ADP e
+         fator de bypass)
+
+ Unidades como em psicrometria.py: ur em fração, rm em kg/kg, q em m3/h.
+ Os processos 1 a 4 aceitam arrays (com broadcast) em todas as entradas;
+ pontos de saída inalcançáveis (supersaturados) ficam com NaN e o
+ ResultadoProcesso traz um aviso. As serpentinas (6 e 7) também aceitam
+ arrays com qualquer formato (serpentinas x instantes, por exemplo) e
+ devolvem um ResultadoSerpentina, com o condensado e as parcelas sensível e
+ latente do calor retirado.
+
+ Nos processos com entrada (tbs1, ur1) ou (tbs1, rm1), tbs1 pode ser um
+ PontoEstado já calculado, como a saída de outro processo (cadeia.py): ele é
+ usado como ponto 1, sem recalcular tbm, e ur1 (rm1) é ignorado.
+"""
+import copy
+
+import numpy as np
+
+import psicrometria as ps
+from instrumentacao import instrumentado
+from psicrometria import PontoEstado
+
+
+class ResultadoProcesso:
+    # Pontos de estado de um processo (entrada(s) e saída), aviso opcional e,
+    # na mistura, a água líquida em suspensão (neblina, kg/kg de ar seco)
+    __slots__ = ('pontos', 'aviso', 'neblina')
+
+    def __init__(self, pontos, aviso=None, neblina=None):
+        self.pontos = tuple(pontos)
+        self.aviso = aviso
+        self.neblina = neblina
+
+    def __repr__(self):
+        return 'ResultadoProcesso(pontos={!r}, aviso={!r}, neblina={!r})'\
+            .format(self.pontos, self.aviso, self.neblina)
+
+
+class ResultadoSerpentina(ResultadoProcesso):
+    # Resultado das serpentinas (processos 6 e 7): pontos (entrada, saída),
+    # aviso e, elemento a elemento,
+    #   adp         temperatura do ponto de orvalho do aparelho (°C)
+    #   fb          fator de bypass
+    #   condensado  água retirada do ar
+    #   sensivel    calor sensível retirado do ar
+    #   latente     calor latente retirado do ar (sensivel + latente = e1 - e2)
+    #   total       calor retirado pela serpentina (descontada a entalpia do
+    #               condensado, que sai na temperatura do ADP)
+    #   fcs         fator de calor sensível, sensivel / (sensivel + latente)
+    # Sem vazão, por kg de ar seco (kg/kg e kJ/kg); com q (m3/h na entrada),
+    # em kg/h e kW.
+    __slots__ = ('adp', 'fb', 'condensado', 'sensivel', 'latente', 'total',
+                 'fcs')
+
+    def __init__(self, pontos, aviso, adp, fb, condensado, sensivel,
+                 latente, total, fcs):
+        ResultadoProcesso.__init__(self, pontos, aviso)
+        self.adp = adp
+        self.fb = fb
+        self.condensado = condensado
+        self.sensivel = sensivel
+        self.latente = latente
+        self.total = total
+        self.fcs = fcs
+
+    def __repr__(self):
+        campos = ', '.join('{}={!r}'.format(nome, getattr(self, nome))
+                           for nome in ('pontos', 'aviso') + self.__slots__)
+        return 'ResultadoSerpentina({})'.format(campos)
+
+
+def _entrada(ctx, tbs1, ur1):
+    # Ponto de estado 1: cópia rasa de tbs1 se já for um PontoEstado (os
+    # processos podem definir q nele), senão pe_tbs_ur
+    if isinstance(tbs1, PontoEstado):
+        return copy.copy(tbs1)
+    return ps.pe_tbs_ur(ctx, tbs1, ur1)
+
+
+@instrumentado
+def aquece_resfria(ctx, tbs1, ur1, tbs2):
+    # Processo 1 - Aquecimento ou resfriamento
+    patm = ctx.patm
+    p1 = _entrada(ctx, tbs1, ur1)
+    tbs2 = np.asarray(tbs2, dtype=float)
+    pvs2 = ctx.pvs(tbs2)
+    rm_sat2 = ps.razao_mistura1(pvs2, patm)
+    # enquanto rm1 cabe no ar saturado em tbs2 (acima do ponto de orvalho,
+    # e sempre no aquecimento) a razão de mistura se mantém exatamente;
+    # senão o ar sai saturado em tbs2. A comparação é em rm, pela mesma pvs
+    # do ponto 1, e não com o tpo do ajuste
+    seco = p1.rm <= rm_sat2
+    ur2 = np.where(seco, p1.pv / pvs2, 1.)
+    pv2 = np.where(seco, p1.pv, pvs2)
+    rm2 = np.where(seco, p1.rm, rm_sat2)
+    tpo2 = np.where(seco, p1.tpo, tbs2)
+    e2 = ps.entalpia(tbs2, rm2)
+    tbm2 = np.where(seco, ps.temperatura_b_molhado(tbs2, e2, patm,
+                                                   tabela=ctx.tabela,
+                                                   instr=ctx.instr), tbs2)
+    ve2 = ps.volume_especifico(tbs2, rm2, patm)
+    p2 = PontoEstado(tbs2, tbm2, tpo2, ur2, rm2, pvs2, pv2, e2, ve2, patm)
+    return ResultadoProcesso((p1, p2))
+
+
+def _ponto_isentalpico(ctx, tbs2, rm2, e, tbm):
+    # Ponto de estado 2 sobre a linha de entalpia constante do ponto 1; linhas
+    # supersaturadas (ur2 > 1) não são alcançáveis e ficam com NaN
+    patm = ctx.patm
+    pvs2 = ctx.pvs(tbs2)
+    pv2 = ps.pressao_vapor(rm2, patm)
+    ur2 = pv2 / pvs2
+    invalido = ~(ur2 <= 1. + 1e-9) | (rm2 < 0)
+    aviso = None
+    if np.any(invalido):
+        aviso = 'Ponto 2 fora da região não saturada (ur > 100% ou rm < 0)'
+    nan = np.where(invalido, np.nan, 1.)
+    tbs2, rm2, pvs2, pv2 = tbs2 * nan, rm2 * nan, pvs2 * nan, pv2 * nan
+    ur2 = np.minimum(ur2, 1.) * nan
+    tpo2 = ps.temperatura_ponto_orvalho(pv2)
+    ve2 = ps.volume_especifico(tbs2, rm2, patm)
+    p2 = PontoEstado(tbs2, tbm * nan, tpo2, ur2, rm2, pvs2, pv2, e * nan, ve2,
+                     patm)
+    return p2, aviso
+
+
+@instrumentado
+def u_adiabatica_tbs(ctx, tbs1, ur1, tbs2):
+    # Processo 2
+    # Umidificação adiabática - f(tbs1, ur1, tbs2)
+    # Na entalpia constante e1 a razão de mistura em tbs2 é a raiz exata de
+    # temperatura_b_seco(e1, rm2) = tbs2, linear em rm2
+    p1 = _entrada(ctx, tbs1, ur1)
+    tbs2 = np.asarray(tbs2, dtype=float)
+    rm2 = (p1.e - 1.006 * tbs2) / (2501. + 1.775 * tbs2)
+    p2, aviso = _ponto_isentalpico(ctx, tbs2, rm2, p1.e, p1.tbm)
+    return ResultadoProcesso((p1, p2), aviso)
+
+
+@instrumentado
+def u_adiabatica_ur(ctx, tbs1, ur1, ur2, tol=1e-4, max_iter=30):
+    # Processo 3
+    # Umidificação adiabática - f(tbs1, ur1, ur2)
+    # tbs2 é a raiz de ln ur(t) - ln ur2 na linha de entalpia e1, com
+    # ur(t) decrescente entre tbm1 (ur = 1) e tbs1 (ur = ur1): Newton
+    # protegido por esse intervalo, até |passo| < tol (°C)
+    patm = ctx.patm
+    p1 = _entrada(ctx, tbs1, ur1)
+    e, tbm, ur2 = np.broadcast_arrays(p1.e, p1.tbm,
+                                      np.asarray(ur2, dtype=float))
+    forma = e.shape
+    e, tbm, ur2 = e.ravel(), tbm.ravel(), ur2.ravel()
+    tbs1 = np.broadcast_to(p1.tbs, forma).ravel()
+    patm_f = np.broadcast_to(patm, forma).ravel()
+    pvs_d = ps.pvs_e_derivada if ctx.tabela is None else \
+        ctx.tabela.pvs_e_derivada
+    if ctx.instr is not None:
+        pvs_d = ctx.instr.contar_pvs(pvs_d)
+    ln_ur2 = np.log(ur2)
+
+    def g_dg(t, idx):
+        den = 2501. + 1.775 * t
+        w = (e[idx] - 1.006 * t) / den
+        dw = -(1.006 * den + 1.775 * (e[idx] - 1.006 * t)) / den ** 2
+        pvs, dpvs = pvs_d(t)
+        ur = patm_f[idx] * w / ((ps.EPS + w) * pvs)
+        g = np.log(ur) - ln_ur2[idx]
+        dg = dw * ps.EPS / (w * (ps.EPS + w)) - dpvs / pvs
+        return g, dg
+
+    ur1 = np.broadcast_to(p1.ur, forma).ravel()
+    t0 = tbm + (tbs1 - tbm) * (1. - ur2) / np.maximum(1. - ur1, 1e-9)
+    t0 = np.clip(t0, tbm, tbs1)
+    tbs2 = ps.newton_protegido(g_dg, t0, tbm, tbs1, tol, max_iter,
+                               crescente=False, instr=ctx.instr,
+                               nome='u_adiabatica_ur').reshape(forma)
+    rm2 = (p1.e - 1.006 * tbs2) / (2501. + 1.775 * tbs2)
+    # só umidifica até a saturação: ur2 fora de [ur1, 1] não é alcançável
+    ur2 = ur2.reshape(forma)
+    rm2 = np.where((ur2 < p1.ur) | (ur2 > 1.), np.nan, rm2)
+    p2, aviso = _ponto_isentalpico(ctx, tbs2, rm2, p1.e, p1.tbm)
+    return ResultadoProcesso((p1, p2), aviso)
+
+
+def _ponto_tbs_rm1(ctx, tbs1, rm1):
+    # Ponto de Estado 1 do processo 4; rm1 acima da saturação vira NaN
+    patm = ctx.patm
+    tbs1, rm1 = np.broadcast_arrays(np.asarray(tbs1, dtype=float),
+                                    np.asarray(rm1, dtype=float))
+    pvs = ctx.pvs(tbs1)
+    pv = ps.pressao_vapor(rm1, patm)
+    ur = pv / pvs
+    aviso = None
+    if np.any(ur > 1.):
+        aviso = 'O valor da razão de mistura do ponto 1 é muito alto'
+        rm1 = np.where(ur > 1., np.nan, rm1)
+        pv = ps.pressao_vapor(rm1, patm)
+        ur = pv / pvs
+    e = ps.entalpia(tbs1, rm1)
+    ve = ps.volume_especifico(tbs1, rm1, patm)
+    tpo = ps.temperatura_ponto_orvalho(pv)
+    tbm = ps.temperatura_b_molhado(tbs1, e, patm, tabela=ctx.tabela,
+                                   instr=ctx.instr)
+    return PontoEstado(tbs1, tbm, tpo, ur, rm1, pvs, pv, e, ve, patm), aviso
+
+
+@instrumentado
+def u_adiabatica_rm(ctx, tbs1, rm1, rm2):
+    # Processo 4
+    # Umidificação adiabática -  f (tbs1, rm1, rm2).
+    # tbs2 = temperatura_b_seco(e1, rm2), exata
+    aviso = None
+    if isinstance(tbs1, PontoEstado):
+        p1 = _entrada(ctx, tbs1, None)
+    else:
+        p1, aviso = _ponto_tbs_rm1(ctx, tbs1, rm1)
+    # Ponto de Estado 2
+    tbs2, rm2 = np.broadcast_arrays(ps.temperatura_b_seco(p1.e, rm2), rm2)
+    p2, aviso2 = _ponto_isentalpico(ctx, tbs2, rm2, p1.e, p1.tbm)
+    return ResultadoProcesso((p1, p2), aviso or aviso2)
+
+
+def _juntar(p1, p2):
+    # PontoEstado com os dois fluxos no último eixo (inverso de _fluxo)
+    nomes = ps.PROPRIEDADES + ('patm',)
+    valores = np.broadcast_arrays(*[np.asarray(getattr(p, nome), dtype=float)
+                                    for p in (p1, p2) for nome in nomes])
+    n = len(nomes)
+    return PontoEstado(*(np.stack((a, b), axis=-1) for a, b in
+                         zip(valores[:n], valores[n:])))
+
+
+def _fluxo(p, i):
+    # PontoEstado do i-ésimo fluxo (último eixo) de um PontoEstado com arrays
+    valores = [getattr(p, nome) for nome in p.__slots__]
+    forma = np.broadcast_shapes(*(np.shape(v) for v in valores
+                                  if v is not None))
+    valores = [None if v is None else np.broadcast_to(v, forma)[..., i]
+               for v in valores]
+    return PontoEstado(*valores)
+
+
+@instrumentado
+def mistura_n_fluxos(ctx, tbs, ur, q, tol=1e-4, max_iter=30):
+    # Processo 5 generalizado
+    # Mistura adiabática de N fluxos de ar: tbs, ur e q (m3/h) com forma
+    # (..., N), um conjunto de N fluxos por unidade; ctx.patm escalar ou com
+    # forma (...). Devolve ResultadoProcesso((entradas, mistura)): entradas
+    # com arrays (..., N) e mistura com arrays (...).
+    # Se a mistura cai acima da saturação (neblina), a saída é o ar saturado
+    # com a mesma entalpia, achado por Newton protegido entre a tbs média e
+    # e/1.006, e o excesso de água fica em ResultadoProcesso.neblina (kg/kg).
+    patm = np.asarray(ctx.patm, dtype=float)
+    tbs, ur, q = np.broadcast_arrays(np.asarray(tbs, dtype=float),
+                                     np.asarray(ur, dtype=float),
+                                     np.asarray(q, dtype=float))
+    entradas = ps.pe_tbs_ur(ps.Contexto(patm[..., None], ctx.tabela,
+                                        ctx.instr), tbs, ur)
+    return _misturar(ctx, entradas, q, tol, max_iter)
+
+
+def _misturar(ctx, entradas, q, tol=1e-4, max_iter=30):
+    # Mistura dos fluxos de entradas (PontoEstado com arrays (..., N)) com
+    # vazões q (m3/h, (..., N)); ver mistura_n_fluxos
+    patm = np.asarray(ctx.patm, dtype=float)
+    q = np.broadcast_to(q, np.broadcast(entradas.tbs, q).shape)
+    entradas.q = q
+    # médias ponderadas pela vazão mássica de ar seco
+    m = q / entradas.ve
+    m_total = m.sum(axis=-1)
+    tbs3 = (m * entradas.tbs).sum(axis=-1) / m_total
+    rm3 = (m * entradas.rm).sum(axis=-1) / m_total
+    e3 = (m * entradas.e).sum(axis=-1) / m_total
+    forma = np.shape(tbs3)
+    # cálculo sobre vetores 1-D (cópias), de volta à forma (...) no final
+    tbs3, rm3, e3 = (np.array(v, dtype=float).reshape(-1)
+                     for v in (tbs3, rm3, e3))
+    patm3 = np.broadcast_to(patm, forma).reshape(-1)
+    pvs3 = ctx.pvs(tbs3)
+    neblina = rm3 > ps.razao_mistura1(pvs3, patm3)
+    agua = np.zeros(tbs3.shape)
+    tbm3 = np.empty(tbs3.shape)
+    aviso = None
+    if np.any(neblina):
+        aviso = 'Atenção! Formação de Neblina'
+        k = np.flatnonzero(neblina)
+        t_sat = ps.temperatura_saturacao(e3[k], patm3[k], tbs3[k], tbs3[k],
+                                         e3[k] / 1.006, tol, max_iter,
+                                         ctx.tabela, ctx.instr, 'neblina')
+        rm_sat = ps.razao_mistura1(ctx.pvs(t_sat), patm3[k])
+        agua[k] = rm3[k] - rm_sat
+        tbs3[k] = t_sat
+        rm3[k] = rm_sat
+        tbm3[k] = t_sat
+        pvs3 = ctx.pvs(tbs3)
+    pv3 = np.where(neblina, pvs3, ps.pressao_vapor(rm3, patm3))
+    ur3 = pv3 / pvs3
+    tpo3 = np.where(neblina, tbs3, ps.temperatura_ponto_orvalho(pv3))
+    seco = np.flatnonzero(~neblina)
+    tbm3[seco] = ps.temperatura_b_molhado(tbs3[seco], e3[seco], patm3[seco],
+                                          tol, max_iter, ctx.tabela,
+                                          ctx.instr)
+    ve3 = ps.volume_especifico(tbs3, rm3, patm3)
+    q3 = m_total * ve3.reshape(forma)
+    tbs3, tbm3, tpo3, ur3, rm3, pvs3, pv3, e3, ve3, patm3, agua = (
+        v.reshape(forma) for v in (tbs3, tbm3, tpo3, ur3, rm3, pvs3, pv3, e3,
+                                   ve3, patm3, agua))
+    mistura = PontoEstado(tbs3, tbm3, tpo3, ur3, rm3, pvs3, pv3, e3, ve3,
+                          patm3, q3)
+    return ResultadoProcesso((entradas, mistura), aviso, agua)
+
+
+@instrumentado
+def mistura_fluxos(ctx, tbs1, ur1, q1, tbs2, ur2, q2):
+    # Processo 5
+    # Mistura de dois fluxos de ar - vazões q1 e q2 em m3/h
+    q = np.stack(np.broadcast_arrays(q1, q2), axis=-1)
+    if isinstance(tbs1, PontoEstado):
+        # fluxo 1 já calculado: só o fluxo 2 passa por pe_tbs_ur
+        res = _misturar(ctx, _juntar(tbs1, ps.pe_tbs_ur(ctx, tbs2, ur2)), q)
+    else:
+        tbs = np.stack(np.broadcast_arrays(tbs1, tbs2), axis=-1)
+        ur = np.stack(np.broadcast_arrays(ur1, ur2), axis=-1)
+        res = mistura_n_fluxos(ctx, tbs, ur, q)
+    entradas, mistura = res.pontos
+    return ResultadoProcesso((_fluxo(entradas, 0), _fluxo(entradas, 1),
+                              mistura), res.aviso, res.neblina)
+
+
+def _ponto_tbs_rm(ctx, tbs, rm):
+    # Ponto de estado dado tbs e rm (sem verificar a saturação)
+    patm = ctx.patm
+    tbs, rm = np.broadcast_arrays(np.asarray(tbs, dtype=float),
+                                  np.asarray(rm, dtype=float))
+    pvs = ctx.pvs(tbs)
+    pv = ps.pressao_vapor(rm, patm)
+    e = ps.entalpia(tbs, rm)
+    tpo = ps.temperatura_ponto_orvalho(pv)
+    tbm = ps.temperatura_b_molhado(tbs, e, patm, tabela=ctx.tabela,
+                                   instr=ctx.instr)
+    ve = ps.volume_especifico(tbs, rm, patm)
+    return PontoEstado(tbs, tbm, tpo, pv / pvs, rm, pvs, pv, e, ve, patm)
+
+
+def _serpentina(p1, p2, adp, fb, q, aviso):
+    # Condensado e calor sensível/latente entre p1 e p2; o sensível vai até
+    # tbs2 com a umidade da entrada, o latente tira a água nessa temperatura
+    condensado = p1.rm - p2.rm
+    e_sensivel = ps.entalpia(p2.tbs, p1.rm)
+    sensivel = p1.e - e_sensivel
+    latente = e_sensivel - p2.e
+    total = p1.e - p2.e - condensado * 4.186 * adp
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fcs = sensivel / (sensivel + latente)
+    if q is not None:
+        m = np.asarray(q, dtype=float) / p1.ve
+        p1.q = np.broadcast_to(q, np.shape(m))
+        p2.q = m * p2.ve
+        condensado = m * condensado
+        sensivel, latente, total = (m * x / 3600. for x in
+                                    (sensivel, latente, total))
+    return ResultadoSerpentina((p1, p2), aviso, adp, fb, condensado,
+                               sensivel, latente, total, fcs)
+
+
+@instrumentado
+def serpentina_adp(ctx, tbs1, ur1, adp, fb, q=None):
+    # Processo 6
+    # Serpentina de resfriamento - f(tbs1, ur1, adp, fb)
+    # O ar sai na reta entre a entrada e o ponto de orvalho do aparelho
+    # (adp, saturado): tbs2 = adp + fb (tbs1 - adp), e o mesmo para rm,
+    # linear nos dois. Com adp acima do ponto de orvalho da entrada a
+    # serpentina fica seca e rm não muda; com fb = 1 todo o ar passa sem
+    # tocar a serpentina. q: vazão (m3/h) na entrada.
+    p1 = _entrada(ctx, tbs1, ur1)
+    adp, fb = np.broadcast_arrays(np.asarray(adp, dtype=float),
+                                  np.asarray(fb, dtype=float))
+    pvs_d = ps.pvs_e_derivada if ctx.tabela is None else \
+        ctx.tabela.pvs_e_derivada
+    if ctx.instr is not None:
+        pvs_d = ctx.instr.contar_pvs(pvs_d)
+    pvs_adp, dpvs_adp = pvs_d(adp)
+    rm_adp = ps.razao_mistura1(pvs_adp, ctx.patm)
+    invalido = ~((adp < p1.tbs) & (fb >= 0.) & (fb <= 1.))
+    # reta entrada-ADP mais inclinada que a curva de saturação no ADP: o
+    # trecho perto do ADP passa pela região supersaturada
+    inclinacao = (p1.rm - rm_adp) / (p1.tbs - adp)
+    curva = ps.EPS * ctx.patm * dpvs_adp / (ctx.patm - pvs_adp) ** 2
+    avisos = []
+    if np.any(invalido):
+        avisos.append('Serpentina inválida (adp >= tbs1 ou fb fora de '
+                      '[0, 1])')
+    if np.any(~invalido & (p1.rm > rm_adp) & (inclinacao > curva)):
+        avisos.append('A reta entrada-ADP cruza a curva de saturação '
+                      '(neblina)')
+    aviso = '; '.join(avisos) or None
+    nan = np.where(invalido, np.nan, 1.)
+    tbs2 = (adp + fb * (p1.tbs - adp)) * nan
+    rm2 = np.minimum(p1.rm, rm_adp + fb * (p1.rm - rm_adp)) * nan
+    p2 = _ponto_tbs_rm(ctx, tbs2, rm2)
+    return _serpentina(p1, p2, adp * nan, fb * nan, q, aviso)
+
+
+@instrumentado
+def serpentina_saida(ctx, tbs1, ur1, tbs2, ur2, q=None, tol=1e-4,
+                     max_iter=30):
+    # Processo 7
+    # Serpentina de resfriamento - f(tbs1, ur1, tbs2, ur2)
+    # O ADP é onde a reta que passa pela entrada e pela saída (no plano
+    # tbs x rm) cruza a curva de saturação, abaixo do ponto de orvalho da
+    # saída: raiz de g(t) = rm_sat(t) - rm2 - inclinação (t - tbs2), convexa,
+    # por Newton protegido a partir de tpo2. fb = (tbs2 - adp) / (tbs1 - adp).
+    # Saídas que não resfriam ou não secam o ar, e retas que não cruzam a
+    # saturação, ficam com adp e fb NaN e aviso.
+    p1 = _entrada(ctx, tbs1, ur1)
+    p2 = ps.pe_tbs_ur(ctx, tbs2, ur2)
+    forma = np.broadcast(p1.tbs, p2.tbs, np.asarray(ctx.patm)).shape
+    t1, w1, t2, w2, tpo2, patm = (
+        np.broadcast_to(v, forma).ravel() for v in
+        (p1.tbs, p1.rm, p2.tbs, p2.rm, p2.tpo, np.asarray(ctx.patm)))
+    valido = (t2 < t1) & (w2 <= w1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        inclinacao = np.where(valido, (w1 - w2) / (t1 - t2), np.nan)
+    pvs_d = ps.pvs_e_derivada if ctx.tabela is None else \
+        ctx.tabela.pvs_e_derivada
+    if ctx.instr is not None:
+        pvs_d = ctx.instr.contar_pvs(pvs_d)
+
+    def g_dg(t, idx):
+        p = patm[idx]
+        pvs, dpvs = pvs_d(t)
+        g = ps.razao_mistura1(pvs, p) - w2[idx] - inclinacao[idx] * \
+            (t - t2[idx])
+        dg = ps.EPS * p * dpvs / (p - pvs) ** 2 - inclinacao[idx]
+        return g, dg
+
+    t0 = np.where(valido, tpo2, np.nan)
+    adp = ps.newton_protegido(g_dg, t0, np.full(t0.shape, -100.), t0.copy(),
+                              tol, max_iter, instr=ctx.instr,
+                              nome='serpentina')
+    # sem raiz (a reta passa acima da curva de saturação) o solver para no
+    # limite inferior com resíduo grande
+    ok = np.flatnonzero(np.isfinite(adp))
+    residuo = np.full(adp.shape, np.inf)
+    residuo[ok] = np.abs(g_dg(adp[ok], ok)[0])
+    adp = np.where(residuo < 1e-6, adp, np.nan)
+    aviso = None
+    if np.any(np.isnan(adp)):
+        aviso = 'Saída sem ADP (não resfria e seca o ar, ou a reta ' \
+                'entrada-saída não cruza a saturação)'
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fb = (t2 - adp) / (t1 - adp)
+    return _serpentina(p1, p2, adp.reshape(forma), fb.reshape(forma), q,
+                       aviso)
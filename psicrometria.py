@@ -0,0 +1,216 @@
+"""
+ Cálculo vetorizado das condições psicométricas do ar úmido
+
+ Mesmas fórmulas de main.py, escritas para receber arrays NumPy (ou escalares)
+ de qualquer formato. Os ramos água/gelo de pressao_vapor_saturado são
+ selecionados elemento a elemento e a pressão barométrica é passada como
+ argumento (escalar ou array com broadcast) em vez da variável global patm.
+ As funções de ponto de estado (pe_*) recebem um Contexto e devolvem um
+ PontoEstado; não há estado global, então podem rodar em várias threads.
+
+ Unidades internas (diferente da apresentação em main.py):
+   ur  - fração (0 a 1)
+   rm  - kg/kg
+
+ Tolerância em relação às funções escalares de main.py: as propriedades
+ algébricas (pvs, pv, rm, tpo, e, ve) coincidem até o arredondamento de ponto
+ flutuante (erro relativo < 1e-12). tbm é a raiz resolvida até a tolerância
+ pedida (padrão 1e-4 °C); o laço original de main.py parava com
+ 0.999 <= urel < 1 e por isso difere dela em até 0.03 °C.
+"""
+import time
+
+import numpy as np
+
+import formulas
+from estado import PROPRIEDADES, Contexto, PontoEstado  # noqa: F401
+from instrumentacao import instrumentado
+
+from formulas import (EPS, R_AR, T_ABS, entalpia,  # noqa: F401
+                      pressao_vapor, razao_mistura1, razao_mistura2,
+                      temperatura_b_seco, umidade_relativa)
+
+
+def pressao_vapor_saturado(t):
+    # cálculo da pressão do vapor de saturação (kPa), ramos água e gelo
+    return formulas.pressao_vapor_saturado(np, np.asarray(t, dtype=float))
+
+
+def temperatura_ponto_orvalho(p):
+    # Cálculo da temperatura do ponto de orvalho
+    return formulas.temperatura_ponto_orvalho(np, np.asarray(p, dtype=float))
+
+
+def pressao_vapor_ponto_orvalho(t):
+    # Pressão de vapor (kPa) com ponto de orvalho t: inversa exata de
+    # temperatura_ponto_orvalho
+    return formulas.pressao_vapor_ponto_orvalho(np.asarray(t, dtype=float))
+
+
+def pvs_e_derivada(t):
+    # pressão do vapor de saturação (kPa) e sua derivada (kPa/°C)
+    return formulas.pvs_e_derivada(np, np.asarray(t, dtype=float))
+
+
+def newton_protegido(funcao, x0, lo, hi, tol=1e-4, max_iter=30,
+                     crescente=True, instr=None, nome='newton'):
+    # Método de Newton vetorizado protegido por intervalo [lo, hi]
+    # (formulas.newton_protegido com NumPy): funcao(x, idx) devolve (g, dg)
+    # para os elementos idx ainda ativos; passo fora do intervalo vira
+    # bisseção. instr: Instrumentacao opcional, que recebe as iterações com
+    # o nome dado
+    return formulas.newton_protegido(np, funcao, x0, lo, hi, tol, max_iter,
+                                     crescente, instr, nome)
+
+
+def temperatura_pvs(p, tol=1e-6, max_iter=30, tabela=None, instr=None):
+    # Inversa de pressao_vapor_saturado: temperatura (°C) em que pvs = p.
+    # Newton em ln pvs(t) - ln p a partir do ajuste do ponto de orvalho.
+    pvs_d = pvs_e_derivada if tabela is None else tabela.pvs_e_derivada
+    if instr is not None:
+        pvs_d = instr.contar_pvs(pvs_d)
+    p = np.asarray(p, dtype=float)
+    forma = p.shape
+    p = p.ravel()
+    ln_p = np.log(p)
+
+    def g_dg(t, idx):
+        ps, dps = pvs_d(t)
+        return np.log(ps) - ln_p[idx], dps / ps
+
+    t0 = np.clip(temperatura_ponto_orvalho(p), -99., 199.)
+    t = newton_protegido(g_dg, t0, np.full(p.shape, -100.),
+                         np.full(p.shape, 200.), tol, max_iter, instr=instr,
+                         nome='tpvs')
+    return t.reshape(forma)
+
+
+def temperatura_saturacao(et, patm, t0, lo, hi, tol=1e-4, max_iter=30,
+                          tabela=None, instr=None, nome='tbm'):
+    # Temperatura do ar saturado com entalpia et (arrays 1-D)
+    # Raiz de g(t) = rm_sat(t) - rmbs(t), onde rmbs é a razão de mistura com
+    # entalpia et na temperatura t. g é crescente e convexa, então o método
+    # de Newton converge em poucas iterações; a raiz deve estar em [lo, hi].
+    # Com tabela (tabela_pvs.TabelaPvs) pvs e derivada vêm da interpolação.
+    pvs_d = pvs_e_derivada if tabela is None else tabela.pvs_e_derivada
+    if instr is not None:
+        pvs_d = instr.contar_pvs(pvs_d)
+
+    def g_dg(t, idx):
+        p = patm[idx]
+        ps, dps = pvs_d(t)
+        g, dg = formulas.saturacao_g_dg(t, et[idx], p, ps, dps)
+        # acima do ponto de ebulição (ps >= p) g é infinito: bisseção
+        return np.where(ps < p, g, np.inf), dg
+
+    return newton_protegido(g_dg, t0, lo, hi, tol, max_iter, instr=instr,
+                            nome=nome)
+
+
+def temperatura_b_molhado(ts, et, patm, tol=1e-4, max_iter=30, tabela=None,
+                          instr=None):
+    # Cálculo da temperatura do bulbo molhado
+    # Temperatura de saturação na entalpia et, procurada em [-100, ts] a
+    # partir da regra de um terço entre o ponto de orvalho e ts
+    inicio = time.perf_counter() if instr is not None else 0.
+    ts, et, patm = np.broadcast_arrays(np.asarray(ts, dtype=float),
+                                       np.asarray(et, dtype=float),
+                                       np.asarray(patm, dtype=float))
+    forma = ts.shape
+    ts, et, patm = ts.ravel(), et.ravel(), patm.ravel()
+    th = formulas.chute_b_molhado(np, ts, et, patm)
+    th = temperatura_saturacao(et, patm, th, np.full(ts.shape, -100.), ts,
+                               tol, max_iter, tabela, instr)
+    if instr is not None:
+        instr.tempo('tbm', time.perf_counter() - inicio)
+    return th.reshape(forma)
+
+
+def volume_especifico(t, w, patm):
+    # Cálculo de volume específico
+    return formulas.volume_especifico(np.asarray(t, dtype=float), w, patm)
+
+
+def pressao_atmosferica(alt):
+    # Cálculo da pressão barométrica (kPa) a partir da altitude (m)
+    return formulas.pressao_atmosferica(np.asarray(alt, dtype=float))
+
+
+def pressao_por_linha(altitude=None, patm=None, padrao=None):
+    # Pressão barométrica (kPa) de cada linha: a medida (patm) onde houver,
+    # senão a da altitude (m), senão padrao (kPa; nível do mar se None).
+    # Valores faltantes (NaN) passam para a opção seguinte.
+    p = pressao_atmosferica(0.) if padrao is None else \
+        np.asarray(padrao, dtype=float)
+    if altitude is not None:
+        altitude = np.asarray(altitude, dtype=float)
+        p = np.where(np.isfinite(altitude), pressao_atmosferica(altitude), p)
+    if patm is not None:
+        patm = np.asarray(patm, dtype=float)
+        p = np.where(np.isfinite(patm), patm, p)
+    return p
+
+
+def grupos_pressao(patm, resolucao=0.):
+    # Gera (pressão, índices) para cada pressão distinta de patm (array), com
+    # as pressões arredondadas para múltiplos de resolucao (kPa) quando > 0.
+    # Serve para montar uma vez por grupo o que depende só da pressão.
+    patm = np.ravel(np.asarray(patm, dtype=float))
+    chave = np.round(patm / resolucao) * resolucao if resolucao else patm
+    valores, grupo = np.unique(chave, return_inverse=True)
+    ordem = np.argsort(grupo, kind='stable')
+    cortes = np.flatnonzero(np.diff(grupo[ordem])) + 1
+    for valor, indices in zip(valores, np.split(ordem, cortes)):
+        yield float(valor), indices
+
+
+@instrumentado
+def pe_tbs_ur(ctx, tbs, ur):
+    # Ponto de Estado  f (tbs, ur) - ur em fração
+    patm = ctx.patm
+    tbs, ur = np.broadcast_arrays(np.asarray(tbs, dtype=float),
+                                  np.asarray(ur, dtype=float))
+    ur = formulas.limitar_ur(np, ur)
+    pvs = ctx.pvs(tbs)
+    pv = ur * pvs
+    rm = razao_mistura1(pv, patm)
+    e = entalpia(tbs, rm)
+    ve = volume_especifico(tbs, rm, patm)
+    tpo = temperatura_ponto_orvalho(pv)
+    tbm = temperatura_b_molhado(tbs, e, patm, tabela=ctx.tabela,
+                                instr=ctx.instr)
+    return PontoEstado(tbs, tbm, tpo, ur, rm, pvs, pv, e, ve, patm)
+
+
+@instrumentado
+def pe_tbs_tbm(ctx, tbs, tbm):
+    # Ponto de Estado -   f (tbs, tbm)
+    patm = ctx.patm
+    tbs, tbm = np.broadcast_arrays(np.asarray(tbs, dtype=float),
+                                   np.asarray(tbm, dtype=float))
+    pvs = ctx.pvs(tbs)
+    rm, pv, ur, tpo = formulas.estado_tbs_tbm(np, tbs, tbm, pvs,
+                                              ctx.pvs(tbm), patm)
+    e = entalpia(tbs, rm)
+    ve = volume_especifico(tbs, rm, patm)
+    return PontoEstado(tbs, tbm, tpo, ur, rm, pvs, pv, e, ve, patm)
+
+
+@instrumentado
+def pe_tbs_tpo(ctx, tbs, tpo):
+    # Ponto de Estado -   f (tbs, tpo)
+    patm = ctx.patm
+    tbs, tpo = np.broadcast_arrays(np.asarray(tbs, dtype=float),
+                                   np.asarray(tpo, dtype=float))
+    pvs = ctx.pvs(tbs)
+    pv, rm, ur = formulas.estado_tbs_tpo(np, tbs, tpo, pvs, ctx.pvs(tpo),
+                                         patm)
+    e = entalpia(tbs, rm)
+    tbm = np.where(tbs == tpo, tbs,
+                   temperatura_b_molhado(tbs, e, patm, tabela=ctx.tabela,
+                                         instr=ctx.instr))
+    ve = volume_especifico(tbs, rm, patm)
+    return PontoEstado(tbs, tbm, tpo, ur, rm, pvs, pv, e, ve, patm)
+
+
+PARES = {'ur': pe_tbs_ur, 'tbm': pe_tbs_tbm, 'tpo': pe_tbs_tpo}
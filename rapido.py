@@ -0,0 +1,158 @@
+"""
+ Precisão "rápida": float32 e fórmulas fechadas para monitoramento em massa
+
+ Mesma interface de psicrometria.py (pe_tbs_ur, pe_tbs_tbm, pe_tbs_tpo com
+ Contexto), com:
+      - arrays float32 (metade da memória e da banda de memória);
+      - pvs por uma fórmula tipo Magnus (uma exponencial), com coeficientes
+        ajustados ao polinômio de Hyland-Wexler da exata, ramos água e gelo;
+      - tpo pelo mesmo ajuste fechado da exata, em float32;
+      - tbm sem laço de convergência: chute da regra de um terço seguido de
+        PASSOS_TBM passos de Newton fixos na equação de saturação.
+
+ Os casos especiais dos pares (ur = 1, tbs == tbm, tbs == tpo) são as
+ regras de formulas.py, as mesmas da exata. A precisão "exata" é
+ psicrometria.py. Erro máximo da rápida contra a exata,
+ medido com benchmarks/precisao.py em 10^6 pontos (tbs -20 a 50 °C, ur 5 a
+ 100%, altitude 0 a 3000 m), pior caso entre os três pares de entrada:
+
+      tbm     0.0054 °C    (p99 0.001 °C)
+      tpo     0.0022 °C    (p99 0.0005 °C)
+      ur      2e-5         (fração)
+      rm      2.1e-4       (relativo; 2.1e-5 fora do par tbs, tbm)
+      e       0.0035 kJ/kg
+      ve      3.1e-6 m3/kg
+
+ O erro vem quase todo do arredondamento float32 e do ajuste de pvs; o de
+ tbm também dos três passos fixos de Newton. Tempo: 2 a 3 vezes menor que a
+ exata (só o par tbs, tbm, que não tem iteração, ganha menos), com metade
+ da memória. Serve para painéis e detecção de anomalias; para projeto e
+ processos use a exata.
+
+      import rapido
+      p = rapido.pe_tbs_ur(ctx, tbs, ur)      # arrays float32
+      python main.py --csv leituras.csv --precisao rapida -o resultado.csv
+"""
+import time
+
+import numpy as np
+
+import formulas
+from estado import PontoEstado
+from instrumentacao import instrumentado
+
+# Magnus com termo linear: pvs = C exp(A t / (t + B) + D t), kPa;
+# coeficientes (A, B, C, D) ajustados à fórmula exata de psicrometria.py,
+# água de 0 a 60 °C e gelo de -45 a 0 °C (erro relativo < 2e-5 e < 5e-7)
+AGUA = (19.4858689, 254.656, 0.611184531, -0.00384869077)
+GELO = (22.5723520, 272.585, 0.610673221, -0.000460081479)
+PASSOS_TBM = 3
+F = np.float32
+
+
+def _f32(x):
+    return np.asarray(x, dtype=F)
+
+
+def pvs_e_derivada(t):
+    # pvs (kPa) e derivada (kPa/°C), ramos água e gelo
+    agua = t > 0
+    a, b, c, d = (np.where(agua, F(x), F(y)) for x, y in zip(AGUA, GELO))
+    p = c * np.exp(a * t / (t + b) + d * t)
+    return p, p * (a * b / ((t + b) * (t + b)) + d)
+
+
+def pressao_vapor_saturado(t):
+    return pvs_e_derivada(_f32(t))[0]
+
+
+def temperatura_ponto_orvalho(p):
+    # o ajuste de main.py já é fechado: o mesmo, em float32
+    return formulas.temperatura_ponto_orvalho(np, _f32(p))
+
+
+def _pvs_d(instr):
+    # pvs_e_derivada, contada na instrumentação se houver
+    if instr is None:
+        return pvs_e_derivada
+    return instr.contar_pvs(pvs_e_derivada)
+
+
+def _pvs(instr):
+    # pressao_vapor_saturado, contada na instrumentação se houver
+    if instr is None:
+        return pressao_vapor_saturado
+    return instr.contar_pvs(pressao_vapor_saturado)
+
+
+def temperatura_b_molhado(ts, et, patm, passos=PASSOS_TBM, instr=None):
+    # Chute da regra de um terço e passos de Newton fixos em
+    # g(t) = rm_sat(t) - rmbs(t), sem teste de convergência
+    inicio = time.perf_counter() if instr is not None else 0.
+    pvs_d = _pvs_d(instr)
+    ts, et, patm = np.broadcast_arrays(_f32(ts), _f32(et), _f32(patm))
+    rm = np.maximum((et - F(1.006) * ts) / (F(2501.) + F(1.775) * ts),
+                    F(1e-9))
+    tpo = np.minimum(temperatura_ponto_orvalho(
+        formulas.pressao_vapor(rm, patm)), ts)
+    t = ts - (ts - np.maximum(tpo, F(-100.))) / F(3.)
+    for _ in range(passos):
+        ps, dps = pvs_d(t)
+        g, dg = formulas.saturacao_g_dg(t, et, patm, ps, dps)
+        t = np.minimum(t - g / dg, ts)
+    if instr is not None:
+        # passos fixos: todos os pontos iteram 'passos' vezes
+        instr.solver('tbm', passos, passos * t.size, t.size, 0)
+        instr.tempo('tbm', time.perf_counter() - inicio)
+    return t
+
+
+@instrumentado
+def pe_tbs_ur(ctx, tbs, ur):
+    # Ponto de Estado  f (tbs, ur) - ur em fração
+    patm = _f32(ctx.patm)
+    tbs, ur = _f32(tbs), formulas.limitar_ur(np, _f32(ur))
+    pvs = _pvs(ctx.instr)(tbs)
+    pv = ur * pvs
+    rm = formulas.razao_mistura1(pv, patm)
+    e = formulas.entalpia(tbs, rm)
+    ve = formulas.volume_especifico(tbs, rm, patm)
+    tpo = temperatura_ponto_orvalho(pv)
+    tbm = temperatura_b_molhado(tbs, e, patm, instr=ctx.instr)
+    return PontoEstado(tbs, tbm, tpo, ur, rm, pvs, pv, e, ve, patm)
+
+
+@instrumentado
+def pe_tbs_tbm(ctx, tbs, tbm):
+    # Ponto de Estado -   f (tbs, tbm)
+    patm = _f32(ctx.patm)
+    # o caso saturado (tbs == tbm) é decidido nas entradas, antes do float32
+    saturado = np.asarray(tbs) == np.asarray(tbm)
+    tbs, tbm = _f32(tbs), _f32(tbm)
+    pvs_f = _pvs(ctx.instr)
+    pvs = pvs_f(tbs)
+    rm, pv, ur, tpo = formulas.estado_tbs_tbm(np, tbs, tbm, pvs, pvs_f(tbm),
+                                              patm, saturado)
+    e = formulas.entalpia(tbs, rm)
+    ve = formulas.volume_especifico(tbs, rm, patm)
+    return PontoEstado(tbs, tbm, tpo, ur, rm, pvs, pv, e, ve, patm)
+
+
+@instrumentado
+def pe_tbs_tpo(ctx, tbs, tpo):
+    # Ponto de Estado -   f (tbs, tpo)
+    patm = _f32(ctx.patm)
+    saturado = np.asarray(tbs) == np.asarray(tpo)
+    tbs, tpo = _f32(tbs), _f32(tpo)
+    pvs_f = _pvs(ctx.instr)
+    pvs = pvs_f(tbs)
+    pv, rm, ur = formulas.estado_tbs_tpo(np, tbs, tpo, pvs, pvs_f(tpo), patm,
+                                         saturado)
+    e = formulas.entalpia(tbs, rm)
+    tbm = np.where(saturado, tbs,
+                   temperatura_b_molhado(tbs, e, patm, instr=ctx.instr))
+    ve = formulas.volume_especifico(tbs, rm, patm)
+    return PontoEstado(tbs, tbm, tpo, ur, rm, pvs, pv, e, ve, patm)
+
+
+PARES = {'ur': pe_tbs_ur, 'tbm': pe_tbs_tbm, 'tpo': pe_tbs_tpo}
@@ -0,0 +1,326 @@
+"""
+ Classificação de pontos de estado por região da carta psicrométrica
+
+ Cada região é um polígono no plano (tbs, rm) da carta. As que dependem da
+ pressão são montadas para a pressão do índice:
+
+      neblina   acima da curva de saturação (ar supersaturado, como a
+                mistura com neblina de processos.mistura_n_fluxos)
+      geada     abaixo de 0 °C e a menos de 'margem' °C da saturação sobre o
+                gelo (ramo gelo de pressao_vapor_saturado)
+      conforto_verao, conforto_inverno
+                zonas de conforto aproximadas no estilo da ASHRAE 55 (roupa
+                0.5 e 1.0 clo, rm até 0.012 kg/kg), em (tbs, rm)
+
+ e regiões do usuário entram com Regiao(nome, vertices), com vértices
+ (tbs, rm) ou (tbs, ur) (coordenadas='ur', lados curvos na carta). As curvas
+ viram polígonos com um vértice a cada 'passo' °C (0.25: erro < 2e-6 kg/kg).
+
+ O índice (IndiceRegioes, um por pressão) divide o domínio em células e
+ guarda, por região e célula, se a célula está toda dentro, toda fora ou é
+ cortada pelo contorno; nas cortadas guarda também as arestas que a cruzam e
+ se o centro está dentro. Cada ponto cai numa célula: nas inteiras a
+ resposta é direta e nas cortadas basta contar quantas dessas poucas
+ arestas o segmento centro-ponto cruza. O custo é linear no número de
+ pontos (fora do domínio, teste com todas as arestas).
+
+      import regioes
+      ids = regioes.classificar(p.tbs, p.rm, p.patm)    # -1: nenhuma região
+      regioes.contar(p.tbs, p.rm, p.patm)              # pontos por região
+      indice = regioes.obter_indice(92.1)
+      indice.pertence(tbs, rm)                         # (regiões, pontos)
+
+      python regioes.py --csv leituras.csv --altitude 800
+
+ Com regiões sobrepostas, classificar devolve a primeira da lista (neblina
+ antes das demais) e contar/pertence contam cada região separadamente.
+"""
+import argparse
+import functools
+import json
+import sys
+
+import numpy as np
+
+import psicrometria as ps
+
+DOMINIO = ((-50., 60.), (0., 0.06))
+CELULAS = (128, 128)
+TOPO = 1.           # rm (kg/kg) que fecha por cima as regiões abertas
+
+
+class Regiao:
+    # Região da carta: nome e vértices do polígono, um array (n, 2) ou uma
+    # função patm -> array; coordenadas 'rm' (tbs, rm) ou 'ur' (tbs, ur),
+    # com os lados divididos em 'passo' °C antes da conversão para rm
+    __slots__ = ('nome', 'vertices', 'coordenadas', 'passo')
+
+    def __init__(self, nome, vertices, coordenadas='rm', passo=0.25):
+        if coordenadas not in ('rm', 'ur'):
+            raise ValueError("coordenadas deve ser 'rm' ou 'ur'")
+        self.nome = nome
+        self.vertices = vertices if callable(vertices) else \
+            np.asarray(vertices, dtype=float)
+        self.coordenadas = coordenadas
+        self.passo = passo
+
+    def poligono(self, patm):
+        # Vértices (tbs, rm) na pressão patm
+        v = self.vertices(patm) if callable(self.vertices) else self.vertices
+        if self.coordenadas == 'rm':
+            return v
+        pontos = []
+        for a, b in zip(v, np.roll(v, -1, axis=0)):
+            k = max(1, int(np.ceil(abs(b[0] - a[0]) / self.passo)))
+            pontos.append(a + (b - a) * np.arange(k)[:, None] / k)
+        t, ur = np.concatenate(pontos).T
+        return np.column_stack((t, ps.razao_mistura1(
+            ur * ps.pressao_vapor_saturado(t), patm)))
+
+    def __repr__(self):
+        return 'Regiao({!r})'.format(self.nome)
+
+
+def _rm_saturado(t, patm):
+    return ps.razao_mistura1(ps.pressao_vapor_saturado(t), patm)
+
+
+def neblina(tbs_min=-50., tbs_max=60., passo=0.25):
+    # Acima da curva de saturação, de tbs_min a tbs_max
+    def vertices(patm):
+        t = np.linspace(tbs_min, tbs_max,
+                        int(round((tbs_max - tbs_min) / passo)) + 1)
+        curva = np.column_stack((t, _rm_saturado(t, patm)))
+        return np.vstack((curva, [[tbs_max, TOPO], [tbs_min, TOPO]]))
+    return Regiao('neblina', vertices)
+
+
+def geada(margem=2., tbs_min=-50., passo=0.25):
+    # Abaixo de 0 °C com ponto de geada a menos de margem °C de tbs:
+    # rm >= rm_sat(tbs - margem), saturação sobre o gelo
+    def vertices(patm):
+        t = np.linspace(tbs_min, 0., int(round(-tbs_min / passo)) + 1)
+        curva = np.column_stack((t, _rm_saturado(t - margem, patm)))
+        return np.vstack((curva, [[0., TOPO], [tbs_min, TOPO]]))
+    return Regiao('geada', vertices)
+
+
+CONFORTO_VERAO = Regiao('conforto_verao', [(23.5, 0.), (28., 0.),
+                                           (26.5, 0.012), (22.5, 0.012)])
+CONFORTO_INVERNO = Regiao('conforto_inverno', [(19.5, 0.), (24.5, 0.),
+                                               (23.5, 0.012), (18.5, 0.012)])
+REGIOES = (neblina(), geada(), CONFORTO_VERAO, CONFORTO_INVERNO)
+
+
+def _dentro(x, y, arestas):
+    # Paridade de cruzamentos de um raio para +x (pontos x, y contra todas
+    # as arestas (m, 4)), em blocos de arestas
+    dentro = np.zeros(x.shape, dtype=bool)
+    for i in range(0, len(arestas), 64):
+        xa, ya, xb, yb = (c[:, None] for c in arestas[i:i + 64].T)
+        corta = (ya > y) != (yb > y)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            xi = xa + (y - ya) * (xb - xa) / (yb - ya)
+        dentro ^= np.logical_xor.reduce(corta & (x < xi), axis=0)
+    return dentro
+
+
+def _cruza(ax, ay, bx, by, arestas):
+    # Segmentos a-b (arrays) cruzam as arestas correspondentes (m, 4)?
+    cx, cy, dx, dy = arestas.T
+
+    def orientacao(px, py, qx, qy, rx, ry):
+        return (qx - px) * (ry - py) - (qy - py) * (rx - px)
+
+    return ((orientacao(ax, ay, bx, by, cx, cy) > 0) !=
+            (orientacao(ax, ay, bx, by, dx, dy) > 0)) & \
+        ((orientacao(cx, cy, dx, dy, ax, ay) > 0) !=
+         (orientacao(cx, cy, dx, dy, bx, by) > 0))
+
+
+class IndiceRegioes:
+    # Índice de regiões numa pressão: células de DOMINIO com estado por
+    # região (0 fora, 1 dentro, 2 cortada pelo contorno) e, nas cortadas, o
+    # centro (dentro ou não) e as arestas que a cruzam (lista compacta)
+    def __init__(self, patm, regioes=REGIOES, dominio=DOMINIO,
+                 celulas=CELULAS):
+        self.patm = float(patm)
+        self.regioes = tuple(regioes)
+        self.nomes = tuple(r.nome for r in self.regioes)
+        (self.x0, x1), (self.y0, y1) = dominio
+        self.nx, self.ny = celulas
+        self.dx = (x1 - self.x0) / self.nx
+        self.dy = (y1 - self.y0) / self.ny
+        n = self.nx * self.ny
+        cx, cy = np.meshgrid(np.arange(self.nx) + .5, np.arange(self.ny) + .5,
+                             indexing='ij')
+        cx, cy = cx.ravel(), cy.ravel()
+        self.arestas = []
+        self.estado = np.zeros((len(self.regioes), n), dtype=np.int8)
+        self.centro = np.zeros((len(self.regioes), n), dtype=bool)
+        self.inicio = []
+        self.lista = []
+        for k, regiao in enumerate(self.regioes):
+            # vértices em unidades de célula
+            v = regiao.poligono(self.patm)
+            v = np.column_stack(((v[:, 0] - self.x0) / self.dx,
+                                 (v[:, 1] - self.y0) / self.dy))
+            arestas = np.hstack((v, np.roll(v, -1, axis=0)))
+            self.arestas.append(arestas)
+            celulas_aresta = [self._celulas(a) for a in arestas]
+            pares = [(c, i) for i, cs in enumerate(celulas_aresta) for c in cs]
+            pares = np.array(pares, dtype=np.int64).reshape(-1, 2)
+            pares = pares[np.lexsort((pares[:, 1], pares[:, 0]))]
+            contagem = np.bincount(pares[:, 0], minlength=n)
+            self.inicio.append(np.concatenate(([0], np.cumsum(contagem))))
+            self.lista.append(pares[:, 1])
+            self.centro[k] = _dentro(cx, cy, arestas)
+            self.estado[k] = np.where(contagem > 0, 2, self.centro[k])
+
+    def _celulas(self, aresta):
+        # Células cortadas por uma aresta (coluna a coluna, exato)
+        xa, ya, xb, yb = aresta
+        if xa > xb:
+            xa, ya, xb, yb = xb, yb, xa, ya
+        celulas = []
+        c0 = max(int(np.floor(xa)), 0)
+        c1 = min(int(np.floor(xb)), self.nx - 1)
+        for c in range(c0, c1 + 1):
+            if xb > xa:
+                xs = np.clip((c, c + 1), xa, xb)
+                ys = ya + (xs - xa) * (yb - ya) / (xb - xa)
+            else:
+                ys = (ya, yb)
+            r0 = max(int(np.floor(min(ys))), 0)
+            r1 = min(int(np.floor(max(ys))), self.ny - 1)
+            celulas.extend(c * self.ny + r for r in range(r0, r1 + 1))
+        return celulas
+
+    def pertence(self, tbs, rm):
+        # Matriz (regiões, pontos...) de pertinência; NaN fica fora de todas
+        tbs, rm = np.broadcast_arrays(np.asarray(tbs, dtype=float),
+                                      np.asarray(rm, dtype=float))
+        forma = tbs.shape
+        x = (tbs.ravel() - self.x0) / self.dx
+        y = (rm.ravel() - self.y0) / self.dy
+        ix, iy = np.floor(x), np.floor(y)
+        no_dominio = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+        fora = np.flatnonzero(~no_dominio & np.isfinite(x) & np.isfinite(y))
+        ok = np.flatnonzero(no_dominio)
+        celula = ix[ok].astype(np.int64) * self.ny + iy[ok].astype(np.int64)
+        resultado = np.zeros((len(self.regioes), x.size), dtype=bool)
+        for k in range(len(self.regioes)):
+            estado = self.estado[k, celula]
+            resultado[k, ok] = estado == 1
+            b = np.flatnonzero(estado == 2)
+            if b.size:
+                resultado[k, ok[b]] = self._cortadas(k, celula[b], x[ok[b]],
+                                                     y[ok[b]])
+            if fora.size:
+                resultado[k, fora] = _dentro(x[fora], y[fora],
+                                             self.arestas[k])
+        return resultado.reshape((len(self.regioes),) + forma)
+
+    def _cortadas(self, k, celula, x, y):
+        # Pontos em células cortadas: estado do centro trocado a cada aresta
+        # da célula cruzada pelo segmento centro-ponto
+        inicio, lista, arestas = self.inicio[k], self.lista[k], self.arestas[k]
+        cx = celula // self.ny + .5
+        cy = celula % self.ny + .5
+        dentro = self.centro[k, celula].copy()
+        contagem = inicio[celula + 1] - inicio[celula]
+        for j in range(int(contagem.max())):
+            s = np.flatnonzero(contagem > j)
+            a = arestas[lista[inicio[celula[s]] + j]]
+            dentro[s] ^= _cruza(cx[s], cy[s], x[s], y[s], a)
+        return dentro
+
+    def classificar(self, tbs, rm):
+        # Índice da primeira região (ordem de self.regioes) de cada ponto;
+        # -1 fora de todas
+        p = self.pertence(tbs, rm)
+        return np.where(p.any(axis=0), p.argmax(axis=0), -1).astype(np.int16)
+
+    def contar(self, tbs, rm):
+        # Pontos em cada região (separadamente) e em nenhuma
+        p = self.pertence(tbs, rm).reshape(len(self.regioes), -1)
+        contagem = dict(zip(self.nomes, p.sum(axis=1).tolist()))
+        contagem['nenhuma'] = int((~p.any(axis=0)).sum())
+        return contagem
+
+
+@functools.lru_cache(maxsize=32)
+def _indice(patm, regioes, dominio, celulas):
+    return IndiceRegioes(patm, regioes, dominio, celulas)
+
+
+def obter_indice(patm, regioes=REGIOES, dominio=DOMINIO, celulas=CELULAS):
+    # Índice da pressão patm (escalar), reaproveitado entre chamadas
+    return _indice(round(float(patm), 6), tuple(regioes), dominio, celulas)
+
+
+def pertence(tbs, rm, patm, regioes=REGIOES, resolucao=0.):
+    # Pertinência (regiões, pontos...) com patm escalar ou por ponto; cada
+    # pressão distinta usa o seu índice. Com resolucao > 0 (kPa) as pressões
+    # são agrupadas por múltiplos dela e cada grupo usa o índice da pressão
+    # do grupo: menos índices, mas rm de saturação erra cerca de
+    # rm * resolucao / (2 patm) (1 kPa: até 1.4e-4 kg/kg a 30 °C)
+    tbs, rm, patm = np.broadcast_arrays(np.asarray(tbs, dtype=float),
+                                        np.asarray(rm, dtype=float),
+                                        np.asarray(patm, dtype=float))
+    regioes = tuple(regioes)
+    resultado = np.zeros((len(regioes), tbs.size), dtype=bool)
+    for valor, indices in ps.grupos_pressao(patm, resolucao):
+        if np.isfinite(valor):
+            resultado[:, indices] = obter_indice(valor, regioes).pertence(
+                tbs.ravel()[indices], rm.ravel()[indices])
+    return resultado.reshape((len(regioes),) + tbs.shape)
+
+
+def classificar(tbs, rm, patm, regioes=REGIOES, resolucao=0.):
+    # Índice da primeira região de cada ponto (-1: nenhuma)
+    p = pertence(tbs, rm, patm, regioes, resolucao)
+    return np.where(p.any(axis=0), p.argmax(axis=0), -1).astype(np.int16)
+
+
+def contar(tbs, rm, patm, regioes=REGIOES, resolucao=0.):
+    # Pontos em cada região (separadamente) e em nenhuma
+    regioes = tuple(regioes)
+    p = pertence(tbs, rm, patm, regioes, resolucao)
+    p = p.reshape(len(regioes), -1)
+    contagem = dict(zip((r.nome for r in regioes), p.sum(axis=1).tolist()))
+    contagem['nenhuma'] = int((~p.any(axis=0)).sum())
+    return contagem
+
+
+def principal(argv=None):
+    # Contagem por região de um CSV de leituras (colunas como em lote.py);
+    # só rm é calculada (pontos preguiçosos, sem o solver de bulbo molhado)
+    import lote
+    parser = argparse.ArgumentParser(
+        description='GRAPSI - leituras por região da carta psicrométrica')
+    parser.add_argument('--csv', required=True,
+                        help="arquivo de entrada ('-' para a entrada padrão)")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument('--altitude', type=float)
+    grupo.add_argument('--patm', type=float)
+    parser.add_argument('--bloco', type=int, default=100000)
+    args = parser.parse_args(argv)
+    patm = args.patm
+    if args.altitude is not None:
+        patm = float(ps.pressao_atmosferica(args.altitude))
+    total = dict.fromkeys([r.nome for r in REGIOES] + ['nenhuma'], 0)
+    entrada = sys.stdin if args.csv == '-' else open(args.csv)
+    try:
+        for nomes, bloco in lote.ler_blocos(entrada, args.bloco):
+            p = lote.calcular_bloco(nomes, bloco, patm, preguicoso=True)
+            for nome, n in contar(p.tbs, p.rm, p.patm).items():
+                total[nome] += n
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+    print(json.dumps(total))
+
+
+if __name__ == '__main__':
+    principal()
@@ -0,0 +1,242 @@
+"""
+ Serviço psicrométrico local (asyncio, JSON por linha)
+
+ Um processo de longa duração que atende pedidos por socket Unix ou TCP local,
+ sem o custo de iniciar o interpretador e importar o NumPy a cada ponto. Cada
+ linha recebida é um objeto JSON; cada resposta é uma linha JSON com o mesmo
+ "id". Pedidos concorrentes (de uma ou de várias conexões) do mesmo tipo são
+ agrupados em microlotes, fechados por tamanho (--lote) ou por tempo
+ (--janela, em ms), e cada microlote é calculado com uma única chamada às
+ funções vetorizadas de psicrometria.py / processos.py.
+
+ Pedidos (unidades de psicrometria.py: ur em fração, rm em kg/kg, q em m3/h;
+ pressão por "patm" em kPa ou "altitude" em m, padrão nível do mar):
+
+      {"id": 1, "op": "ponto", "par": "ur", "tbs": 25, "ur": 0.5}
+      {"id": 2, "op": "ponto", "par": "tbm", "tbs": 25, "tbm": 18,
+       "altitude": 800}
+      {"id": 3, "op": "processo", "nome": "mistura_fluxos", "tbs1": 30,
+       "ur1": 0.4, "q1": 1000, "tbs2": 20, "ur2": 0.8, "q2": 500}
+
+ Respostas: {"id": 1, "tbs": ..., "tbm": ..., ...} para pontos e
+ {"id": 3, "pontos": [{...}, ...]} para processos (mais "aviso" e, na
+ mistura, "neblina" em kg/kg). Valores não calculáveis vêm como null e
+ pedidos inválidos como {"id": ..., "erro": "..."}.
+
+      python servico.py --unix /tmp/grapsi.sock
+      python servico.py --porta 8765 --janela 2 --lote 4096
+
+ benchmarks/carga_servico.py mede latência (p50/p99) e vazão.
+"""
+import argparse
+import asyncio
+import json
+
+import numpy as np
+
+import processos
+import psicrometria as ps
+
+PONTOS = {par: (funcao, ('tbs', par)) for par, funcao in ps.PARES.items()}
+PROCESSOS = {'aquece_resfria': ('tbs1', 'ur1', 'tbs2'),
+             'u_adiabatica_tbs': ('tbs1', 'ur1', 'tbs2'),
+             'u_adiabatica_ur': ('tbs1', 'ur1', 'ur2'),
+             'u_adiabatica_rm': ('tbs1', 'rm1', 'rm2'),
+             'mistura_fluxos': ('tbs1', 'ur1', 'q1', 'tbs2', 'ur2', 'q2')}
+PROPRIEDADES = ps.PROPRIEDADES + ('patm',)
+
+
+def _colunas(p):
+    # Propriedades de um PontoEstado como listas (uma conversão por lote);
+    # NaN e infinito viram None (null no JSON)
+    forma = np.shape(p.tbs)
+    nomes = PROPRIEDADES + (('q',) if p.q is not None else ())
+    colunas = []
+    for nome in nomes:
+        v = np.broadcast_to(getattr(p, nome), forma).astype(object)
+        v[~np.isfinite(v.astype(float))] = None
+        colunas.append(v.tolist())
+    return [dict(zip(nomes, linha)) for linha in zip(*colunas)]
+
+
+def _chave(pedido):
+    # (tipo, nome) do microlote e os campos numéricos exigidos; ValueError se
+    # o pedido for inválido
+    op = pedido.get('op')
+    if op == 'ponto':
+        par = pedido.get('par')
+        if par not in PONTOS:
+            raise ValueError("par deve ser 'ur', 'tbm' ou 'tpo'")
+        return ('ponto', par), PONTOS[par][1]
+    if op == 'processo':
+        nome = pedido.get('nome')
+        if nome not in PROCESSOS:
+            raise ValueError('processo desconhecido: {}'.format(nome))
+        return ('processo', nome), PROCESSOS[nome]
+    raise ValueError("op deve ser 'ponto' ou 'processo'")
+
+
+def _pressao(pedido):
+    if 'patm' in pedido:
+        return float(pedido['patm'])
+    return float(ps.pressao_atmosferica(float(pedido.get('altitude', 0.))))
+
+
+def calcular_lote(chave, entradas, patm, tabela=None):
+    # Calcula um microlote: entradas {campo: array}, patm array por pedido.
+    # Devolve uma lista de respostas (sem o id), na ordem dos pedidos.
+    tipo, nome = chave
+    ctx = ps.Contexto(patm, tabela)
+    n = patm.size
+    if tipo == 'ponto':
+        funcao, campos = PONTOS[nome]
+        return _colunas(funcao(ctx, *(entradas[c] for c in campos)))
+    res = getattr(processos, nome)(ctx, **entradas)
+    pontos = [_colunas(p) for p in res.pontos]
+    neblina = [None] * n if res.neblina is None else res.neblina.tolist()
+    respostas = []
+    for i in range(n):
+        r = {'pontos': [p[i] for p in pontos]}
+        if res.neblina is not None:
+            r['neblina'] = neblina[i]
+        # o aviso é do lote inteiro: só vai para os pedidos afetados
+        if res.aviso is not None and (r['pontos'][-1]['tbs'] is None or
+                                      neblina[i]):
+            r['aviso'] = res.aviso
+        respostas.append(r)
+    return respostas
+
+
+class Agrupador:
+    # Junta pedidos do mesmo tipo em microlotes. Um microlote é calculado
+    # quando chega a tamanho_max pedidos ou janela segundos depois do seu
+    # primeiro pedido, o que vier antes.
+    def __init__(self, janela=0.002, tamanho_max=4096, tabela=None):
+        self.janela = janela
+        self.tamanho_max = tamanho_max
+        self.tabela = tabela
+        self._pendentes = {}
+        self._relogios = {}
+        self.lotes = 0
+        self.pedidos = 0
+
+    def calcular(self, pedido):
+        # Agenda o pedido e devolve um Future com a resposta (sem o id)
+        chave, campos = _chave(pedido)
+        valores = tuple(float(pedido[c]) for c in campos)
+        patm = _pressao(pedido)
+        futuro = asyncio.get_running_loop().create_future()
+        fila = self._pendentes.setdefault(chave, (campos, []))[1]
+        fila.append((valores, patm, futuro))
+        if len(fila) >= self.tamanho_max:
+            self._fechar(chave)
+        elif chave not in self._relogios:
+            self._relogios[chave] = asyncio.get_running_loop().call_later(
+                self.janela, self._fechar, chave)
+        return futuro
+
+    def _fechar(self, chave):
+        relogio = self._relogios.pop(chave, None)
+        if relogio is not None:
+            relogio.cancel()
+        campos, fila = self._pendentes.pop(chave, ((), []))
+        if not fila:
+            return
+        matriz = np.array([v for v, _, _ in fila], dtype=float)
+        entradas = {c: matriz[:, j] for j, c in enumerate(campos)}
+        patm = np.array([p for _, p, _ in fila])
+        self.lotes += 1
+        self.pedidos += len(fila)
+        try:
+            with np.errstate(all='ignore'):
+                respostas = calcular_lote(chave, entradas, patm, self.tabela)
+        except Exception as erro:
+            for _, _, futuro in fila:
+                if not futuro.done():
+                    futuro.set_exception(erro)
+            return
+        for (_, _, futuro), resposta in zip(fila, respostas):
+            if not futuro.done():
+                futuro.set_result(resposta)
+
+
+async def _responder(agrupador, linha, escritor):
+    pedido = {}
+    try:
+        pedido = json.loads(linha)
+        if not isinstance(pedido, dict):
+            pedido = {}
+            raise ValueError('o pedido deve ser um objeto JSON')
+        resposta = await agrupador.calcular(pedido)
+    except Exception as erro:
+        resposta = {'erro': '{}: {}'.format(type(erro).__name__, erro)}
+    resposta = dict(resposta, id=pedido.get('id'))
+    escritor.write(json.dumps(resposta).encode() + b'\n')
+
+
+async def atender(agrupador, leitor, escritor):
+    # Uma conexão: cada linha vira uma tarefa, então pedidos enviados em
+    # sequência sem esperar a resposta entram no mesmo microlote
+    tarefas = set()
+    try:
+        while True:
+            linha = await leitor.readline()
+            if not linha:
+                break
+            if not linha.strip():
+                continue
+            tarefa = asyncio.ensure_future(_responder(agrupador, linha,
+                                                      escritor))
+            tarefas.add(tarefa)
+            tarefa.add_done_callback(tarefas.discard)
+            if escritor.transport.get_write_buffer_size() > 1 << 20:
+                await escritor.drain()
+        if tarefas:
+            await asyncio.gather(*tarefas)
+        await escritor.drain()
+    except ConnectionError:
+        pass
+    finally:
+        escritor.close()
+
+
+async def iniciar(agrupador, unix=None, host='127.0.0.1', porta=8765):
+    # Inicia o servidor (socket Unix se unix for dado, senão TCP local)
+    def conexao(leitor, escritor):
+        return atender(agrupador, leitor, escritor)
+    if unix is not None:
+        return await asyncio.start_unix_server(conexao, path=unix)
+    return await asyncio.start_server(conexao, host, porta)
+
+
+async def servir(args):
+    tabela = None
+    if args.tabela:
+        import tabela_pvs
+        tabela = tabela_pvs.obter_tabela(args.tabela)
+    agrupador = Agrupador(args.janela / 1000., args.lote, tabela)
+    servidor = await iniciar(agrupador, args.unix, args.host, args.porta)
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def argumentos(argv=None):
+    parser = argparse.ArgumentParser(
+        description='GRAPSI - serviço local com JSON por linha')
+    parser.add_argument('--unix', help='caminho do socket Unix')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--janela', type=float, default=2.,
+                        help='espera máxima de um microlote (ms, padrão 2)')
+    parser.add_argument('--lote', type=int, default=4096,
+                        help='tamanho máximo do microlote (padrão 4096)')
+    parser.add_argument('--tabela',
+                        help='arquivo .npz da tabela de pvs (modo rápido)')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(servir(argumentos()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,169 @@
+"""
+ Tabela pré-calculada da pressão do vapor de saturação
+
+ Modo rápido opcional para pressao_vapor_saturado: a faixa de -40 a 100 °C é
+ dividida em intervalos de 1/pontos_por_grau °C e em cada um pvs é uma cúbica
+ de Hermite construída com o valor e a derivada exatos nos extremos. A
+ avaliação é um polinômio de grau 3 (sem log/exp), e a derivada sai da mesma
+ cúbica, o que serve ao método de Newton de temperatura_b_molhado.
+
+ Os ramos água (t > 0) e gelo (t <= 0) ficam em intervalos separados, com um
+ nó exatamente em 0 °C, então a troca de ramo é respeitada. Fora da faixa a
+ fórmula exata é usada.
+
+ Erro relativo máximo em relação a psicrometria.pressao_vapor_saturado,
+ medido no meio de cada intervalo (onde o erro da cúbica de Hermite é máximo):
+
+      pontos_por_grau    erro relativo máximo
+             5              4.1e-10
+             10 (padrão)    2.5e-11
+             20             1.6e-12
+             100            7.0e-14 (arredondamento)
+
+ A construção e a leitura de arquivo verificam o erro e recusam tabelas acima
+ de ERRO_MAX_GARANTIDO (1e-9; com 1 ou 2 pontos por grau o erro seria 2.5e-7
+ e 1.6e-8). Um arquivo com outros pontos_por_grau é reconstruído.
+ python tabela_pvs.py repete a verificação numa amostra de 10^6 pontos.
+
+      tab = obter_tabela('pvs.npz')     # constrói e grava, ou carrega
+      ctx = psicrometria.Contexto(92.1, tabela=tab)
+"""
+import os
+
+import numpy as np
+
+import psicrometria as ps
+
+T_MIN = -40.
+T_MAX = 100.
+ERRO_MAX_GARANTIDO = 1e-9
+
+
+class TabelaPvs:
+    # Coeficientes das cúbicas de Hermite, um conjunto por intervalo
+    __slots__ = ('t_min', 'pontos_por_grau', 'c0', 'c1', 'c2', 'c3',
+                 'erro_max')
+
+    def __init__(self, t_min, pontos_por_grau, c0, c1, c2, c3, erro_max):
+        self.t_min = float(t_min)
+        self.pontos_por_grau = int(pontos_por_grau)
+        self.c0 = c0
+        self.c1 = c1
+        self.c2 = c2
+        self.c3 = c3
+        self.erro_max = float(erro_max)
+
+    @property
+    def t_max(self):
+        return self.t_min + self.c0.size / self.pontos_por_grau
+
+    @classmethod
+    def construir(cls, t_min=T_MIN, t_max=T_MAX, pontos_por_grau=10):
+        # Constrói a tabela a partir da fórmula exata e verifica o erro
+        n = int(round((t_max - t_min) * pontos_por_grau))
+        nos = t_min + np.arange(n + 1) / pontos_por_grau
+        h = 1. / pontos_por_grau
+        p, d = ps.pvs_e_derivada(nos)
+        p0, d0 = p[:-1].copy(), d[:-1].copy()
+        p1, d1 = p[1:], d[1:]
+        # o intervalo que começa em 0 °C pertence ao ramo água: o valor e a
+        # derivada no nó esquerdo são os limites pela direita
+        zero = np.flatnonzero(nos[:-1] == 0.)
+        if zero.size:
+            p0[zero], d0[zero] = ps.pvs_e_derivada(np.spacing(ps.T_ABS))
+        m0 = d0 * h
+        m1 = d1 * h
+        c0 = p0
+        c1 = m0
+        c2 = 3 * (p1 - p0) - 2 * m0 - m1
+        c3 = 2 * (p0 - p1) + m0 + m1
+        tab = cls(t_min, pontos_por_grau, c0, c1, c2, c3, 0.)
+        tab.verificar()
+        return tab
+
+    def verificar(self):
+        # Mede o erro relativo no meio de cada intervalo contra a fórmula
+        # exata (guarda em erro_max) e recusa a tabela acima do limite
+        h = 1. / self.pontos_por_grau
+        meio = self.t_min + (np.arange(self.c0.size) + .5) * h
+        exato = ps.pressao_vapor_saturado(meio)
+        self.erro_max = float(np.max(np.abs(self.pvs(meio) / exato - 1)))
+        if not self.erro_max <= ERRO_MAX_GARANTIDO:
+            raise ValueError('erro da tabela de pvs acima do limite: {:.2e}'
+                             .format(self.erro_max))
+
+    @classmethod
+    def carregar(cls, caminho):
+        # Lê a tabela gravada por salvar e repete a verificação do erro
+        with np.load(caminho) as dados:
+            tab = cls(dados['t_min'], dados['pontos_por_grau'], dados['c0'],
+                      dados['c1'], dados['c2'], dados['c3'],
+                      dados['erro_max'])
+        tab.verificar()
+        return tab
+
+    def salvar(self, caminho):
+        np.savez(caminho, t_min=self.t_min,
+                 pontos_por_grau=self.pontos_por_grau, c0=self.c0, c1=self.c1,
+                 c2=self.c2, c3=self.c3, erro_max=self.erro_max)
+
+    def _localizar(self, t):
+        # índice do intervalo (aberto à esquerda) e posição s em (0, 1]
+        x = (t - self.t_min) * self.pontos_por_grau
+        n = self.c0.size
+        dentro = (x >= 0) & (x <= n)
+        # fora da faixa (e NaN) usa um índice qualquer válido: esses pontos
+        # vão para a fórmula exata
+        x = np.where(dentro, x, 1.)
+        i = np.clip(np.ceil(x) - 1, 0, n - 1).astype(np.intp)
+        return i, x - i, dentro
+
+    def pvs(self, t):
+        # pressão do vapor de saturação (kPa) interpolada
+        t = np.asarray(t, dtype=float)
+        i, s, dentro = self._localizar(t)
+        p = ((self.c3[i] * s + self.c2[i]) * s + self.c1[i]) * s + self.c0[i]
+        if not np.all(dentro):
+            fora = ~dentro
+            p = np.array(p, dtype=float)
+            p[fora] = ps.pressao_vapor_saturado(t[fora])
+        return p
+
+    def pvs_e_derivada(self, t):
+        # pvs (kPa) e d(pvs)/dt (kPa/°C) interpolados
+        t = np.asarray(t, dtype=float)
+        i, s, dentro = self._localizar(t)
+        c1, c2, c3 = self.c1[i], self.c2[i], self.c3[i]
+        p = ((c3 * s + c2) * s + c1) * s + self.c0[i]
+        d = ((3 * c3 * s + 2 * c2) * s + c1) * self.pontos_por_grau
+        if not np.all(dentro):
+            fora = ~dentro
+            p = np.array(p, dtype=float)
+            d = np.array(d, dtype=float)
+            p[fora], d[fora] = ps.pvs_e_derivada(t[fora])
+        return p, d
+
+
+def obter_tabela(caminho=None, pontos_por_grau=10):
+    # Carrega a tabela de caminho se existir e tiver a faixa e os
+    # pontos_por_grau pedidos; senão constrói (e grava por cima)
+    if caminho is not None and os.path.exists(caminho):
+        tab = TabelaPvs.carregar(caminho)
+        if (tab.pontos_por_grau == pontos_por_grau and tab.t_min == T_MIN
+                and tab.t_max == T_MAX):
+            return tab
+    tab = TabelaPvs.construir(pontos_por_grau=pontos_por_grau)
+    if caminho is not None:
+        tab.salvar(caminho)
+    return tab
+
+
+if __name__ == '__main__':
+    # verificação do erro contra a fórmula exata numa amostra densa
+    for ppg in (5, 10, 20, 100):
+        tabela = TabelaPvs.construir(pontos_por_grau=ppg)
+        t_teste = np.linspace(T_MIN, T_MAX, 1000001)
+        erro = np.max(np.abs(tabela.pvs(t_teste) /
+                             ps.pressao_vapor_saturado(t_teste) - 1))
+        print('pontos_por_grau = {:4d}   erro nos meios = {:.2e}   '
+              'erro na amostra = {:.2e}'.format(ppg, tabela.erro_max, erro))
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+import cadeia
+import processos
+import psicrometria as ps
+import tabela_pvs
+
+
+def _serie(n=500, semente=7):
+    rng = np.random.default_rng(semente)
+    tbs = rng.uniform(-10., 40., n)
+    ur = rng.uniform(.1, 1., n)
+    ur[::10] = 1.
+    return tbs, ur
+
+
+def test_etapas_sensiveis_sem_agua():
+    # aquecimento e resfriamento acima do orvalho mantêm rm exatamente,
+    # inclusive com ar saturado na entrada e depois de desumidificar
+    unidade = cadeia.Cadeia([cadeia.Aquecimento(5.),
+                             cadeia.Resfriamento(13., rm_max=.0085),
+                             cadeia.Aquecimento(16.),
+                             cadeia.Resfriamento(30.)])
+    tbs, ur = _serie()
+    r = unidade.calcular(ps.Contexto(101.325), tbs, ur, 2000.)
+    for nome in ('aquecimento', 'aquecimento_2', 'resfriamento_2'):
+        assert np.all(r.agua[nome] == 0.)
+    assert np.all(r.agua['resfriamento'] <= 0.)
+
+
+@pytest.mark.parametrize('tabela', [None, tabela_pvs.TabelaPvs.construir()])
+def test_resfriamento_desumidifica_ate_rm_max(tabela):
+    # ar mais úmido que rm_max sai saturado com rm = rm_max; o mais seco
+    # só resfria até tbs, sem perder água
+    ctx = ps.Contexto(np.linspace(85., 101.325, 500), tabela)
+    tbs, ur = _serie()
+    unidade = cadeia.Cadeia([cadeia.Resfriamento(20., rm_max=.0085)])
+    r = unidade.calcular(ctx, tbs, ur, 2000.)
+    entrada = ps.pe_tbs_ur(ctx, tbs, ur)
+    umido = entrada.rm > .0085
+    assert umido.sum() > 50 and (~umido).sum() > 50
+    saida = r.estados['resfriamento']
+    np.testing.assert_allclose(saida.rm[umido], .0085, rtol=1e-8)
+    np.testing.assert_allclose(saida.ur[umido], 1., rtol=1e-8)
+    assert np.all(saida.rm[~umido] == entrada.rm[~umido])
+
+
+@pytest.mark.parametrize('nome, args', [
+    ('aquece_resfria', (20.,)),
+    ('u_adiabatica_tbs', (15.,)),
+    ('u_adiabatica_ur', (.9,)),
+    ('serpentina_adp', (5., .2))])
+def test_processo_aceita_ponto_pronto(nome, args):
+    ctx = ps.Contexto(92.1)
+    tbs = np.linspace(22., 35., 20)
+    p1 = ps.pe_tbs_ur(ctx, tbs, .4)
+    a = getattr(processos, nome)(ctx, tbs, .4, *args)
+    b = getattr(processos, nome)(ctx, p1, None, *args)
+    for x, y in zip(a.pontos, b.pontos):
+        for prop in ps.PROPRIEDADES:
+            np.testing.assert_allclose(getattr(y, prop), getattr(x, prop),
+                                       rtol=1e-12)
@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pytest
+
+import colunar
+import psicrometria as ps
+
+
+def _blocos(n=4, tamanho=250, patm=None):
+    rng = np.random.default_rng(5)
+    for k in range(n):
+        ctx = ps.Contexto(101.325 if patm is None else patm[k])
+        yield ps.pe_tbs_ur(ctx, rng.uniform(-10., 40., tamanho),
+                           rng.uniform(.1, 1., tamanho))
+
+
+def _juntar(blocos, nome):
+    return np.concatenate([np.broadcast_to(getattr(p, nome), p.tbs.shape)
+                           for p in blocos])
+
+
+def test_ida_e_volta_igual(tmp_path):
+    pasta = str(tmp_path / 'r')
+    blocos = list(_blocos())
+    with colunar.EscritorColunar(pasta) as escritor:
+        for p in blocos:
+            escritor.escrever(p)
+    r = colunar.abrir(pasta)
+    assert len(r) == 1000 and r['patm'] == 101.325
+    assert r.cabecalho['colunas']['ur'] == 'fração'
+    for nome in colunar.COLUNAS:
+        # o cabeçalho .npy montado à mão é lido pelo np.load comum
+        v = np.load(os.path.join(pasta, nome + '.npy'))
+        assert v.dtype == np.float64 and v.shape == (1000,)
+        np.testing.assert_array_equal(v, _juntar(blocos, nome))
+        np.testing.assert_array_equal(r[nome], v)
+    np.testing.assert_array_equal(r.ponto().e, _juntar(blocos, 'e'))
+
+
+def test_float32_e_gravar_com_q(tmp_path):
+    pasta = str(tmp_path / 'r')
+    with colunar.EscritorColunar(pasta, ('tbs', 'rm'), tipo='<f4') as e:
+        for p in _blocos(2):
+            e.escrever(p)
+    v = np.load(os.path.join(pasta, 'rm.npy'))
+    assert v.dtype == np.float32 and v.shape == (500,)
+    p = next(_blocos(1))
+    p.q = np.full(p.tbs.shape, 1000.)
+    colunar.gravar(str(tmp_path / 'q'), p, fonte='teste')
+    r = colunar.abrir(str(tmp_path / 'q'))
+    assert r.cabecalho['fonte'] == 'teste'
+    np.testing.assert_array_equal(r['q'], p.q)
+
+
+def test_patm_vira_coluna_no_meio(tmp_path):
+    # dois blocos com a mesma pressão, depois pressão por linha: as linhas
+    # anteriores ficam com o valor único
+    pasta = str(tmp_path / 'r')
+    por_linha = np.linspace(85., 95., 250)
+    blocos = list(_blocos(4, patm=[92., 92., por_linha, 90.]))
+    with colunar.EscritorColunar(pasta) as escritor:
+        for p in blocos:
+            escritor.escrever(p)
+    r = colunar.abrir(pasta)
+    assert r.cabecalho['patm'] is None and 'patm' in r.cabecalho['colunas']
+    patm = np.load(os.path.join(pasta, 'patm.npy'))
+    np.testing.assert_array_equal(patm, np.concatenate(
+        (np.full(500, 92.), por_linha, np.full(250, 90.))))
+    np.testing.assert_array_equal(r['patm'], patm)
+    np.testing.assert_array_equal(r['tbm'], _juntar(blocos, 'tbm'))
+
+
+def test_pasta_incompleta_recusada(tmp_path):
+    pasta = str(tmp_path / 'r')
+    colunar.gravar(pasta, next(_blocos(1)))
+    # regravar por cima e falhar no meio: o cabeçalho antigo some
+    with pytest.raises(RuntimeError):
+        with colunar.EscritorColunar(pasta) as escritor:
+            escritor.escrever(next(_blocos(1)))
+            raise RuntimeError('falha no meio do lote')
+    assert not os.path.exists(os.path.join(pasta, colunar.CABECALHO))
+    with pytest.raises(FileNotFoundError):
+        colunar.abrir(pasta)
+    # os .npy ficam com o cabeçalho de 0 linhas, não com dados parciais
+    assert np.load(os.path.join(pasta, 'tbs.npy')).shape == (0,)
@@ -0,0 +1,98 @@
+import itertools
+import tracemalloc
+
+import numpy as np
+
+import fluxo
+import psicrometria as ps
+
+NOMES = ['tempo', 'tbs', 'ur']
+
+
+def _leituras(n, passo=60., inicio=0.):
+    # leituras sintéticas: ciclo diário de tbs e ur (%)
+    t = inicio + passo * np.arange(n)
+    tbs = 20. + 8. * np.sin(2 * np.pi * t / 86400.)
+    ur = 60. + 35. * np.cos(2 * np.pi * t / 86400.)
+    return np.column_stack((t, tbs, ur))
+
+
+def _agregar(leituras, tamanho=7, **opcoes):
+    return list(fluxo.agregar(fluxo.blocos_de_leituras(
+        map(tuple, leituras), NOMES, tamanho), **opcoes))
+
+
+def test_limites_das_janelas():
+    # 3 h de leituras por minuto em blocos de 7 (não alinhados às janelas);
+    # a leitura em t = 3600 já é da segunda janela
+    resumos = _agregar(_leituras(180), janela=3600.)
+    assert [r['inicio'] for r in resumos] == [0., 3600., 7200.]
+    assert [r['fim'] for r in resumos] == [3600., 7200., 10800.]
+    assert [r['n'] for r in resumos] == [60, 60, 60]
+    leituras = _leituras(180)
+    for r, k in zip(resumos, range(3)):
+        janela = leituras[60 * k:60 * (k + 1)]
+        assert r['max']['tbs'] == janela[:, 1].max()
+        assert r['min']['tbs'] == janela[:, 1].min()
+        assert abs(r['media']['tbs'] - janela[:, 1].mean()) < 1e-12
+
+
+def test_leituras_fora_de_ordem_descartadas():
+    leituras = _leituras(120)
+    # atrasadas: uma repetição antiga dentro do bloco e três no bloco
+    # seguinte, todas mais antigas que a última leitura aceita
+    atrasadas = leituras[[10, 11, 12]]
+    sequencia = np.vstack((leituras[:30], leituras[[5]], leituras[30:70],
+                           atrasadas, leituras[70:]))
+    resumos = _agregar(sequencia, tamanho=10, janela=3600.)
+    assert [r['n'] for r in resumos] == [60, 60]
+    assert [r['atrasadas'] for r in resumos] == [1, 3]
+    # tempo igual ao da anterior não é atrasado
+    repetida = np.vstack((leituras[:10], leituras[[9]], leituras[10:60]))
+    assert _agregar(repetida, janela=3600.)[0]['n'] == 61
+
+
+def test_grau_horas_igual_a_soma_direta():
+    leituras = _leituras(600, passo=45.)
+    leituras[300:, 0] += 2000.   # falha do sensor: passo limitado
+    resumos = _agregar(leituras, tamanho=13, janela=1800., limite_tpo=12.,
+                       passo_max=600.)
+    p = ps.pe_tbs_ur(ps.Contexto(ps.pressao_atmosferica(0.)), leituras[:, 1],
+                     leituras[:, 2] / 100.)
+    t = leituras[:, 0]
+    horas = np.minimum(np.diff(t, prepend=t[0]), 600.) / 3600.
+    grau = np.maximum(p.tpo - 12., 0.) * horas
+    neblina = np.where(p.tbs - p.tpo <= 1., horas, 0.)
+    ids = np.floor(t / 1800.)
+    for r in resumos:
+        k = ids == r['inicio'] / 1800.
+        assert r['n'] == k.sum()
+        assert abs(r['grau_horas_tpo'] - grau[k].sum()) < 1e-9
+        assert abs(r['horas_neblina'] - neblina[k].sum()) < 1e-9
+    assert sum(r['grau_horas_tpo'] for r in resumos) > 0.
+    assert sum(r['horas_neblina'] for r in resumos) > 0.
+
+
+def _pico(janelas):
+    # pico de memória ao consumir (sem guardar) 'janelas' resumos de um
+    # fluxo sem fim; devolve o pico e o último resumo
+    def blocos():
+        for k in itertools.count():
+            yield NOMES, _leituras(60, inicio=3600. * k)
+    tracemalloc.start()
+    try:
+        for resumo in itertools.islice(fluxo.agregar(blocos()), janelas):
+            pass
+        return tracemalloc.get_traced_memory()[1], resumo
+    finally:
+        tracemalloc.stop()
+
+
+def test_memoria_constante_entre_janelas():
+    _pico(2)
+    pico_5, _ = _pico(5)
+    pico_300, ultimo = _pico(300)
+    assert ultimo['inicio'] == 299 * 3600. and ultimo['n'] == 60
+    # 60 vezes mais janelas, mesma memória de trabalho (a menos de ruído
+    # de alguns kB); um acúmulo de 1 leitura por janela já passaria disso
+    assert pico_300 < 1.5 * pico_5
@@ -0,0 +1,60 @@
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+import grafico
+import psicrometria as ps
+
+
+def test_isolinhas_na_carta():
+    grade = grafico.isolinhas(92.)
+    rm_sat = ps.razao_mistura1(ps.pressao_vapor_saturado(grade['tbs']), 92.)
+    # 100 % é a curva de saturação; nada acima dela nem fora do gráfico
+    np.testing.assert_allclose(grade['rm_ur'][-1][np.isfinite(
+        grade['rm_ur'][-1])], rm_sat[rm_sat <= grafico.RM_MAX], rtol=1e-12)
+    for nome in grafico.FAMILIAS:
+        rm = grade['rm_' + nome]
+        assert rm.shape == (len(grade['niveis_' + nome]), len(grade['tbs']))
+        ok = np.isfinite(rm)
+        assert ok.any(axis=1).sum() >= 3, nome
+        assert (rm[ok] >= 0.).all() and (rm[ok] <= grafico.RM_MAX).all()
+        assert (rm <= rm_sat * 1.000001)[ok].all()
+
+
+def test_svg_valido():
+    raiz = ET.fromstring(grafico.grafico_svg(altitude=800.))
+    assert raiz.tag == '{http://www.w3.org/2000/svg}svg'
+    linhas = raiz.findall('{http://www.w3.org/2000/svg}polyline')
+    assert {e.get('class') for e in linhas} == {'sat', 'ur', 'tbm', 'e',
+                                                've'}
+
+
+def test_cache_reaproveitado_e_recalculado(tmp_path, monkeypatch):
+    cache = str(tmp_path / 'cache')
+    svg = grafico.grafico_svg(patm=90., cache=cache)
+    pasta = grafico._diretorio(cache, 90., grafico.TBS_MIN, grafico.TBS_MAX,
+                               grafico.RM_MAX, grafico.PASSO)
+    assert not [a for a in os.listdir(pasta) if a.endswith('.tmp')]
+    calculos = []
+    calcular = grafico.calcular_isolinhas
+
+    def contar(*args):
+        calculos.append(args)
+        return calcular(*args)
+
+    monkeypatch.setattr(grafico, 'calcular_isolinhas', contar)
+    # acerto: SVG e isolinhas saem do cache, sem recalcular
+    assert grafico.grafico_svg(patm=90., cache=cache) == svg
+    grade = grafico.isolinhas(90., cache)
+    assert isinstance(grade['rm_tbm'], np.memmap) and not calculos
+    # sem o marcador (gravação interrompida) o cache não vale: recalcula e
+    # regrava, mesmo com um SVG pela metade na pasta
+    os.remove(os.path.join(pasta, 'completo'))
+    with open(os.path.join(pasta, 'grafico.svg'), 'w') as f:
+        f.write(svg[:100])
+    assert grafico.grafico_svg(patm=90., cache=cache) == svg
+    assert len(calculos) == 1
+    assert os.path.exists(os.path.join(pasta, 'completo'))
+    with open(os.path.join(pasta, 'grafico.svg'), encoding='utf-8') as f:
+        assert f.read() == svg
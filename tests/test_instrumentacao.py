@@ -0,0 +1,32 @@
+import numpy as np
+
+import preguicoso
+import psicrometria as ps
+import rapido
+from instrumentacao import Instrumentacao
+
+
+def _nomes(instr):
+    return [c['nome'] for c in instr.relatorio()['calculos']]
+
+
+def test_rapido_conta_pvs_e_tbm():
+    instr = Instrumentacao()
+    rapido.pe_tbs_ur(ps.Contexto(101.325, instr=instr), np.full(10, 25.), .5)
+    assert _nomes(instr) == ['pe_tbs_ur']
+    total = instr.relatorio()['total']
+    assert total['pontos'] == 10
+    assert total['pvs']['avaliacoes'] > 0
+    assert total['solvers']['tbm']['pontos'] == 10
+
+
+def test_preguicoso_sem_avulso():
+    # cada acesso que calcula vira um cálculo; nada cai em 'avulso'
+    instr = Instrumentacao()
+    p = preguicoso.pe_tbs_ur(ps.Contexto(101.325, instr=instr),
+                             np.full(10, 25.), .5)
+    p.e, p.tbm, p.e
+    assert _nomes(instr) == ['preguicoso.e', 'preguicoso.tbm']
+    total = instr.relatorio()['total']
+    assert total['pontos'] == 20
+    assert total['solvers']['tbm']['pontos'] == 10
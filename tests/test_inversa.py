@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+import inversa
+import psicrometria as ps
+
+ALGEBRICOS = [('ur', 'rm'), ('e', 'rm'), ('ve', 'e'), ('tpo', 'ur'),
+              ('tbs', 'tpo'), ('e', 'ur'), ('tpo', 'e'), ('ve', 'rm')]
+
+
+def _estados(patm, n=4000, semente=5):
+    # estados no domínio do índice padrão (tbs de -20 a 60 °C, rm de 1e-5
+    # a 0.05 kg/kg), inclusive abaixo de 0 °C, e a pressão de cada um
+    rng = np.random.default_rng(semente)
+    tbs = rng.uniform(-15., 55., n)
+    ur = rng.uniform(.05, .95, n)
+    patm = np.broadcast_to(patm, (n,))
+    rm = ps.pe_tbs_ur(ps.Contexto(patm), tbs, ur).rm
+    dentro = (rm >= 1e-5) & (rm <= .05)
+    return ps.pe_tbs_ur(ps.Contexto(patm[dentro]), tbs[dentro], ur[dentro])
+
+
+@pytest.mark.parametrize('par', ALGEBRICOS)
+@pytest.mark.parametrize('por_linha', [False, True])
+def test_ida_e_volta_pares_algebricos(par, por_linha):
+    # todo estado do domínio volta a partir de qualquer par de propriedades
+    patm = (ps.pressao_atmosferica(np.linspace(0., 3000., 4000)) if por_linha
+            else 101.325)
+    p = _estados(patm)
+    q = inversa.pe_par(ps.Contexto(p.patm), par[0], getattr(p, par[0]),
+                       par[1], getattr(p, par[1]))
+    assert p.tbs.size > 3500
+    assert np.max(np.abs(q.tbs - p.tbs)) < 1e-7
+    np.testing.assert_allclose(q.rm, p.rm, rtol=1e-7)
+
+
+@pytest.mark.parametrize('par', ALGEBRICOS + [('tbm', 'ur')])
+def test_fora_do_dominio_e_nan(par):
+    # rm acima de rm_max (quente e úmido) e tbs acima de tbs_max
+    rng = np.random.default_rng(3)
+    tbs = np.concatenate((rng.uniform(45., 60., 500),
+                          np.linspace(61., 80., 50)))
+    ur = np.concatenate((rng.uniform(.3, .95, 500), np.full(50, .05)))
+    p = ps.pe_tbs_ur(ps.Contexto(101.325), tbs, ur)
+    fora = (p.rm > .0501) | (p.tbs > 60.01)
+    assert fora.sum() > 200
+    q = inversa.pe_par(ps.Contexto(101.325), par[0], getattr(p, par[0])[fora],
+                       par[1], getattr(p, par[1])[fora])
+    assert np.isnan(q.tbs).all() and np.isnan(q.rm).all()
+
+
+def test_tpo_abaixo_de_zero_volta_ao_mesmo_estado():
+    # tpo informado por pe_tbs_ur (ajuste sobre água) com tpo < 0 °C
+    p = ps.pe_tbs_ur(ps.Contexto(101.325), np.linspace(-10., 10., 50), .3)
+    assert np.all(p.tpo < 0.)
+    q = inversa.pe_par(ps.Contexto(101.325), 'tbs', p.tbs, 'tpo', p.tpo)
+    np.testing.assert_allclose(q.rm, p.rm, rtol=1e-12)
+    np.testing.assert_allclose(q.ur, p.ur, rtol=1e-9)
+
+
+def test_ida_e_volta_com_tbm():
+    p = _estados(101.325, semente=6)
+    q = inversa.pe_par(ps.Contexto(101.325), 'tbm', p.tbm, 'ur', p.ur)
+    longe = np.abs(p.tbm) >= .02
+    assert longe.sum() > 3500
+    assert np.max(np.abs(q.tbs - p.tbs)[longe]) < 5e-4
+
+
+@pytest.mark.parametrize('par', [('tbm', 'ur'), ('tbm', 'rm'), ('ve', 'tbm'),
+                                 ('tbm', 'tpo')])
+def test_tbm_perto_de_zero(par):
+    # salto de pvs em 0 °C: com |tbm| < 0.02 °C o par pode sair NaN ou com
+    # erro até 0.01 °C; fora dessa faixa, sempre volta
+    rng = np.random.default_rng(1)
+    p = ps.pe_tbs_ur(ps.Contexto(101.325), rng.uniform(-3., 6., 20000),
+                     rng.uniform(.05, .95, 20000))
+    q = inversa.pe_par(ps.Contexto(101.325), par[0], getattr(p, par[0]),
+                       par[1], getattr(p, par[1]))
+    erro = np.abs(q.tbs - p.tbs)
+    perto = np.abs(p.tbm) < .02
+    assert perto.sum() > 20
+    assert np.max(erro[~perto]) < 5e-4
+    ok = np.isfinite(erro[perto])
+    assert np.max(erro[perto][ok]) < .01
+    assert ok.mean() > .5
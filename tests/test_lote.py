@@ -0,0 +1,74 @@
+import io
+import sys
+
+import numpy as np
+
+import lote
+import psicrometria as ps
+
+MAR = ps.Contexto(ps.pressao_atmosferica(0.))   # padrão sem altitude/patm
+
+CSV = 'tbs,ur\n' + ''.join('{},{}\n'.format(t, u) for t, u in
+                           zip(np.linspace(-10., 40., 10),
+                               np.linspace(10., 100., 10)))
+
+
+def _processar(texto, **opcoes):
+    saida = io.StringIO()
+    linhas, _ = lote.processar_csv(io.StringIO(texto), saida, **opcoes)
+    return linhas, saida.getvalue().splitlines()
+
+
+def _tabela(linhas):
+    return np.array([[float(v) for v in linha.split(',')]
+                     for linha in linhas[1:]])
+
+
+def test_blocos_menores_que_o_arquivo():
+    # blocos de 3 linhas (o último incompleto) e de 5 (o último exato)
+    _, inteiro = _processar(CSV)
+    for tamanho in (3, 5, 1):
+        linhas, saida = _processar(CSV, tamanho_bloco=tamanho)
+        assert linhas == 10
+        assert saida == inteiro
+    assert inteiro[0] == ','.join(lote.SAIDA) and len(inteiro) == 11
+
+
+def test_altitude_e_patm_por_linha():
+    texto = ('tbs,ur,altitude,patm\n'
+             '25,50,0,nan\n'
+             '25,50,1500,nan\n'
+             '25,50,1500,90\n'
+             '25,50,,\n')
+    _, saida = _processar(texto, patm=95., tamanho_bloco=2)
+    t = _tabela(saida)
+    patm = np.array([ps.pressao_atmosferica(0.), ps.pressao_atmosferica(1500.),
+                     90., 95.])
+    np.testing.assert_allclose(t[:, lote.SAIDA.index('patm')], patm,
+                               atol=5e-4)
+    p = ps.pe_tbs_ur(ps.Contexto(patm), 25., .5)
+    np.testing.assert_allclose(t[:, lote.SAIDA.index('rm')], p.rm * 1000.,
+                               atol=5e-5)
+
+
+def test_campo_vazio_vira_nan():
+    texto = 'tbs,ur\n20,50\n,50\n25,\n30,40\n'
+    linhas, saida = _processar(texto, tamanho_bloco=3)
+    t = _tabela(saida)
+    assert linhas == 4 and t.shape == (4, len(lote.SAIDA))
+    assert np.isnan(t[1:3, lote.SAIDA.index('e')]).all()
+    p = ps.pe_tbs_ur(MAR, [20., 30.], [.5, .4])
+    np.testing.assert_allclose(t[[0, 3], lote.SAIDA.index('e')], p.e,
+                               atol=5e-4)
+
+
+def test_entrada_padrao(monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'stdin', io.StringIO(CSV))
+    lote.principal(['--csv', '-', '--bloco', '4',
+                    '--propriedades', 'tbs,e'])
+    saida = capsys.readouterr()
+    linhas = saida.out.splitlines()
+    assert linhas[0] == 'tbs,e' and len(linhas) == 11
+    assert '10 linhas' in saida.err
+    p = ps.pe_tbs_ur(MAR, np.linspace(-10., 40., 10), np.linspace(.1, 1., 10))
+    np.testing.assert_allclose(_tabela(linhas)[:, 1], p.e, atol=5e-4)
@@ -0,0 +1,47 @@
+import numpy as np
+
+import memo
+import psicrometria as ps
+
+
+def test_repeticoes_no_lote_sao_acertos():
+    cache = memo.MemoEstados()
+    ctx = ps.Contexto(101.325)
+    cache.calcular(ctx, 'ur', np.array([20., 20., 20., 25.]), .5)
+    e = cache.estatisticas()
+    assert (e['consultas'], e['calculados'], e['acertos']) == (4, 2, 2)
+    cache.calcular(ctx, 'ur', np.array([20., 30.]), .5)
+    e = cache.estatisticas()
+    assert (e['consultas'], e['calculados'], e['acertos']) == (6, 3, 3)
+
+
+def test_tabela_ordenada_e_igual_ao_calculo_direto():
+    # vários lotes intercalados: chaves continuam ordenadas e os valores
+    # são os do ponto quantizado
+    cache = memo.MemoEstados()
+    ctx = ps.Contexto(101.325)
+    rng = np.random.default_rng(8)
+    for _ in range(5):
+        tbs = np.round(rng.uniform(-10., 40., 300), 2)
+        ur = np.round(rng.uniform(.1, 1., 300), 4)
+        p = cache.calcular(ctx, 'ur', tbs, ur)
+        direto = ps.pe_tbs_ur(ctx, tbs, ur)
+        for nome in ps.PROPRIEDADES:
+            np.testing.assert_allclose(getattr(p, nome),
+                                       getattr(direto, nome), rtol=1e-9)
+    chaves = cache._tabelas['ur'].chaves
+    assert np.all(np.diff(chaves) > 0)
+
+
+def test_capacidade_mantem_os_mais_recentes():
+    cache = memo.MemoEstados(capacidade=50)
+    ctx = ps.Contexto(101.325)
+    cache.calcular(ctx, 'ur', np.linspace(0., 10., 40), .5)
+    recentes = np.linspace(20., 30., 40)
+    cache.calcular(ctx, 'ur', recentes, .5)
+    tab = cache._tabelas['ur']
+    assert tab.chaves.size == 50
+    assert np.all(np.diff(tab.chaves) > 0)
+    chaves, _ = cache._chaves('ur', np.full(40, 101.325), recentes,
+                              np.full(40, .5))
+    assert np.all(tab.buscar(chaves) >= 0)
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+import paralelo
+import psicrometria as ps
+
+
+def _amostra(n, semente):
+    rng = np.random.default_rng(semente)
+    return (rng.uniform(-20., 50., n), rng.uniform(.05, 1., n),
+            rng.uniform(80., 101.325, n))
+
+
+@pytest.mark.parametrize('par', ['ur', 'tpo'])
+def test_pontos_estado_igual_ao_serial(par):
+    # blocos pequenos forçam o pool; o resultado é bit a bit o serial
+    tbs, ur, patm = _amostra(3001, 3)
+    x = ur if par == 'ur' else tbs - 10. * ur
+    serial = ps.PARES[par](ps.Contexto(patm), tbs, x)
+    r = paralelo.pontos_estado(par, tbs, x, patm, trabalhadores=2,
+                               tamanho_bloco=500)
+    for nome in ps.PROPRIEDADES:
+        np.testing.assert_array_equal(getattr(r, nome), getattr(serial, nome))
+
+
+def test_processo_igual_ao_serial():
+    tbs, ur, patm = _amostra(2001, 4)
+    serial = paralelo._processo_bloco('aquece_resfria', patm, tbs1=tbs,
+                                      ur1=ur, tbs2=tbs + 5.)
+    r = paralelo.processo('aquece_resfria', patm, trabalhadores=2,
+                          tamanho_bloco=300, tbs1=tbs, ur1=ur, tbs2=tbs + 5.)
+    assert set(r) == set(serial)
+    for nome in serial:
+        np.testing.assert_array_equal(r[nome], serial[nome])
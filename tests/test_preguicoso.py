@@ -0,0 +1,70 @@
+import copy
+import pickle
+
+import numpy as np
+import pytest
+
+import escalar
+import preguicoso
+import psicrometria as ps
+from instrumentacao import Instrumentacao
+
+
+@pytest.mark.parametrize('tbs, ur', [
+    (25., .5), (np.array([20., 30.]), np.array([.4, .6]))])
+def test_copia_e_pickle(tbs, ur):
+    p = preguicoso.pe_tbs_ur(ps.Contexto(101.325), tbs, ur)
+    p.e
+    for q in (copy.copy(p), copy.deepcopy(p), pickle.loads(pickle.dumps(p))):
+        assert q.calculadas() == p.calculadas()
+        np.testing.assert_array_equal(q.e, p.e)
+        # o que faltava continua preguiçoso na cópia, e só nela
+        np.testing.assert_allclose(q.tbm, ps.pe_tbs_ur(ps.Contexto(101.325),
+                                                       tbs, ur).tbm)
+        assert 'tbm' not in p.calculadas()
+
+
+def test_nomes_com_sublinhado_nao_sao_propriedades():
+    p = preguicoso.pe_tbs_ur(ps.Contexto(101.325), 25., .5)
+    with pytest.raises(AttributeError):
+        p._inexistente
+    assert not hasattr(p, '__array__')
+
+
+@pytest.mark.parametrize('par, x', [('ur', .5), ('tpo', 12.), ('tbm', 18.)])
+def test_e_rm_pv_sem_solver_de_tbm(par, x):
+    # ler e, rm e pv não roda o solver de bulbo molhado; só tbm roda
+    instr = Instrumentacao()
+    ctx = ps.Contexto(101.325, instr=instr)
+    p = preguicoso.PARES[par](ctx, np.linspace(20., 30., 50),
+                              np.full(50, x))
+    p.e, p.rm, p.pv, p.ve
+
+    def solvers():
+        return instr.relatorio()['total']['solvers']
+
+    assert 'tbm' not in solvers()
+    assert instr.relatorio()['total']['pvs']['avaliacoes'] > 0
+    p.tbm
+    if par == 'tbm':
+        assert 'tbm' not in solvers()
+    else:
+        assert solvers()['tbm']['pontos'] == 50
+
+
+def test_tbm_escalar_saturado_sem_solver(monkeypatch):
+    chamadas = []
+    solver = escalar.temperatura_b_molhado
+
+    def contar(*args):
+        chamadas.append(args)
+        return solver(*args)
+
+    monkeypatch.setattr(escalar, 'temperatura_b_molhado', contar)
+    ctx = ps.Contexto(101.325)
+    assert preguicoso.pe_tbs_tpo(ctx, 20., 20.).tbm == 20.
+    assert not chamadas
+    p = preguicoso.pe_tbs_tpo(ctx, 20., 10.)
+    assert p.tbm == pytest.approx(ps.pe_tbs_tpo(ctx, 20., 10.).tbm,
+                                  abs=1e-4)
+    assert len(chamadas) == 1
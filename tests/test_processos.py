@@ -0,0 +1,192 @@
+import threading
+
+import numpy as np
+
+import processos
+import psicrometria as ps
+from instrumentacao import Instrumentacao
+
+
+def test_serpentina_adp_avisos_independentes():
+    # uma linha inválida e outra com neblina: os dois avisos aparecem
+    ctx = ps.Contexto(101.325)
+    r = processos.serpentina_adp(ctx, np.array([30., 35., 10.]),
+                                 np.array([.5, .95, .5]),
+                                 np.array([5., 25., 12.]), .1)
+    assert 'inválida' in r.aviso and 'neblina' in r.aviso
+    assert np.isnan(r.pontos[1].tbs[2])
+    r = processos.serpentina_adp(ctx, 30., .5, 10., .1)
+    assert r.aviso is None
+
+
+def test_serpentina_adp_conta_pvs_do_adp():
+    instr = Instrumentacao()
+    ctx = ps.Contexto(101.325, instr=instr)
+    processos.serpentina_adp(ctx, np.full(7, 30.), .5, 10., .1)
+    sem_adp = Instrumentacao()
+    ps.pe_tbs_ur(ps.Contexto(101.325, instr=sem_adp), np.full(7, 30.), .5)
+    avaliacoes = instr.relatorio()['total']['pvs']['avaliacoes']
+    # entrada, ADP e saída: mais avaliações que só o ponto de entrada
+    assert avaliacoes > sem_adp.relatorio()['total']['pvs']['avaliacoes']
+    assert [c['nome'] for c in instr.relatorio()['calculos']] == \
+        ['serpentina_adp']
+
+
+def _balanco(r):
+    # vazões de ar seco, médias ponderadas de rm e e das entradas
+    entradas, mistura = r.pontos[0], r.pontos[-1]
+    m = entradas.q / entradas.ve
+    media = [(m * v).sum(axis=-1) / m.sum(axis=-1)
+             for v in (entradas.tbs, entradas.rm, entradas.e)]
+    return m.sum(axis=-1), media, mistura
+
+
+def test_mistura_n_fluxos_conserva_massa_e_energia():
+    rng = np.random.default_rng(11)
+    tbs = rng.uniform(5., 35., (50, 4))
+    ur = rng.uniform(.2, .7, (50, 4))
+    q = rng.uniform(500., 5000., (50, 4))
+    ctx = ps.Contexto(np.linspace(85., 101.325, 50))
+    r = processos.mistura_n_fluxos(ctx, tbs, ur, q)
+    m, (tbs_m, rm_m, e_m), p3 = _balanco(r)
+    assert r.aviso is None and (r.neblina == 0.).all()
+    assert p3.tbs.shape == (50,)
+    np.testing.assert_allclose(p3.q / p3.ve, m, rtol=1e-12)
+    np.testing.assert_allclose(p3.rm, rm_m, rtol=1e-12)
+    np.testing.assert_allclose(p3.e, e_m, rtol=1e-12)
+    np.testing.assert_allclose(p3.tbs, tbs_m, rtol=1e-12)
+
+
+def test_mistura_com_neblina_fica_na_saturacao():
+    # ar muito frio e ar quente, ambos saturados: a reta de mistura corta a
+    # curva de saturação; a última linha (ar a 50 %) não forma neblina
+    ctx = ps.Contexto(101.325)
+    tbs = np.array([[-10., 35., 30.], [-5., 40., 20.], [10., 20., 15.]])
+    ur = np.array([[1.], [1.], [.5]])
+    r = processos.mistura_n_fluxos(ctx, tbs, ur, [[3000., 3000., 1000.]])
+    m, (tbs_m, rm_m, e_m), p3 = _balanco(r)
+    neblina = r.neblina > 0
+    assert 'Neblina' in r.aviso
+    assert neblina[:2].all() and not neblina[2]
+    assert (r.neblina >= 0).all()
+    # água: vapor + líquido em suspensão somam a média das entradas
+    np.testing.assert_allclose(p3.rm + r.neblina, rm_m, rtol=1e-12)
+    np.testing.assert_allclose(p3.e, e_m, rtol=1e-12)
+    rm_sat = ps.razao_mistura1(ps.pressao_vapor_saturado(p3.tbs), 101.325)
+    np.testing.assert_allclose(p3.rm[neblina], rm_sat[neblina], rtol=1e-9)
+    assert (p3.ur[neblina] == 1.).all()
+    np.testing.assert_allclose(ps.entalpia(p3.tbs, p3.rm)[neblina],
+                               e_m[neblina], atol=2e-3)
+    assert (p3.tbs[neblina] >= tbs_m[neblina]).all()
+    assert (p3.tbs[neblina] <= e_m[neblina] / 1.006).all()
+
+
+def test_mistura_n_fluxos_com_dois_igual_a_mistura_fluxos():
+    ctx = ps.Contexto(95.)
+    tbs1, ur1 = np.array([10., 30., -5.]), np.array([.8, .4, 1.])
+    tbs2, ur2 = np.array([25., 22., 35.]), np.array([.5, .6, 1.])
+    r2 = processos.mistura_fluxos(ctx, tbs1, ur1, 2000., tbs2, ur2, 3500.)
+    rn = processos.mistura_n_fluxos(ctx, np.stack((tbs1, tbs2), -1),
+                                    np.stack((ur1, ur2), -1), [2000., 3500.])
+    for nome in ps.PROPRIEDADES + ('q',):
+        np.testing.assert_array_equal(getattr(r2.pontos[2], nome),
+                                      getattr(rn.pontos[1], nome), nome)
+        np.testing.assert_array_equal(getattr(r2.pontos[0], nome),
+                                      getattr(rn.pontos[0], nome)[..., 0])
+    np.testing.assert_array_equal(r2.neblina, rn.neblina)
+    assert r2.aviso == rn.aviso
+    # fluxo 1 já calculado (PontoEstado) dá a mesma mistura
+    p1 = ps.pe_tbs_ur(ctx, tbs1, ur1)
+    r3 = processos.mistura_fluxos(ctx, p1, None, 2000., tbs2, ur2, 3500.)
+    np.testing.assert_allclose(r3.pontos[2].tbs, r2.pontos[2].tbs,
+                               rtol=1e-12)
+
+
+def _isentalpico(r):
+    # o ponto 2 está na linha de entalpia do ponto 1
+    p1, p2 = r.pontos
+    ok = np.isfinite(p2.tbs)
+    np.testing.assert_allclose(ps.entalpia(p2.tbs, p2.rm)[ok],
+                               np.broadcast_to(p1.e, ok.shape)[ok],
+                               rtol=1e-12)
+    return p1, p2, ok
+
+
+def test_umidificacao_adiabatica_alcanca_o_alvo():
+    ctx = ps.Contexto(np.array([101.325, 92., 80.]))
+    tbs1, ur1 = np.array([35., 30., 25.]), np.array([.2, .3, .4])
+    p1, p2, ok = _isentalpico(processos.u_adiabatica_tbs(
+        ctx, tbs1, ur1, [25., 22., 20.]))
+    assert ok.all()
+    np.testing.assert_array_equal(p2.tbs, [25., 22., 20.])
+    assert (p2.rm > p1.rm).all() and (p2.ur <= 1.).all()
+    r = processos.u_adiabatica_ur(ctx, tbs1, ur1, [.5, .8, .99])
+    p1, p2, ok = _isentalpico(r)
+    assert ok.all() and r.aviso is None
+    np.testing.assert_allclose(p2.ur, [.5, .8, .99], atol=1e-5)
+    assert (p2.tbs < p1.tbs).all() and (p2.tbs > p1.tbm).all()
+    r = processos.u_adiabatica_rm(ctx, tbs1, p1.rm, p1.rm + .002)
+    p1, p2, ok = _isentalpico(r)
+    assert ok.all() and r.aviso is None
+    np.testing.assert_allclose(p2.rm, p1.rm + .002, rtol=1e-12)
+    # ponto 1 já calculado dá o mesmo ponto 2
+    r2 = processos.u_adiabatica_rm(ctx, p1, None, p1.rm + .002)
+    np.testing.assert_allclose(r2.pontos[1].tbs, p2.tbs, rtol=1e-12)
+
+
+def test_umidificacao_alem_da_saturacao_da_nan_e_aviso():
+    ctx = ps.Contexto(101.325)
+    tbs1, ur1 = np.array([30., 30.]), np.array([.3, .3])
+    tbm1 = ps.pe_tbs_ur(ctx, 30., .3).tbm
+    # tbs2 abaixo do bulbo úmido: supersaturado
+    r = processos.u_adiabatica_tbs(ctx, tbs1, ur1, [25., tbm1 - 2.])
+    assert r.aviso is not None
+    assert np.isfinite(r.pontos[1].tbs[0]) and np.isnan(r.pontos[1].tbs[1])
+    # ur2 menor que ur1 ou acima de 1: não alcançável umidificando
+    r = processos.u_adiabatica_ur(ctx, 30., .3, np.array([.6, .2, 1.2]))
+    assert r.aviso is not None
+    assert np.isfinite(r.pontos[1].tbs[0])
+    assert np.isnan(r.pontos[1].tbs[1:]).all()
+    assert np.isnan(r.pontos[1].e[1:]).all()
+    # rm2 acima da saturação na linha de entalpia, e rm1 impossível
+    p1 = ps.pe_tbs_ur(ctx, 30., .3)
+    r = processos.u_adiabatica_rm(ctx, 30., p1.rm, np.array([.012, .03]))
+    assert r.aviso is not None
+    assert np.isfinite(r.pontos[1].tbs[0]) and np.isnan(r.pontos[1].tbs[1])
+    r = processos.u_adiabatica_rm(ctx, 30., .05, .06)
+    assert 'ponto 1' in r.aviso and np.isnan(r.pontos[1].tbs)
+
+
+def test_contextos_em_threads_nao_interferem():
+    # cada thread com a sua pressão; sem patm global, os resultados são os
+    # mesmos do cálculo sequencial
+    tbs, ur = np.linspace(0., 40., 200), np.linspace(.1, .9, 200)
+    pressoes = (101.325, 70.1, 92.08, 84.)
+    esperado = {patm: processos.u_adiabatica_ur(ps.Contexto(patm), tbs, ur,
+                                                .95).pontos[1].tbs
+                for patm in pressoes}
+    barreira = threading.Barrier(len(pressoes))
+    erros = []
+
+    def rodar(patm):
+        ctx = ps.Contexto(patm)
+        barreira.wait()
+        try:
+            for _ in range(20):
+                r = processos.u_adiabatica_ur(ctx, tbs, ur, .95)
+                if not (np.array_equal(r.pontos[1].tbs, esperado[patm],
+                                       equal_nan=True) and
+                        np.all(r.pontos[1].patm == patm)):
+                    erros.append(patm)
+        except Exception as erro:
+            erros.append(erro)
+
+    threads = [threading.Thread(target=rodar, args=(patm,))
+               for patm in pressoes]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not erros
+    assert not np.array_equal(esperado[101.325], esperado[70.1],
+                              equal_nan=True)
@@ -0,0 +1,196 @@
+"""
+ Testes do cálculo vetorizado (psicrometria.py) contra o escalar (escalar.py)
+"""
+import numpy as np
+import pytest
+
+import escalar
+import psicrometria as ps
+
+
+def _amostra(n=200, semente=0):
+    rng = np.random.default_rng(semente)
+    return (rng.uniform(-30., 55., n), rng.uniform(0.05, 1., n),
+            ps.pressao_atmosferica(rng.uniform(0., 3000., n)))
+
+
+def test_pvs_valores_de_referencia():
+    # pvs em kPa (tabela da ASHRAE): água a 25 °C e gelo a -10 °C
+    assert ps.pressao_vapor_saturado(25.) == pytest.approx(3.1699, rel=1e-3)
+    assert ps.pressao_vapor_saturado(-10.) == pytest.approx(0.25990, rel=1e-3)
+
+
+def test_pvs_ramos_elemento_a_elemento():
+    # ramos água/gelo escolhidos por elemento, iguais ao escalar
+    t = np.array([-40., -0.5, 0., 0.5, 30., 99.])
+    esperado = [escalar.pressao_vapor_saturado(float(x)) for x in t]
+    np.testing.assert_allclose(ps.pressao_vapor_saturado(t), esperado,
+                               rtol=1e-14)
+
+
+# Valores das funções originais de main.py (pe_tbs_ur, pe_tbs_tbm e
+# pe_tbs_tpo do programa interativo, com a pressão de p_atm), fixados aqui
+# para não depender das fórmulas compartilhadas: (par, altitude, tbs, x)
+# e (tbm, tpo, ur, rm, e, ve), x com ur em fração
+REFERENCIA = [
+    (('ur', 0., 25., .5),
+     (17.825, 13.863980596, .5, .0098806767622, 50.300027614, .85810344407)),
+    (('ur', 800., 32., .35),
+     (20.075, 14.631104301, .35, .011455388170, 61.492591862, .96886720401)),
+    (('ur', 1500., -5., .8),
+     (-5.9125, -8.5157423351, .8, .0023713999462, .87982509087,
+      .91381530874)),
+    (('ur', 0., 40., .9),
+     (38.325, 38.053069384, .9, .043639633029, 152.48113615, .94942741150)),
+    (('tbm', 0., 30., 22.),
+     (22., 18.442231691, .49982931216, .013304116785, 64.162040297,
+      .87722071263)),
+    (('tbm', 2000., 15., 10.),
+     (10., 6.5637085665, .57004427174, .0077006515182, 34.554359294,
+      1.0533942563)),
+    (('tpo', 0., 28., 15.),
+     (19.3875, 15., .45098254380, .010648272063, 55.328547552, .86779038146)),
+    (('tpo', 1000., 5., -2.),
+     (1.85625, -2., .59289643573, .0036007877194, 14.067527077,
+      .89355850974)),
+]
+
+
+@pytest.mark.parametrize('entrada, esperado', REFERENCIA)
+def test_valores_do_main_original(entrada, esperado):
+    # o solver de tbm de main.py para com ur em [0.999, 1): erro até 0.03 °C;
+    # as demais propriedades são fórmulas fechadas, iguais até o
+    # arredondamento
+    par, altitude, tbs, x = entrada
+    pontos = [ps.PARES[par](ps.Contexto.da_altitude(np.array([altitude])),
+                            np.array([tbs]), np.array([x])),
+              escalar.PARES[par](escalar.Contexto.da_altitude(altitude), tbs,
+                                 x)]
+    for p in pontos:
+        for nome, valor in zip(('tbm', 'tpo', 'ur', 'rm', 'e', 've'),
+                               esperado):
+            v = float(np.ravel(getattr(p, nome))[0])
+            if nome == 'tbm':
+                assert abs(v - valor) <= .03, (par, nome)
+            else:
+                assert v == pytest.approx(valor, rel=1e-9, abs=1e-12), \
+                    (par, nome)
+
+
+@pytest.mark.parametrize('par', ['ur', 'tbm', 'tpo'])
+def test_pontos_iguais_ao_escalar(par):
+    # cada propriedade do array coincide com o cálculo ponto a ponto
+    tbs, ur, patm = _amostra()
+    base = ps.pe_tbs_ur(ps.Contexto(patm), tbs, ur)
+    x = getattr(base, par)
+    p = ps.PARES[par](ps.Contexto(patm), tbs, x)
+    for i in range(tbs.size):
+        q = escalar.PARES[par](escalar.Contexto(float(patm[i])),
+                               float(tbs[i]), float(x[i]))
+        for nome in ps.PROPRIEDADES:
+            assert getattr(p, nome)[i] == pytest.approx(
+                getattr(q, nome), rel=1e-9, abs=1e-6), (par, nome, i)
+
+
+def test_broadcast_de_formatos():
+    # tbs (n, 1) x ur (m,) x patm escalar -> arrays (n, m)
+    tbs = np.linspace(0., 40., 5)[:, None]
+    ur = np.linspace(0.1, 0.9, 4)
+    p = ps.pe_tbs_ur(ps.Contexto(92.1), tbs, ur)
+    assert p.tbm.shape == (5, 4)
+    assert p.e[2, 3] == pytest.approx(
+        ps.pe_tbs_ur(ps.Contexto(92.1), 20., 0.9).e, rel=1e-14)
+
+
+def test_b_molhado_converge_na_tolerancia():
+    # Newton protegido: a raiz com tol=1e-4 fica a menos de 1e-4 °C da raiz
+    # apertada e entre o ponto de orvalho (exato, pela inversa de pvs) e tbs
+    tbs, ur, patm = _amostra(5000, 1)
+    p = ps.pe_tbs_ur(ps.Contexto(patm), tbs, ur)
+    exata = ps.temperatura_b_molhado(tbs, p.e, patm, tol=1e-12)
+    assert np.max(np.abs(p.tbm - exata)) < 1e-4
+    assert np.all(p.tbm <= tbs + 1e-9)
+    assert np.all(p.tbm >= ps.temperatura_pvs(p.pv) - 1e-6)
+    # passo de Newton restante desprezível, fora do salto de pvs em 0 °C
+    g, dg = ps.formulas.saturacao_g_dg(exata, p.e, patm,
+                                       *ps.pvs_e_derivada(exata))
+    liso = np.abs(exata) > 1e-6
+    assert np.max(np.abs(g / dg)[liso]) < 1e-5
+
+
+def test_b_molhado_poucas_iteracoes():
+    # nenhum ponto chega a max_iter; a maioria converge em poucos passos
+    from instrumentacao import Instrumentacao
+    tbs, ur, patm = _amostra(5000, 2)
+    instr = Instrumentacao()
+    ps.pe_tbs_ur(ps.Contexto(patm, instr=instr), tbs, ur)
+    solver = instr.relatorio()['total']['solvers']['tbm']
+    assert solver['no_limite'] == 0
+    assert solver['passos'] <= 10
+    assert solver['iteracoes'] / solver['pontos'] < 6
+
+
+def test_b_molhado_saturado_e_nan():
+    # ar saturado: tbm = tbs; NaN não contamina os outros pontos
+    tbs = np.array([20., np.nan, -5.])
+    p = ps.pe_tbs_ur(ps.Contexto(101.325), tbs, np.array([1., 0.5, 1.]))
+    assert p.tbm[0] == pytest.approx(20., abs=1e-3)
+    assert p.tbm[2] == pytest.approx(-5., abs=1e-3)
+    assert np.isnan(p.tbm[1])
+
+
+@pytest.mark.parametrize('par, x, esperado', [
+    ('ur', 1., {'ur': 0.99999}),
+    ('tbm', 20., {'ur': 1., 'tpo': 20.}),
+    ('tpo', 20., {'ur': 0.999999, 'tbm': 20.})])
+def test_casos_especiais_iguais_em_todos_os_modulos(par, x, esperado):
+    # regras de formulas.py: as mesmas na exata, escalar, preguiçosa e rápida
+    import preguicoso
+    import rapido
+    ctx = ps.Contexto(101.325)
+    pontos = [ps.PARES[par](ctx, np.array([20.]), np.array([x])),
+              escalar.PARES[par](escalar.Contexto(101.325), 20., x),
+              preguicoso.PARES[par](ctx, 20., x),
+              rapido.PARES[par](ctx, np.array([20.]), np.array([x]))]
+    for p in pontos:
+        for nome, valor in esperado.items():
+            assert float(np.ravel(getattr(p, nome))[0]) == pytest.approx(
+                valor, rel=1e-7)
+
+
+def test_pressao_por_linha_medida_altitude_padrao():
+    altitude = np.array([0., 1500., np.nan, np.nan, 800.])
+    patm = np.array([np.nan, np.nan, 90., np.nan, 95.])
+    p = ps.pressao_por_linha(altitude, patm, padrao=88.)
+    esperado = [ps.pressao_atmosferica(0.), ps.pressao_atmosferica(1500.),
+                90., 88., 95.]
+    np.testing.assert_array_equal(p, esperado)
+    # sem padrão vale o nível do mar; só uma das colunas também funciona
+    assert ps.pressao_por_linha(np.nan) == ps.pressao_atmosferica(0.)
+    np.testing.assert_array_equal(ps.pressao_por_linha(patm=patm)[[2, 3]],
+                                  [90., ps.pressao_atmosferica(0.)])
+    assert ps.pressao_por_linha() == ps.pressao_atmosferica(0.)
+
+
+@pytest.mark.parametrize('resolucao', [0., .5, 1., 2.5])
+def test_grupos_pressao_cobrem_cada_linha_uma_vez(resolucao):
+    rng = np.random.default_rng(2)
+    patm = rng.choice([101.325, 101.1, 92.08, 92.3, 80.], 500)
+    patm[::50] = np.nan
+    grupos = list(ps.grupos_pressao(patm.reshape(20, 25), resolucao))
+    indices = np.concatenate([i for _, i in grupos])
+    assert np.array_equal(np.sort(indices), np.arange(500))
+    valores = [v for v, _ in grupos]
+    assert len(set(valores)) == len(valores)
+    for valor, i in grupos:
+        assert (np.diff(i) > 0).all()
+        if np.isnan(valor):
+            assert np.isnan(patm[i]).all()
+        elif resolucao:
+            # cada linha arredondada para o múltiplo de resolucao do grupo
+            np.testing.assert_allclose(
+                np.round(patm[i] / resolucao) * resolucao, valor)
+            assert (np.abs(patm[i] - valor) <= resolucao / 2 + 1e-12).all()
+        else:
+            assert (patm[i] == valor).all()
+    assert len(grupos) == {0.: 6, .5: 6, 1.: 4, 2.5: 5}[resolucao]
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+import psicrometria as ps
+import rapido
+
+# limites do docstring de rapido.py (pior caso entre os três pares)
+LIMITES = {'tbm': 0.0054, 'tpo': 0.0022, 'ur': 2e-5, 'rm': 2.1e-4,
+           'e': 0.0035, 've': 3.1e-6}
+
+
+@pytest.mark.parametrize('par', sorted(ps.PARES))
+def test_erro_dentro_dos_limites_documentados(par):
+    # mesmo domínio de benchmarks/precisao.py
+    rng = np.random.default_rng(0)
+    n = 200000
+    tbs = rng.uniform(-20., 50., n)
+    ur = rng.uniform(0.05, 1., n)
+    ctx = ps.Contexto(ps.pressao_atmosferica(rng.uniform(0., 3000., n)))
+    x = getattr(ps.pe_tbs_ur(ctx, tbs, ur), par)
+    exata = ps.PARES[par](ctx, tbs, x)
+    rapida = rapido.PARES[par](ctx, tbs, x)
+    assert rapida.e.dtype == np.float32
+    for nome, limite in LIMITES.items():
+        a = getattr(exata, nome)
+        erro = np.abs(getattr(rapida, nome).astype(float) - a)
+        if nome == 'rm':
+            erro = erro / np.maximum(a, 1e-6)
+        assert np.nanmax(erro) <= limite, nome
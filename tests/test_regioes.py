@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+import psicrometria as ps
+import regioes
+
+
+def _pontos(patm, n=20000, semente=3):
+    # pontos espalhados no domínio (e um pouco fora) e pontos perto dos
+    # contornos, que caem nas células cortadas
+    rng = np.random.default_rng(semente)
+    tbs = rng.uniform(-55., 65., n)
+    rm = rng.uniform(-.002, .065, n)
+    t = rng.uniform(-50., 60., n)
+    rm_sat = ps.razao_mistura1(ps.pressao_vapor_saturado(t), patm)
+    perto = rm_sat * (1. + rng.uniform(-1e-3, 1e-3, n))
+    tg = rng.uniform(-50., 0., n)
+    geada = ps.razao_mistura1(ps.pressao_vapor_saturado(tg - 2.), patm)
+    geada *= 1. + rng.uniform(-1e-3, 1e-3, n)
+    tc = rng.uniform(18., 29., n)
+    rc = rng.uniform(-.001, .013, n)
+    return (np.concatenate((tbs, t, tg, tc)),
+            np.concatenate((rm, perto, geada, rc)))
+
+
+def _forca_bruta(indice, tbs, rm):
+    # paridade de cruzamentos contra todas as arestas de cada região
+    x = (tbs - indice.x0) / indice.dx
+    y = (rm - indice.y0) / indice.dy
+    return np.array([regioes._dentro(x, y, a) for a in indice.arestas])
+
+
+USUARIO = regioes.Regiao('usuario', [(15., .3), (30., .3), (30., .7),
+                                     (15., .7)], coordenadas='ur')
+
+
+@pytest.mark.parametrize('patm', [101.325, 84.5])
+def test_indice_igual_forca_bruta(patm):
+    indice = regioes.IndiceRegioes(patm, regioes.REGIOES + (USUARIO,))
+    tbs, rm = _pontos(patm)
+    p = indice.pertence(tbs, rm)
+    esperado = _forca_bruta(indice, tbs, rm)
+    for k, nome in enumerate(indice.nomes):
+        assert (p[k] == esperado[k]).all(), nome
+    classes = np.where(esperado.any(axis=0), esperado.argmax(axis=0), -1)
+    np.testing.assert_array_equal(indice.classificar(tbs, rm), classes)
+    assert indice.contar(tbs, rm)['nenhuma'] == \
+        int((~esperado.any(axis=0)).sum())
+
+
+def test_neblina_acima_da_saturacao():
+    # longe do contorno (fora do erro da curva em polígono), neblina é
+    # exatamente rm > rm de saturação
+    patm = 101.325
+    tbs, rm = _pontos(patm)
+    rm_sat = ps.razao_mistura1(ps.pressao_vapor_saturado(tbs), patm)
+    no_dominio = (tbs > -50.) & (tbs < 60.) & (rm > 0.) & (rm < .06)
+    longe = no_dominio & (np.abs(rm - rm_sat) > 1e-5)
+    neblina = regioes.obter_indice(patm).pertence(tbs, rm)[0]
+    np.testing.assert_array_equal(neblina[longe], (rm > rm_sat)[longe])
+
+
+def test_pressao_por_ponto_usa_indice_do_grupo():
+    # cada grupo usa o índice da pressão arredondada para resolucao
+    tbs, rm = _pontos(90., n=2000)
+    patm = np.where(np.arange(tbs.size) % 2, 101.2, 89.9)
+    p = regioes.pertence(tbs, rm, patm, resolucao=1.)
+    for valor in (101., 90.):
+        s = np.round(patm) == valor
+        np.testing.assert_array_equal(
+            p[:, s], regioes.obter_indice(valor).pertence(tbs[s], rm[s]))
+    assert (regioes.classificar(np.nan, .01, 101.325) == -1).all()
+
+
+def test_classificar_usa_pressao_exata():
+    # sem resolucao, patm não inteira usa o próprio índice: pontos 0.2 %
+    # acima da saturação são neblina (o índice de 101 kPa erraria todos)
+    t = np.linspace(0., 40., 2001)
+    rm = 1.002 * ps.razao_mistura1(ps.pressao_vapor_saturado(t), 101.325)
+    assert (regioes.classificar(t, rm, 101.325) == 0).all()
+    assert (regioes.classificar(t, .998 / 1.002 * rm, 101.325) != 0).all()
+    patm = np.full(t.shape, 92.08)
+    rm = 1.002 * ps.razao_mistura1(ps.pressao_vapor_saturado(t), patm)
+    assert regioes.contar(t, rm, patm)['neblina'] == t.size
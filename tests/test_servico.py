@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import numpy as np
+
+import psicrometria as ps
+import servico
+
+
+async def _rajada(agrupador, linhas):
+    # envia todas as linhas de uma vez numa conexão TCP e lê as respostas
+    servidor = await servico.iniciar(agrupador, porta=0)
+    porta = servidor.sockets[0].getsockname()[1]
+    try:
+        leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+        escritor.write(''.join(linha + '\n' for linha in linhas).encode())
+        await escritor.drain()
+        escritor.write_eof()
+        respostas = [json.loads(linha) for linha in
+                     (await leitor.read()).decode().splitlines()]
+        escritor.close()
+    finally:
+        servidor.close()
+        await servidor.wait_closed()
+    return respostas
+
+
+def test_rajada_em_ordem_com_um_pedido_invalido():
+    tbs = np.linspace(0., 40., 60)
+    linhas = [json.dumps({'id': i, 'op': 'ponto', 'par': 'ur',
+                          'tbs': float(t), 'ur': .5, 'altitude': 800.})
+              for i, t in enumerate(tbs)]
+    linhas[17] = json.dumps({'id': 17, 'op': 'ponto', 'par': 'ur',
+                             'tbs': 20.})
+    linhas[30] = '{"id": 30, "op": '
+    agrupador = servico.Agrupador(janela=.2)
+    respostas = asyncio.run(_rajada(agrupador, linhas))
+    # uma resposta por linha; os erros voltam sem esperar o microlote
+    assert len(respostas) == 60
+    por_id = {r['id']: r for r in respostas}
+    assert 'KeyError' in por_id[17]['erro']
+    assert 'JSONDecodeError' in por_id[None]['erro']
+    # os demais saem do mesmo microlote, na ordem enviada
+    validos = [r for r in respostas if 'erro' not in r]
+    assert [r['id'] for r in validos] == \
+        [i for i in range(60) if i not in (17, 30)]
+    assert agrupador.lotes == 1 and agrupador.pedidos == 58
+    ctx = ps.Contexto(ps.pressao_atmosferica(800.))
+    esperado = ps.pe_tbs_ur(ctx, tbs, .5)
+    i = [r['id'] for r in validos]
+    np.testing.assert_allclose([r['tbm'] for r in validos], esperado.tbm[i],
+                               rtol=1e-12)
+
+
+def test_microlote_fecha_por_tamanho_e_por_tempo():
+    async def rodar():
+        agrupador = servico.Agrupador(janela=.05, tamanho_max=4)
+        futuros = [agrupador.calcular({'op': 'ponto', 'par': 'tpo',
+                                       'tbs': 25., 'tpo': 10. + k})
+                   for k in range(10)]
+        # dois lotes cheios fecham na hora; os dois últimos esperam a janela
+        assert agrupador.lotes == 2
+        assert all(f.done() for f in futuros[:8])
+        assert not any(f.done() for f in futuros[8:])
+        await asyncio.sleep(.01)
+        assert agrupador.lotes == 2
+        respostas = await asyncio.gather(*futuros)
+        assert agrupador.lotes == 3 and agrupador.pedidos == 10
+        return respostas
+
+    respostas = asyncio.run(rodar())
+    assert [r['tpo'] for r in respostas] == \
+        [10. + k for k in range(10)]
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+import psicrometria as ps
+import tabela_pvs
+
+
+def test_erro_relativo_nos_dois_ramos():
+    # amostra densa de -40 a 100 °C: ramo gelo (t <= 0) e ramo água (t > 0)
+    tab = tabela_pvs.TabelaPvs.construir()
+    t = np.linspace(tabela_pvs.T_MIN, tabela_pvs.T_MAX, 200001)
+    erro = np.abs(tab.pvs(t) / ps.pressao_vapor_saturado(t) - 1)
+    assert np.max(erro[t <= 0]) < 1e-9
+    assert np.max(erro[t > 0]) < 1e-9
+    p, d = tab.pvs_e_derivada(t)
+    assert np.array_equal(p, tab.pvs(t))
+
+
+def test_troca_de_ramo_em_zero():
+    tab = tabela_pvs.TabelaPvs.construir()
+    t = np.array([-1e-9, 0., 1e-9])
+    assert tab.pvs(t) == pytest.approx(ps.pressao_vapor_saturado(t), rel=1e-9)
+
+
+def test_nan_e_infinito_vao_para_a_formula_exata():
+    tab = tabela_pvs.TabelaPvs.construir()
+    t = np.array([np.nan, 20., 150., -np.inf, np.inf, -60.])
+    with np.errstate(all='ignore'):
+        esperado = ps.pressao_vapor_saturado(t)
+        p = tab.pvs(t)
+        p2, d = tab.pvs_e_derivada(t)
+    np.testing.assert_allclose(p, esperado, rtol=1e-9)
+    np.testing.assert_array_equal(p2, p)
+    assert np.isnan(p[0]) and np.isnan(d[0])
+    assert np.isfinite(d[1])
+
+
+def test_arquivo_com_outros_pontos_por_grau_e_reconstruido(tmp_path):
+    caminho = str(tmp_path / 'pvs.npz')
+    tabela_pvs.obter_tabela(caminho, pontos_por_grau=5)
+    tab = tabela_pvs.obter_tabela(caminho, pontos_por_grau=20)
+    assert tab.pontos_por_grau == 20
+    assert tabela_pvs.TabelaPvs.carregar(caminho).pontos_por_grau == 20
+
+
+def test_arquivo_corrompido_e_recusado(tmp_path):
+    caminho = str(tmp_path / 'pvs.npz')
+    tab = tabela_pvs.obter_tabela(caminho)
+    tab.c0 = tab.c0 * (1 + 1e-6)
+    tab.salvar(caminho)
+    with pytest.raises(ValueError):
+        tabela_pvs.obter_tabela(caminho)
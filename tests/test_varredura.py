@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import cadeia
+import psicrometria as ps
+import varredura
+
+
+def _varredura():
+    return varredura.Varredura(tbs=np.linspace(10., 38., 5),
+                               ur=np.linspace(.2, .9, 4),
+                               altitude=[0., 1200.],
+                               q=[1000., 3000.],
+                               q_retorno=np.linspace(0., 6000., 3),
+                               ur2=[.4, .6])
+
+
+def _unidade():
+    return cadeia.Cadeia([cadeia.Mistura(24., .5, 'q_retorno'),
+                          cadeia.Umidificacao(ur='ur2')])
+
+
+def _forca_bruta(v, saidas):
+    # a mesma cadeia sobre a grade inteira montada com meshgrid
+    grade = dict(zip(v.eixos, np.meshgrid(*v.eixos.values(),
+                                          indexing='ij')))
+    ctx = ps.Contexto(ps.pressao_por_linha(grade['altitude'], None))
+    r = _unidade().calcular(ctx, 'tbs', 'ur', 'q', grade)
+    return {nome: np.broadcast_to(varredura._ler_saida(r, nome), v.forma)
+            for nome in saidas}
+
+
+@pytest.mark.parametrize('limite', [2000000, 100, 7, 1])
+def test_fatias_iguais_a_grade_inteira(limite):
+    # com limite pequeno as fatias cortam vários eixos; o resultado não muda
+    v = _varredura()
+    saidas = ('tbs', 'rm', 'e', 'entrada.tbm', 'vazao.mistura',
+              'agua.umidificacao')
+    r = v.calcular(_unidade(), q='q', saidas=saidas, limite=limite)
+    esperado = _forca_bruta(v, saidas)
+    for nome in saidas:
+        assert r[nome].shape == v.forma
+        np.testing.assert_allclose(r[nome], esperado[nome], rtol=1e-12,
+                                   atol=1e-12, err_msg=nome)
+
+
+def test_cortes_respeitam_limite():
+    v = _varredura()
+    for limite in (1, 7, 40, 100, 2000000):
+        eixos, passos = v._cortes(['tbs', 'ur', 'altitude'], limite)
+        assert eixos[0] == 0
+        tamanhos = [min(passos.get(k, n), n) for k, n in enumerate(v.forma)]
+        assert int(np.prod(tamanhos)) <= max(limite, 1)
+
+
+def test_ar_externo_nao_depende_de_q():
+    # o ponto externo tem a forma de (tbs, ur): q só entra na vazão
+    v = _varredura()
+    r = cadeia.Cadeia([]).calcular(ps.Contexto(101.325), 'tbs', 'ur', 'q',
+                                   v.grades())
+    assert r.estados['entrada'].tbs.shape == (5, 4, 1, 1, 1, 1)
+    assert r.vazoes['entrada'].shape == (5, 4, 1, 2, 1, 1)
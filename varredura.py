@@ -0,0 +1,206 @@
+"""
+ Varreduras paramétricas de projeto: processos sobre produtos cartesianos
+
+ Estudos de projeto rodam uma cadeia de processos (cadeia.py) sobre todas as
+ combinações de alguns parâmetros: tbs e ur externos x altitude x vazão de
+ retorno x ur desejada... Montar a grade inteira (meshgrid) e passar tudo
+ para a cadeia recalcularia o ponto de estado externo, com pvs e o solver de
+ bulbo molhado, para cada valor dos eixos que só entram depois.
+
+ Aqui cada eixo fica na sua própria dimensão (tamanho 1 nas demais) e os
+ cálculos seguem o broadcast do NumPy: o ar externo é calculado uma vez por
+ combinação (tbs, ur, altitude), a mistura uma vez por (tbs, ur, altitude,
+ retorno), e só a última etapa usa a grade inteira. Os parâmetros das
+ etapas e da entrada podem ser números ou nomes de eixos, como as colunas de
+ 'dados' em cadeia.py.
+
+      import cadeia, varredura
+      v = varredura.Varredura(tbs=np.arange(20., 40.5, .5),
+                              ur=np.linspace(.2, .9, 50),
+                              altitude=[0., 500., 1000., 1500.],
+                              q_retorno=np.linspace(0., 8000., 41),
+                              ur2=np.linspace(.3, .9, 31))
+      unidade = cadeia.Cadeia([cadeia.Mistura(24., .5, 'q_retorno'),
+                               cadeia.Umidificacao(ur='ur2')])
+      r = v.calcular(unidade, q=2000.,
+                     saidas=('tbs', 'rm', 'agua.umidificacao'))
+      r['tbs'].shape                        # (41, 50, 4, 41, 31)
+      r.sel(altitude=1000., ur2=.5)['tbs']  # fatia, por valor dos eixos
+      r.melhor('tbs')                       # eixos do menor valor
+
+ Saídas: 'prop' é a propriedade no fim da cadeia, 'etapa.prop' a da saída
+ de uma etapa ('entrada.prop' o ar externo) e 'carga.etapa', 'agua.etapa'
+ e 'vazao.etapa' as séries de ResultadoCadeia. Só as saídas pedidas ficam
+ guardadas (tipo float64 ou float32); a grade é calculada em fatias de até
+ 'limite' combinações, então a memória de trabalho não depende do tamanho da
+ varredura. O exemplo acima (1.04e7 combinações) leva uns 7 s e chega a
+ ~350 MB de memória, dos quais 250 MB são as três saídas guardadas; com
+ float32 elas caem à metade. As fatias seguem primeiro um eixo do ar
+ externo, e então nada de cima é recalculado; quando uma fatia desse eixo
+ sozinha passa de 'limite', cortam-se também os eixos seguintes, e as
+ etapas antes deles são refeitas em cada uma dessas fatias.
+"""
+import itertools
+
+import numpy as np
+
+import cadeia
+import psicrometria as ps
+
+
+class ResultadoVarredura:
+    # Arrays N-D rotulados: eixos (nome -> valores, na ordem das dimensões),
+    # dados (saída -> array com uma dimensão por eixo) e avisos por etapa
+    __slots__ = ('eixos', 'dados', 'avisos')
+
+    def __init__(self, eixos, dados, avisos=None):
+        self.eixos = eixos
+        self.dados = dados
+        self.avisos = avisos or {}
+
+    def __getitem__(self, nome):
+        return self.dados[nome]
+
+    @property
+    def forma(self):
+        return tuple(len(v) for v in self.eixos.values())
+
+    def sel(self, **valores):
+        # Seleciona pelo valor mais próximo nos eixos dados; esses eixos saem
+        # do resultado
+        for nome in valores:
+            if nome not in self.eixos:
+                raise KeyError('eixo {!r} não existe'.format(nome))
+        indices = []
+        eixos = {}
+        for nome, v in self.eixos.items():
+            if nome in valores:
+                indices.append(int(np.abs(v - valores[nome]).argmin()))
+            else:
+                indices.append(slice(None))
+                eixos[nome] = v
+        return ResultadoVarredura(eixos, {nome: d[tuple(indices)] for nome, d
+                                          in self.dados.items()}, self.avisos)
+
+    def melhor(self, nome, maximo=False):
+        # Valores dos eixos na combinação de menor (ou maior) saída nome,
+        # ignorando NaN; devolve (dict eixo -> valor, valor)
+        d = self.dados[nome]
+        i = np.nanargmax(d) if maximo else np.nanargmin(d)
+        indices = np.unravel_index(i, d.shape)
+        return ({eixo: float(v[k]) for (eixo, v), k in
+                 zip(self.eixos.items(), indices)}, float(d[indices]))
+
+    def como_xarray(self):
+        # xarray.Dataset com os mesmos eixos (requer o pacote xarray)
+        import xarray
+        return xarray.Dataset({nome: (tuple(self.eixos), d)
+                               for nome, d in self.dados.items()},
+                              coords=self.eixos)
+
+    def __repr__(self):
+        return 'ResultadoVarredura(eixos={!r}, saidas={!r})'.format(
+            {nome: len(v) for nome, v in self.eixos.items()}, list(self.dados))
+
+
+def _ler_saida(r, nome):
+    # Valor de uma saída num ResultadoCadeia
+    if '.' not in nome:
+        return getattr(list(r.estados.values())[-1], nome)
+    parte, resto = nome.split('.', 1)
+    if parte in ('carga', 'agua', 'vazao'):
+        series = {'carga': r.cargas, 'agua': r.agua, 'vazao': r.vazoes}
+        return series[parte][resto]
+    return getattr(r.estados[parte], resto)
+
+
+class Varredura:
+    # Eixos da varredura, na ordem das dimensões do resultado
+    def __init__(self, **eixos):
+        if not eixos:
+            raise ValueError('a varredura precisa de pelo menos um eixo')
+        self.eixos = {nome: np.atleast_1d(np.asarray(v, dtype=float))
+                      for nome, v in eixos.items()}
+        for nome, v in self.eixos.items():
+            if v.ndim != 1:
+                raise ValueError('eixo {!r} deve ser 1-D'.format(nome))
+
+    @property
+    def forma(self):
+        return tuple(len(v) for v in self.eixos.values())
+
+    def grades(self, fatias=None):
+        # Cada eixo como array com a sua dimensão e tamanho 1 nas demais;
+        # fatias: dicionário índice do eixo -> slice, só o trecho pedido
+        n = len(self.eixos)
+        fatias = fatias or {}
+        grades = {}
+        for k, (nome, v) in enumerate(self.eixos.items()):
+            if k in fatias:
+                v = v[fatias[k]]
+            forma = [1] * n
+            forma[k] = v.size
+            grades[nome] = v.reshape(forma)
+        return grades
+
+    def _cortes(self, entrada, limite):
+        # Eixos cortados em fatias e o passo de cada um, para no máximo
+        # 'limite' combinações por fatia: primeiro um eixo do ar externo
+        # (que assim é calculado uma vez só), depois, se ainda não bastar,
+        # os eixos seguintes na ordem das dimensões
+        nomes = list(self.eixos)
+        primeiro = min((nomes.index(nome) for nome in entrada), default=0)
+        ordem = [primeiro] + [k for k in range(len(nomes)) if k != primeiro]
+        tamanhos = list(self.forma)
+        eixos, passos = [], {}
+        for k in ordem:
+            total = int(np.prod(tamanhos))
+            if total <= limite and eixos:
+                break
+            resto = total // tamanhos[k]
+            passos[k] = max(1, limite // resto) if resto else 1
+            tamanhos[k] = min(passos[k], tamanhos[k])
+            eixos.append(k)
+        return eixos, passos
+
+    def calcular(self, unidade, tbs='tbs', ur='ur', q=1000., altitude=None,
+                 patm=None, saidas=('tbs', 'tbm', 'tpo', 'ur', 'rm', 'e'),
+                 tabela=None, limite=500000, tipo=np.float64):
+        # Roda a cadeia (cadeia.Cadeia ou lista de etapas) sobre a grade.
+        # tbs, ur (fração), q (m3/h), altitude (m) e patm (kPa): números ou
+        # nomes de eixos; sem altitude nem patm valem os eixos com esses
+        # nomes, se houver, senão o nível do mar
+        if not isinstance(unidade, cadeia.Cadeia):
+            unidade = cadeia.Cadeia(unidade)
+        if altitude is None and patm is None:
+            altitude = 'altitude' if 'altitude' in self.eixos else None
+            patm = 'patm' if 'patm' in self.eixos else None
+        for nome in (tbs, ur, altitude, patm, q):
+            if isinstance(nome, str) and nome not in self.eixos:
+                raise KeyError('eixo {!r} não existe'.format(nome))
+        # eixos do ar externo (q só entra na vazão, depois de pe_tbs_ur)
+        entrada = [v for v in (tbs, ur, altitude, patm) if isinstance(v, str)]
+        forma = self.forma
+        dados = {nome: np.full(forma, np.nan, dtype=tipo) for nome in saidas}
+        avisos = {}
+        eixos, passos = self._cortes(entrada, limite)
+        for inicios in itertools.product(*(range(0, forma[k], passos[k])
+                                           for k in eixos)):
+            fatias = {k: slice(i, i + passos[k])
+                      for k, i in zip(eixos, inicios)}
+            grades = self.grades(fatias)
+
+            def valor(v):
+                return grades[v] if isinstance(v, str) else v
+
+            ctx = ps.Contexto(ps.pressao_por_linha(valor(altitude),
+                                                   valor(patm)), tabela)
+            r = unidade.calcular(ctx, tbs, ur, q, grades)
+            destino = tuple(fatias.get(k, slice(None))
+                            for k in range(len(forma)))
+            for nome in saidas:
+                d = dados[nome][destino]
+                d[...] = np.broadcast_to(_ler_saida(r, nome), d.shape)
+            for etapa, aviso in r.avisos.items():
+                avisos.setdefault(etapa, aviso)
+        return ResultadoVarredura(dict(self.eixos), dados, avisos)